@@ -0,0 +1,66 @@
+"""
+Client address resolution behind trusted reverse proxies.
+
+nginx (``nginx/nginx.conf``) appends the address it saw to
+``X-Forwarded-For``, so without this every request would appear to come from
+the proxy.  The header is only believed when the direct peer is listed in
+``TRUSTED_PROXIES`` (comma-separated addresses or CIDRs); it is then walked
+right to left, skipping further trusted hops, and the first untrusted address
+is the client.  Entries left of that are client-supplied and ignored, so a
+forged header cannot pick the key a request is rate limited or locked out by.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+from functools import lru_cache
+from typing import Optional, Tuple, Union
+
+from starlette.requests import Request
+
+from app.core.settings import get_settings
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+UNKNOWN_CLIENT = "0.0.0.0"
+
+
+@lru_cache(maxsize=8)
+def trusted_networks(raw: str) -> Tuple[Network, ...]:
+    """Parse a ``TRUSTED_PROXIES`` value; invalid entries raise ``ValueError``."""
+    return tuple(ipaddress.ip_network(part.strip(), strict=False) for part in raw.split(",") if part.strip())
+
+
+def _address(value: str) -> Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]]:
+    try:
+        return ipaddress.ip_address(value.strip().strip("[]"))
+    except ValueError:
+        return None
+
+
+def _trusted(value: str, networks: Tuple[Network, ...]) -> bool:
+    address = _address(value)
+    return address is not None and any(address in network for network in networks)
+
+
+def resolve_client_ip(peer: str, forwarded_for: Optional[str], networks: Tuple[Network, ...]) -> str:
+    if not networks or not forwarded_for or not _trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if _address(hop) is None:
+            # A malformed hop cannot be attributed; fall back to the proxy.
+            return peer
+        if not _trusted(hop, networks):
+            return hop
+    return hops[0] if hops else peer
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client that sent ``request``, as seen through trusted proxies."""
+    client = request.client
+    peer = client.host if client and client.host else UNKNOWN_CLIENT
+    networks = trusted_networks(get_settings().trusted_proxies)
+    return resolve_client_ip(peer, request.headers.get("x-forwarded-for"), networks)
+
+
+__all__ = ["UNKNOWN_CLIENT", "client_ip", "resolve_client_ip", "trusted_networks"]
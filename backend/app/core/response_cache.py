@@ -0,0 +1,100 @@
+"""
+Versioned cache of pre-encoded JSON responses with strong ETags.
+
+Read-mostly endpoints register a cache key plus the version of the data the
+response depends on.  While the version is unchanged the already-encoded bytes
+(and their ETag) are reused; a matching ``If-None-Match`` short-circuits to a
+body-less ``304 Not Modified``.  Writers never touch the cache – bumping the
+version is enough to make the next read rebuild.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import Request
+from starlette.responses import Response
+
+_Entry = Tuple[Hashable, bytes, str, Dict[str, str]]  # (version, body, etag, headers)
+
+
+class Payload(NamedTuple):
+    """Return from ``build`` to cache extra response headers with the body."""
+
+    data: Any
+    headers: Dict[str, str]
+
+
+def _etag(body: bytes) -> str:
+    # Content-derived, so identical bodies get identical tags on every worker.
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Bounded LRU of encoded JSON bodies, each tagged with a data version."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> _Entry:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        # Build outside the lock; concurrent misses just encode twice.
+        built = build()
+        headers: Dict[str, str] = {}
+        if isinstance(built, Payload):
+            built, headers = built.data, dict(built.headers)
+        body = json.dumps(built, separators=(",", ":")).encode("utf-8")
+        entry = (version, body, _etag(body), headers)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_or_build(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Tuple[bytes, str]:
+        """Return ``(body, etag)`` for ``key`` at ``version``, encoding ``build()`` on a miss."""
+        _, body, etag, _ = self._lookup(key, version, build)
+        return body, etag
+
+    def respond(self, request: Request, key: Hashable, version: Hashable, build: Callable[[], Any]) -> Response:
+        _, body, etag, extra = self._lookup(key, version, build)
+        headers = {**extra, "ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+__all__ = ["Payload", "ResponseCache", "etag_matches"]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import json
 import os
 from functools import lru_cache
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel, Field
 
@@ -12,9 +13,49 @@ class Settings(BaseModel):
     login_fail_limit: int = Field(default=3)
     login_lockout_seconds: int = Field(default=30)
     login_captcha_fail_threshold: int = Field(default=1)
+    captcha_threshold: int = Field(default=3)
+    failed_ttl_seconds: int = Field(default=900)
+    captcha_valid_token: str = Field(default="1234")
+    trusted_proxies: str = Field(default="")
+    mfa_lookup_key: str = Field(default="")
+    mfa_database_url: str = Field(default="")
+    mfa_cache_ttl_seconds: float = Field(default=30.0)
+    fernet_key: str = Field(default="")
+    rate_limit_login: str = Field(default="3/10seconds;5/minute")
+    rate_limit_login_ip: str = Field(default="3/10seconds;5/minute")
     redis_url: Optional[str] = Field(default=None)
+    redis_max_connections: int = Field(default=50)
     jwt_secret: str = Field(default="your-secret-key")
     jwt_algorithm: str = Field(default="HS256")
+    token_cache_size: int = Field(default=4096)
+    access_token_expire_minutes: int = Field(default=15)
+    refresh_token_ttl_seconds: int = Field(default=14 * 24 * 3600)
+    refresh_family_ttl_seconds: int = Field(default=30 * 24 * 3600)
+    refresh_reuse_grace_seconds: float = Field(default=10.0)
+    idle_timeout_seconds: int = Field(default=30)
+    idle_session_cap: int = Field(default=100_000)
+    vote_durability: str = Field(default="flush")
+    ingest_queue_size: int = Field(default=10000)
+    ingest_batch_size: int = Field(default=512)
+    ingest_flush_interval_ms: int = Field(default=10)
+    ingest_retry_after_seconds: int = Field(default=1)
+    vote_index_bloom_bits: int = Field(default=0)
+    tally_stream_interval_ms: int = Field(default=500)
+    kiosk_signing_key: Optional[str] = Field(default=None)
+    kiosk_batch_max_items: int = Field(default=5000)
+    kiosk_batch_max_bytes: int = Field(default=2 * 1024 * 1024)
+    state_backend: str = Field(default="memory")
+    state_sqlite_path: str = Field(default="./var/state.sqlite3")
+    state_memory_max_entries: int = Field(default=200_000)
+    state_sweep_interval_seconds: float = Field(default=5.0)
+    hash_workers: int = Field(default=0)
+    hash_queue_size: int = Field(default=64)
+    hash_memory_budget_mb: int = Field(default=512)
+    hash_retry_after_seconds: int = Field(default=1)
+    argon2_profile_path: str = Field(default="./var/argon2_profile.json")
+    argon2_time_cost: int = Field(default=3)
+    argon2_memory_cost: int = Field(default=65536)  # KiB
+    argon2_parallelism: int = Field(default=2)
 
 
 def _env(name: str, default: Optional[str] = None) -> Optional[str]:
@@ -24,25 +65,121 @@ def _env(name: str, default: Optional[str] = None) -> Optional[str]:
     return value
 
 
+def _read_profile(path: str) -> Dict[str, Any]:
+    """Argon2 profile written by ``scripts/calibrate_argon2.py``; empty if absent."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
 def _load_settings() -> Settings:
     env = os.getenv
     enable_login_guards = env("ENABLE_LOGIN_GUARDS", "1") == "1"
     login_fail_limit = int(env("LOGIN_FAIL_LIMIT", "3"))
     login_lockout_seconds = int(env("LOGIN_LOCKOUT_SECONDS", "30"))
     login_captcha_fail_threshold = int(env("LOGIN_CAPTCHA_FAIL_THRESHOLD", "1"))
+    captcha_threshold = int(env("CAPTCHA_THRESHOLD", "3"))
+    failed_ttl_seconds = int(env("FAILED_TTL_SECONDS", "900"))
+    captcha_valid_token = env("CAPTCHA_VALID_TOKEN", "1234") or "1234"
+    trusted_proxies = env("TRUSTED_PROXIES", "") or ""
+    mfa_lookup_key = env("MFA_LOOKUP_KEY", "") or ""
+    mfa_database_url = env("MFA_DATABASE_URL", "") or ""
+    mfa_cache_ttl_seconds = float(env("MFA_CACHE_TTL_SECONDS", "30"))
+    fernet_key = env("FERNET_KEY", "") or ""
+    rate_limit_login = env("RATE_LIMIT_LOGIN", "3/10seconds;5/minute") or ""
+    rate_limit_login_ip = env("RATE_LIMIT_LOGIN_IP", "3/10seconds;5/minute") or ""
     redis = env("REDIS_URL")
     if redis == "":
         redis = None
+    redis_max_connections = int(env("REDIS_MAX_CONNECTIONS", "50"))
     jwt_secret = env("JWT_SECRET", "your-secret-key") or "your-secret-key"
     jwt_algorithm = env("JWT_ALGORITHM", "HS256") or "HS256"
+    token_cache_size = int(env("TOKEN_CACHE_SIZE", "4096"))
+    access_token_expire_minutes = int(env("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    refresh_token_ttl_seconds = int(env("REFRESH_TOKEN_TTL_SECONDS", str(14 * 24 * 3600)))
+    refresh_family_ttl_seconds = int(env("REFRESH_FAMILY_TTL_SECONDS", str(30 * 24 * 3600)))
+    refresh_reuse_grace_seconds = float(env("REFRESH_REUSE_GRACE_SECONDS", "10"))
+    idle_timeout_seconds = int(env("IDLE_TIMEOUT_SECONDS", "30"))
+    idle_session_cap = int(env("IDLE_SESSION_CAP", "100000"))
+    vote_durability = (env("VOTE_DURABILITY", "flush") or "flush").strip().lower()
+    if vote_durability not in ("flush", "enqueue"):
+        vote_durability = "flush"
+    ingest_queue_size = int(env("INGEST_QUEUE_SIZE", "10000"))
+    ingest_batch_size = int(env("INGEST_BATCH_SIZE", "512"))
+    ingest_flush_interval_ms = int(env("INGEST_FLUSH_INTERVAL_MS", "10"))
+    ingest_retry_after_seconds = int(env("INGEST_RETRY_AFTER_SECONDS", "1"))
+    vote_index_bloom_bits = int(env("VOTE_INDEX_BLOOM_BITS", "0"))
+    tally_stream_interval_ms = int(env("TALLY_STREAM_INTERVAL_MS", "500"))
+    kiosk_signing_key = env("KIOSK_SIGNING_KEY") or None
+    kiosk_batch_max_items = int(env("KIOSK_BATCH_MAX_ITEMS", "5000"))
+    kiosk_batch_max_bytes = int(env("KIOSK_BATCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    state_backend = (env("STATE_BACKEND", "memory") or "memory").strip().lower()
+    if state_backend not in ("memory", "sqlite", "redis"):
+        state_backend = "memory"
+    state_sqlite_path = env("STATE_SQLITE_PATH", "./var/state.sqlite3") or "./var/state.sqlite3"
+    state_memory_max_entries = int(env("STATE_MEMORY_MAX_ENTRIES", "200000"))
+    state_sweep_interval_seconds = float(env("STATE_SWEEP_INTERVAL_SECONDS", "5"))
+    hash_workers = int(env("HASH_WORKERS", "0"))
+    hash_queue_size = int(env("HASH_QUEUE_SIZE", "64"))
+    hash_memory_budget_mb = int(env("HASH_MEMORY_BUDGET_MB", "512"))
+    hash_retry_after_seconds = int(env("HASH_RETRY_AFTER_SECONDS", "1"))
+    argon2_profile_path = env("ARGON2_PROFILE_PATH", "./var/argon2_profile.json") or "./var/argon2_profile.json"
+    # Explicit env vars win over the calibrated profile, which wins over defaults.
+    profile = _read_profile(argon2_profile_path)
+    argon2_time_cost = int(env("ARGON2_TIME_COST") or profile.get("time_cost", 3))
+    argon2_memory_cost = int(env("ARGON2_MEMORY_COST") or profile.get("memory_cost", 65536))
+    argon2_parallelism = int(env("ARGON2_PARALLELISM") or profile.get("parallelism", 2))
     return Settings(
         enable_login_guards=enable_login_guards,
         login_fail_limit=login_fail_limit,
         login_lockout_seconds=login_lockout_seconds,
         login_captcha_fail_threshold=login_captcha_fail_threshold,
+        captcha_threshold=captcha_threshold,
+        failed_ttl_seconds=failed_ttl_seconds,
+        captcha_valid_token=captcha_valid_token,
+        trusted_proxies=trusted_proxies,
+        mfa_lookup_key=mfa_lookup_key,
+        mfa_database_url=mfa_database_url,
+        mfa_cache_ttl_seconds=mfa_cache_ttl_seconds,
+        fernet_key=fernet_key,
+        rate_limit_login=rate_limit_login,
+        rate_limit_login_ip=rate_limit_login_ip,
         redis_url=redis,
+        redis_max_connections=redis_max_connections,
         jwt_secret=jwt_secret,
         jwt_algorithm=jwt_algorithm,
+        token_cache_size=token_cache_size,
+        access_token_expire_minutes=access_token_expire_minutes,
+        refresh_token_ttl_seconds=refresh_token_ttl_seconds,
+        refresh_family_ttl_seconds=refresh_family_ttl_seconds,
+        refresh_reuse_grace_seconds=refresh_reuse_grace_seconds,
+        idle_timeout_seconds=idle_timeout_seconds,
+        idle_session_cap=idle_session_cap,
+        vote_durability=vote_durability,
+        ingest_queue_size=ingest_queue_size,
+        ingest_batch_size=ingest_batch_size,
+        ingest_flush_interval_ms=ingest_flush_interval_ms,
+        ingest_retry_after_seconds=ingest_retry_after_seconds,
+        vote_index_bloom_bits=vote_index_bloom_bits,
+        tally_stream_interval_ms=tally_stream_interval_ms,
+        kiosk_signing_key=kiosk_signing_key,
+        kiosk_batch_max_items=kiosk_batch_max_items,
+        kiosk_batch_max_bytes=kiosk_batch_max_bytes,
+        state_backend=state_backend,
+        state_sqlite_path=state_sqlite_path,
+        state_memory_max_entries=state_memory_max_entries,
+        state_sweep_interval_seconds=state_sweep_interval_seconds,
+        hash_workers=hash_workers,
+        hash_queue_size=hash_queue_size,
+        hash_memory_budget_mb=hash_memory_budget_mb,
+        hash_retry_after_seconds=hash_retry_after_seconds,
+        argon2_profile_path=argon2_profile_path,
+        argon2_time_cost=argon2_time_cost,
+        argon2_memory_cost=argon2_memory_cost,
+        argon2_parallelism=argon2_parallelism,
     )
 
 
@@ -0,0 +1,525 @@
+"""
+Pluggable key/value state shared by the security and voting stores.
+
+``uvicorn --workers N`` runs N interpreters, so module-level dicts silently
+diverge between workers.  Stores that must agree across workers keep their
+data behind :class:`StateBackend` instead:
+
+* ``memory`` – a dict in this process; the default, for tests and a single worker.
+* ``sqlite`` – a WAL-mode SQLite file shared by every worker on one host.
+* ``redis``  – any Redis-protocol server (``REDIS_URL``), for several hosts.
+
+Values are strings (stores JSON-encode their records); every write may carry
+a TTL in seconds.  ``update`` is the one compound operation: it applies a
+read-modify-write function atomically with respect to other workers.
+"""
+
+from __future__ import annotations
+
+import heapq
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from app.core.settings import Settings, get_settings
+
+T = TypeVar("T")
+# ``update`` callback: current value (or None) -> (new value or None to delete, result).
+Mutator = Callable[[Optional[str]], Tuple[Optional[str], T]]
+
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+BACKEND_REDIS = "redis"
+
+
+class StateBackend(ABC):
+    # Whether other processes see the same data; per-process caches that are
+    # only valid for a single writer must be disabled when this is True.
+    shared: bool = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        return [self.get(key) for key in keys]
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is absent; return whether it was set."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def update(self, key: str, fn: Mutator[T], ttl: Optional[float] = None) -> T:
+        """Atomically replace ``key`` with ``fn(current)[0]`` and return ``fn(current)[1]``."""
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """Add ``amount`` to an integer counter; ``ttl`` applies when the key is created."""
+
+        def bump(current: Optional[str]) -> Tuple[Optional[str], int]:
+            value = int(current or 0) + amount
+            return str(value), value
+
+        return self.update(key, bump, ttl=ttl if ttl else None)
+
+    def stats(self) -> Dict[str, int]:
+        """Backend-specific gauges and counters for monitoring."""
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """
+    Process-local backend.
+
+    Keys written with a TTL are soft state (login guard records, rate limits,
+    refresh tokens): they are indexed on a min-heap by expiry and swept
+    incrementally - a few on every write, and in the background when
+    ``sweep_interval`` is set - and beyond ``max_entries`` the least recently
+    used of them are evicted, so a credential-stuffing run with random
+    emails cannot grow memory without bound.
+
+    The cap applies per namespace (the key up to its first ``:``), so a
+    flood of ``guard:`` records only evicts other ``guard:`` records, never
+    rate-limit buckets or idle markers.  Namespaces in
+    ``PROTECTED_NAMESPACES`` and keys without a TTL (e.g. MFA enrolments)
+    are never evicted: refresh tokens and families are only written for
+    authenticated users, and evicting one would end a session or forget a
+    revocation.
+    """
+
+    PROTECTED_NAMESPACES = frozenset({"refresh"})
+
+    # Expired keys removed per write; keeps the sweep cost O(1) amortised.
+    _SWEEP_PER_WRITE = 32
+
+    def __init__(self, *, max_entries: Optional[int] = None, sweep_interval: Optional[float] = None) -> None:
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        # Keys with a TTL in least-recently-used order, per namespace, for eviction.
+        self._volatile: "Dict[str, OrderedDict[str, None]]" = {}
+        self._expiry: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
+        self.max_entries = max_entries
+        self.expired = 0
+        self.evicted = 0
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), name="state-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    @staticmethod
+    def _deadline(ttl: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl if ttl else None
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key.partition(":")[0] if ":" in key else ""
+
+    def _lru(self, key: str) -> "OrderedDict[str, None]":
+        namespace = self._namespace(key)
+        lru = self._volatile.get(namespace)
+        if lru is None:
+            lru = self._volatile[namespace] = OrderedDict()
+        return lru
+
+    def _remove(self, key: str) -> None:
+        self._data.pop(key, None)
+        self._lru(key).pop(key, None)
+
+    def _store(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        # Caller holds the lock.
+        previous = self._data.get(key)
+        self._data[key] = (value, expires_at)
+        lru = self._lru(key)
+        if expires_at is None:
+            lru.pop(key, None)
+        else:
+            lru[key] = None
+            lru.move_to_end(key)
+            if previous is None or previous[1] != expires_at:
+                heapq.heappush(self._expiry, (expires_at, key))
+        self._wrote(key)
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None:
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expired += 1
+                return None
+            self._lru(key).move_to_end(key)
+        return value
+
+    def _sweep(self, budget: int) -> int:
+        # Caller holds the lock.  Heap entries whose key was since rewritten
+        # or deleted are stale and simply dropped.
+        now = time.monotonic()
+        removed = 0
+        while self._expiry and budget > 0 and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            entry = self._data.get(key)
+            if entry is not None and entry[1] == expires_at:
+                self._remove(key)
+                self.expired += 1
+                removed += 1
+            budget -= 1
+        if len(self._expiry) > 2 * self._volatile_count() + 1024:
+            # Many rewrites left stale heap entries behind; rebuild.
+            self._expiry = [(self._data[k][1], k) for lru in self._volatile.values() for k in lru]  # type: ignore[misc]
+            heapq.heapify(self._expiry)
+        return removed
+
+    def _volatile_count(self) -> int:
+        return sum(len(lru) for lru in self._volatile.values())
+
+    def _wrote(self, key: str) -> None:
+        self._sweep(self._SWEEP_PER_WRITE)
+        if self.max_entries is None or self._namespace(key) in self.PROTECTED_NAMESPACES:
+            return
+        lru = self._lru(key)
+        while len(lru) > self.max_entries:
+            victim, _ = lru.popitem(last=False)
+            self._data.pop(victim, None)
+            self.evicted += 1
+
+    def sweep(self, budget: int = 1024) -> int:
+        """Remove up to ``budget`` expired keys; returns how many were removed."""
+        with self._lock:
+            return self._sweep(budget)
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            # Small batches so writers never wait long for the lock.
+            while self.sweep(256) == 256:
+                pass
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key)
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, self._deadline(ttl))
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._store(key, value, self._deadline(ttl))
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def update(self, key: str, fn: Mutator[T], ttl: Optional[float] = None) -> T:
+        with self._lock:
+            current = self._live(key)
+            new, result = fn(current)
+            if new is None:
+                self._remove(key)
+            else:
+                keep = self._data[key][1] if current is not None and ttl is None else self._deadline(ttl)
+                self._store(key, new, keep)
+            return result
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            current = self._live(key)
+            value = int(current or 0) + amount
+            deadline = self._data[key][1] if current is not None else self._deadline(ttl)
+            self._store(key, str(value), deadline)
+            return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "volatile": self._volatile_count(),
+                "max_entries": self.max_entries or 0,
+                "expiry_index": len(self._expiry),
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteBackend(StateBackend):
+    """
+    Single-host backend on a WAL-mode SQLite file.  Readers never block the
+    writer; ``update`` runs inside ``BEGIN IMMEDIATE`` so concurrent workers
+    serialise on the database write lock.
+    """
+
+    shared = True
+    _SWEEP_EVERY = 1024
+
+    def __init__(self, path: str) -> None:
+        self._path = str(path)
+        if self._path != ":memory:":
+            Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_state_expires_at ON state(expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; transactions are opened explicitly where needed.
+            conn = sqlite3.connect(self._path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _deadline(ttl: Optional[float]) -> Optional[float]:
+        # Wall clock, so every process agrees on expiry.
+        return time.time() + ttl if ttl else None
+
+    def _wrote(self, conn: sqlite3.Connection) -> None:
+        self._writes += 1
+        if self._writes % self._SWEEP_EVERY == 0:
+            conn.execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        found: Dict[str, str] = {}
+        conn = self._conn()
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            chunk = list(keys[start : start + 500])
+            marks = ",".join("?" * len(chunk))
+            for key, value in conn.execute(
+                f"SELECT key, value FROM state WHERE key IN ({marks})"
+                " AND (expires_at IS NULL OR expires_at > ?)",
+                (*chunk, now),
+            ):
+                found[key] = value
+        return [found.get(key) for key in keys]
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, self._deadline(ttl)),
+        )
+        self._wrote(conn)
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        conn = self._conn()
+        cur = conn.execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.expires_at IS NOT NULL AND state.expires_at <= ?",
+            (key, value, self._deadline(ttl), time.time()),
+        )
+        self._wrote(conn)
+        return cur.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def update(self, key: str, fn: Mutator[T], ttl: Optional[float] = None) -> T:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT value, expires_at FROM state WHERE key = ?", (key,)).fetchone()
+            current = row[0] if row and (row[1] is None or row[1] > now) else None
+            new, result = fn(current)
+            if new is None:
+                conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            else:
+                keep = row[1] if current is not None and ttl is None else self._deadline(ttl)
+                conn.execute(
+                    "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, new, keep),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote(conn)
+        return result
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        # A single upsert: no explicit transaction, no Python round trip.
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            "INSERT INTO state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET "
+            " value = CASE WHEN state.expires_at IS NOT NULL AND state.expires_at <= ?"
+            "  THEN excluded.value ELSE CAST(CAST(state.value AS INTEGER) + ? AS TEXT) END,"
+            " expires_at = CASE WHEN state.expires_at IS NOT NULL AND state.expires_at <= ?"
+            "  THEN excluded.expires_at ELSE state.expires_at END "
+            "RETURNING value",
+            (key, str(amount), self._deadline(ttl), now, amount, now),
+        ).fetchone()
+        self._wrote(conn)
+        return int(row[0])
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+# INCRBY plus "expire only if the key has no TTL yet", in one round trip.
+_INCR_SCRIPT = """
+local value = redis.call('INCRBY', KEYS[1], ARGV[1])
+if tonumber(ARGV[2]) > 0 and redis.call('PTTL', KEYS[1]) == -1 then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return value
+"""
+
+
+@lru_cache(maxsize=None)
+def redis_client(url: str, max_connections: int):
+    """
+    One client per Redis URL on a bounded connection pool, shared by the
+    state backend, the rate limiter and the login guard of this worker.
+    """
+    import redis  # optional dependency (requirements-redis.txt)
+
+    pool = redis.ConnectionPool.from_url(url, max_connections=max_connections, decode_responses=True)
+    return redis.Redis(connection_pool=pool)
+
+
+class RedisBackend(StateBackend):
+    """Backend for any Redis-protocol server; ``update`` uses WATCH/MULTI retries."""
+
+    shared = True
+
+    def __init__(self, url: str, *, prefix: str = "evp:", max_connections: int = 50) -> None:
+        self._redis = redis_client(url, max_connections)
+        self._prefix = prefix
+        self._incr = self._redis.register_script(_INCR_SCRIPT)
+        # Load up front so the first INCR is a plain EVALSHA hit.
+        self._redis.script_load(_INCR_SCRIPT)
+
+    @property
+    def client(self):
+        return self._redis
+
+    def _k(self, key: str) -> str:
+        return self._prefix + key
+
+    @staticmethod
+    def _px(ttl: Optional[float]) -> Optional[int]:
+        return max(1, int(ttl * 1000)) if ttl else None
+
+    def get(self, key: str) -> Optional[str]:
+        return self._redis.get(self._k(key))
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return list(self._redis.mget([self._k(key) for key in keys]))
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._redis.set(self._k(key), value, px=self._px(ttl))
+
+    def add(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        return bool(self._redis.set(self._k(key), value, px=self._px(ttl), nx=True))
+
+    def delete(self, key: str) -> None:
+        self._redis.delete(self._k(key))
+
+    def update(self, key: str, fn: Mutator[T], ttl: Optional[float] = None) -> T:
+        name = self._k(key)
+
+        def apply(pipe) -> T:
+            current = pipe.get(name)
+            new, result = fn(current)
+            pipe.multi()
+            if new is None:
+                pipe.delete(name)
+            elif ttl is None and current is not None:
+                pipe.set(name, new, keepttl=True)
+            else:
+                pipe.set(name, new, px=self._px(ttl))
+            return result
+
+        return self._redis.transaction(apply, name, value_from_callable=True)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        return int(self._incr(keys=[self._k(key)], args=[amount, self._px(ttl) or 0]))
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+def build_backend(settings: Settings) -> StateBackend:
+    if settings.state_backend == BACKEND_REDIS:
+        if not settings.redis_url:
+            raise RuntimeError("STATE_BACKEND=redis requires REDIS_URL")
+        return RedisBackend(settings.redis_url, max_connections=settings.redis_max_connections)
+    if settings.state_backend == BACKEND_SQLITE:
+        return SQLiteBackend(settings.state_sqlite_path)
+    return MemoryBackend(
+        max_entries=settings.state_memory_max_entries or None,
+        sweep_interval=settings.state_sweep_interval_seconds or None,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_state_backend() -> StateBackend:
+    return build_backend(get_settings())
+
+
+__all__ = [
+    "BACKEND_MEMORY",
+    "BACKEND_REDIS",
+    "BACKEND_SQLITE",
+    "MemoryBackend",
+    "RedisBackend",
+    "SQLiteBackend",
+    "StateBackend",
+    "build_backend",
+    "get_state_backend",
+    "redis_client",
+]
@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from typing import Optional
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 
@@ -25,3 +28,31 @@ def get_db():
     finally:
         db.close()
 
+
+def init_db(bind: Optional[Engine] = None) -> None:
+    """
+    Bring the schema of ``bind`` (the app database by default) up to the models.
+
+    Creates missing tables and adds missing nullable columns to existing ones;
+    anything else (new NOT NULL columns, type changes) must be migrated by
+    hand and is reported instead of silently skipped.  Run at app startup and
+    by the scripts that open their own database.
+    """
+    from app import db_models  # noqa: F401  (registers the tables on Base.metadata)
+
+    bind = bind if bind is not None else engine
+    Base.metadata.create_all(bind)
+    inspector = inspect(bind)
+    quote = bind.dialect.identifier_preparer.quote
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                if not column.nullable:
+                    raise RuntimeError(f"{table.name}.{column.name} is missing and NOT NULL; migrate it by hand")
+                conn.execute(text(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} "
+                    f"{column.type.compile(dialect=bind.dialect)}"
+                ))
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, func
+from typing import Optional
+
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, Index, LargeBinary, Text, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .db import Base
@@ -16,3 +18,61 @@ class User(Base):
     password_hash: Mapped[str] = mapped_column(String(255))
     created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
 
+
+class VoteRecord(Base):
+    """Append-only vote ledger; one row per accepted vote."""
+
+    __tablename__ = "vote_ledger"
+    __table_args__ = (
+        UniqueConstraint("voter", "ballot_id", name="uq_vote_ledger_voter_ballot"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    voter: Mapped[str] = mapped_column(String(255))
+    ballot_id: Mapped[int] = mapped_column(Integer, index=True)
+    option_index: Mapped[int] = mapped_column(Integer)
+    cast_at: Mapped[float] = mapped_column(Float)
+
+
+class BallotRecord(Base):
+    """Ballot catalog entry; options live in ``ballot_options``."""
+
+    __tablename__ = "ballots"
+    __table_args__ = (
+        Index("ix_ballots_jurisdiction_id", "jurisdiction", "id"),
+        Index("ix_ballots_status_id", "status", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    title: Mapped[str] = mapped_column(String(255))
+    jurisdiction: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    status: Mapped[str] = mapped_column(String(16), default="open")
+    opens_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    closes_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    durability: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+
+
+class BallotOption(Base):
+    __tablename__ = "ballot_options"
+
+    ballot_id: Mapped[int] = mapped_column(ForeignKey("ballots.id"), primary_key=True)
+    position: Mapped[int] = mapped_column(Integer, primary_key=True)
+    label: Mapped[str] = mapped_column(String(255))
+
+
+class MfaEnrollment(Base):
+    """TOTP enrolment of one admin; secrets are Fernet-encrypted at rest."""
+
+    __tablename__ = "mfa_enrollments"
+
+    email: Mapped[str] = mapped_column(String(255), primary_key=True)  # normalized
+    display_email: Mapped[str] = mapped_column(String(255))
+    secret_encrypted: Mapped[bytes] = mapped_column(LargeBinary)
+    backup_code_hashes: Mapped[str] = mapped_column(Text)  # JSON list of bcrypt hashes
+    backup_code_ids: Mapped[str] = mapped_column(Text)  # JSON list, aligned with the hashes
+    used_backup_codes: Mapped[str] = mapped_column(Text)  # JSON list of used hashes
+    lookup_key: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    latest_codes_encrypted: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    # Bumped on every write; updates are compare-and-swap on it.
+    version: Mapped[int] = mapped_column(Integer, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,6 @@
 # backend/app/main.py
 import os
+from contextlib import asynccontextmanager
 from typing import List
 
 from fastapi import FastAPI, Request
@@ -8,10 +9,7 @@ from fastapi.responses import JSONResponse
 from starlette.responses import Response
 
 # rate limiting
-from slowapi import Limiter
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
+from app.security.rate_limit import RateLimited, get_rate_limiter
 
 # ---- Allowed origins (env-overridable) ----
 DEFAULT_ALLOWED_ORIGINS = [
@@ -52,7 +50,25 @@ SECURITY_HEADERS = {
 # NOTE: HSTS only takes effect when served over HTTPS (enable at your reverse proxy in prod)
 STRICT_TRANSPORT_SECURITY = "max-age=31536000; includeSubDomains"
 
-app = FastAPI(title="Electronic Voting Platform (Base)")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    from app.core.settings import get_settings
+    from app.db import init_db
+
+    init_db()
+    if get_settings().mfa_database_url:
+        from app.security.mfa_store import get_mfa_store
+
+        init_db(get_mfa_store().engine)
+    yield
+    from app.routers.ballots import shutdown_ingestion
+    from app.security.hashing import shutdown_hashing
+
+    await shutdown_ingestion()
+    shutdown_hashing()
+
+
+app = FastAPI(title="Electronic Voting Platform (Base)", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -63,21 +79,19 @@ app.add_middleware(
     max_age=3600,
 )
 
-# If later behind a proxy, parse X-Forwarded-For here.
-limiter = Limiter(key_func=get_remote_address)
+# GCRA limits on the shared state backend; client IPs honour X-Forwarded-For
+# only from TRUSTED_PROXIES (see app.core.client_ip).
+limiter = get_rate_limiter()
 app.state.limiter = limiter
-app.add_middleware(SlowAPIMiddleware)
 
 
-@app.exception_handler(RateLimitExceeded)
-def _rate_limit_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
-    response = JSONResponse(
+@app.exception_handler(RateLimited)
+def _rate_limit_handler(request: Request, exc: RateLimited) -> JSONResponse:
+    return JSONResponse(
         status_code=429,
         content={"error": "too_many_requests", "detail": "Try again later."},
+        headers={"Retry-After": exc.retry_after_header},
     )
-    for header, value in (getattr(exc, "headers", {}) or {}).items():
-        response.headers.setdefault(header, value)
-    return response
 
 # ---- Security headers middleware (REQ-17) ----
 @app.middleware("http")
@@ -120,7 +134,7 @@ async def check_http_hardening(request: Request, call_next):
 def health():
     return {"ok": True}
 
-# ---- Routers (import after limiter so auth can import limiter from app.main) ----
+# ---- Routers ----
 from app.routers import admin, auth, ballots, users  # noqa: E402
 from app.models import User
 from app.security_utils import require_role
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 
 class LoginRequest(BaseModel):
     email: str
@@ -18,6 +19,22 @@ class Ballot(BaseModel):
     title: str
     options: List[str]
     totalVotes: int
+    jurisdiction: Optional[str] = None
+    status: str = "open"
+
+class BallotSpec(BaseModel):
+    id: Optional[int] = Field(default=None, gt=0)
+    title: str = Field(min_length=1, max_length=255)
+    options: List[str] = Field(min_length=1)
+    jurisdiction: Optional[str] = Field(default=None, max_length=64)
+    status: Literal["draft", "open", "closed"] = "open"
+    opens_at: Optional[datetime] = None
+    closes_at: Optional[datetime] = None
+    durability: Optional[Literal["flush", "enqueue"]] = None
+
+class BallotBulkLoadResponse(BaseModel):
+    loaded: int
+    ids: List[int]
 
 class VoteRequest(BaseModel):
     option_index: int
@@ -26,3 +43,14 @@ class VoteResponse(BaseModel):
     ballot_id: int
     option_index: int
     new_total: int
+
+class BatchVoteResult(BaseModel):
+    index: int
+    status: Literal["accepted", "duplicate", "invalid"]
+    error: Optional[str] = None
+
+class BatchVoteResponse(BaseModel):
+    accepted: int
+    duplicate: int
+    invalid: int
+    results: List[BatchVoteResult]
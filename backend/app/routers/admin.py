@@ -1,5 +1,9 @@
 from fastapi import APIRouter, Depends
 
+from app.core.state import get_state_backend
+from app.security import token_cache_stats
+from app.security.hashing import get_hashing_service
+from app.security.idle import get_idle_tracker
 from app.security_utils import User, require_role
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -8,3 +12,27 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 @router.get("/ballots")
 def list_admin_ballots(user: User = Depends(require_role("admin"))):
     return {"managed_by": user.email, "ballots": ["Q1-2025", "Q2-2025"]}
+
+
+@router.get("/hashing")
+def hashing_stats(user: User = Depends(require_role("admin"))):
+    """Password-hashing pool: queue depth, rejections and latency percentiles."""
+    return get_hashing_service().stats()
+
+
+@router.get("/token-cache")
+def token_cache(user: User = Depends(require_role("admin"))):
+    """Verified-JWT cache: size, hits, misses and evictions."""
+    return token_cache_stats()
+
+
+@router.get("/sessions")
+def session_gauge(user: User = Depends(require_role("admin"))):
+    """Idle-session tracker: live sessions, cap, expired and evicted counts."""
+    return get_idle_tracker().stats()
+
+
+@router.get("/state")
+def state_gauge(user: User = Depends(require_role("admin"))):
+    """State backend: entry counts, expired and evicted keys (memory backend only)."""
+    return get_state_backend().stats()
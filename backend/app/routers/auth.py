@@ -1,44 +1,52 @@
 # backend/app/routers/auth.py
-import io
+import time
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-import qrcode
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Header
 from fastapi.responses import JSONResponse, Response
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, EmailStr, Field
 from sqlalchemy import or_, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.db_models import User as DBUser
 from app.core.settings import get_settings
+from app.core.client_ip import client_ip
+from app.core.response_cache import etag_matches
+from app.core.state import get_state_backend
 from jose import JWTError, jwt
 
-from app.security.captcha_guard import clear, needs_captcha, record_failed, verify_captcha_token
-from app.security.attempts import store
+from app.security.accounts import (
+    DEMO_ADMIN_EMAIL,
+    DEMO_PASSWORD,
+    DEMO_USERNAME,
+    SignupPayload,
+    is_reserved_identity,
+)
+from app.security.login_guard import FAILURE, SUCCESS, GuardDecision, get_login_guard
 from app.security.mfa import (
     enroll as mfa_enroll,
     is_enrolled as mfa_is_enrolled,
-    latest_backup_codes,
     provisioning_uri as mfa_provisioning_uri,
+    take_backup_codes,
     try_backup_code as mfa_try_backup_code,
     verify_totp as mfa_verify_totp,
 )
-from app.security.passwords import hash_password, verify_password
+from app.security.hashing import HashingBusy
+from app.security.mfa_qr import get_qr_cache, qr_etag
+from app.security.passwords import (
+    hash_password,
+    hash_password_async,
+    password_needs_rehash,
+    verify_password,
+    verify_password_async,
+)
+from app.security.rate_limit import get_rate_limiter
+from app.security.idle import IDLE_MARKER_SECONDS, get_idle_tracker
 from app.security.logger import auth_logger as logger
+from app.security.refresh_tokens import RefreshTokenError, RefreshTokenReused, refresh_tokens
 
-try:
-    from app.main import limiter  # type: ignore
-except Exception:  # fallback if limiter import fails
-    limiter = None
-
-# ---- Demo credentials ----
-DEMO_ADMIN_EMAIL = "admin@evp-demo.com"
-DEMO_USERNAME = "admin"
-DEMO_PASSWORD = "secret123"
-
-ACCESS_TOKEN_EXPIRE_MINUTES = 1   # ~1 minute for testing
-IDLE_TIMEOUT_MINUTES = 0.5        # ~30 seconds idle timeout
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -53,40 +61,8 @@ class LoginPayload(BaseModel):
 class LoginResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
-
-class SignupPayload(BaseModel):
-    username: str = Field(min_length=3, max_length=32)
-    email: EmailStr
-    password: str = Field(min_length=8, max_length=128)
-
-    @field_validator("username")
-    @classmethod
-    def _username_rules(cls, v: str) -> str:
-        import re
-        v2 = v.strip()
-        if v2 != v:
-            raise ValueError("username must not have surrounding spaces")
-        if not re.fullmatch(r"[A-Za-z0-9][A-Za-z0-9_]*", v):
-            raise ValueError("username must be alphanumeric with underscores")
-        return v
-
-    @field_validator("password")
-    @classmethod
-    def _password_rules(cls, v: str) -> str:
-        import re
-        if any(ord(ch) < 32 for ch in v):
-            raise ValueError("password contains control characters")
-        if v.strip() != v:
-            raise ValueError("password must not have surrounding spaces")
-        if not re.search(r"[a-z]", v):
-            raise ValueError("password must include a lowercase letter")
-        if not re.search(r"[A-Z]", v):
-            raise ValueError("password must include an uppercase letter")
-        if not re.search(r"\d", v):
-            raise ValueError("password must include a digit")
-        if not re.search(r"[^A-Za-z0-9]", v):
-            raise ValueError("password must include a special character")
-        return v
+    expires_in: Optional[int] = None
+    refresh_token: Optional[str] = None
 
 class SignupResponse(BaseModel):
     id: int
@@ -113,6 +89,9 @@ class RefreshResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
 
+class RefreshTokenPayload(BaseModel):
+    refresh_token: str = Field(min_length=16, max_length=256)
+
 # ---------------- UX Event payload ----------------
 class UxEventPayload(BaseModel):
     name: str
@@ -121,16 +100,25 @@ class UxEventPayload(BaseModel):
     details: Optional[Dict[str, str]] = None
 
 # ---------------- Idle session tracking ----------------
-idle_sessions = {}
-
+# Single process: a timing wheel (app.security.idle). With a shared state
+# backend, last-activity times go there instead so any worker can judge
+# idleness; entries live for IDLE_MARKER_SECONDS, as the wheel's expired
+# markers do, so an idle session still reads as idle rather than as unknown.
 def update_activity(username: str):
-    idle_sessions[username] = datetime.utcnow()
+    backend = get_state_backend()
+    if not backend.shared:
+        get_idle_tracker().touch(username)
+        return
+    backend.set(f"idle:{username}", repr(time.time()), ttl=IDLE_MARKER_SECONDS)
 
 def check_idle(username: str) -> bool:
-    last = idle_sessions.get(username)
-    if not last:
+    backend = get_state_backend()
+    if not backend.shared:
+        return get_idle_tracker().is_idle(username)
+    raw = backend.get(f"idle:{username}")
+    if not raw:
         return False
-    return (datetime.utcnow() - last) > timedelta(minutes=IDLE_TIMEOUT_MINUTES)
+    return time.time() - float(raw) > get_settings().idle_timeout_seconds
 
 # ---------------- JWT helpers ----------------
 def _jwt_config() -> tuple[str, str]:
@@ -145,7 +133,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = datetime.utcnow() + timedelta(minutes=get_settings().access_token_expire_minutes)
     to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     secret, algorithm = _jwt_config()
     encoded_jwt = jwt.encode(to_encode, secret, algorithm=algorithm)
@@ -161,11 +149,10 @@ def verify_token(token: str):
 
 # ---------------- Utilities ----------------
 def _client_ip(request: Request) -> str:
-    client = request.client
-    return client.host if client and client.host else "0.0.0.0"
+    return client_ip(request)
 
 def _guard_key(email: str, ip: str) -> str:
-    return store.key(email, ip)
+    return get_login_guard().key(email, ip)
 
 
 @router.get("/captcha/status")
@@ -174,59 +161,117 @@ def captcha_status(request: Request, email: EmailStr = Query(...)):
     Report whether the caller must complete a captcha challenge before logging in.
     Works for both the new login guards (default) and the legacy in-memory guard.
     """
-    settings = get_settings()
-    ip = _client_ip(request)
-    if settings.enable_login_guards:
-        key = _guard_key(str(email), ip)
-        state = store.get(key, window_seconds=settings.login_lockout_seconds)
-        required = state.fails >= settings.login_captcha_fail_threshold
-        return {"captcha_required": required}
-    return {"captcha_required": needs_captcha(str(email), ip)}
+    decision = get_login_guard().evaluate(_guard_key(str(email), _client_ip(request)))
+    return {"captcha_required": decision.captcha_required}
 
 
-def _authenticate_user(db: Session, identifier: str, password: str) -> Optional[Tuple[str, bool]]:
-    try:
-        stmt = select(DBUser).where(or_(DBUser.email == identifier, DBUser.username == identifier))
-        user = db.execute(stmt).scalars().first()
-        if user and verify_password(password, user.password_hash):
-            is_admin = user.email.lower() == DEMO_ADMIN_EMAIL.lower() or user.username == DEMO_USERNAME
-            return user.email, is_admin
-    except Exception:
-        pass
+def _hashing_busy(exc: HashingBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="auth_busy",
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
+
+def _find_user(db: Session, identifier: str) -> Optional[DBUser]:
+    stmt = select(DBUser).where(or_(DBUser.email == identifier, DBUser.username == identifier))
+    return db.execute(stmt).scalars().first()
+
+
+def _subject(user: DBUser) -> Tuple[str, bool]:
+    is_admin = user.email.lower() == DEMO_ADMIN_EMAIL.lower() or user.username == DEMO_USERNAME
+    return user.email, is_admin
+
+
+def _demo_subject(identifier: str, password: str) -> Optional[Tuple[str, bool]]:
     ident_lower = identifier.lower()
     if ident_lower in {DEMO_ADMIN_EMAIL.lower(), DEMO_USERNAME.lower()} and password == DEMO_PASSWORD:
         return DEMO_ADMIN_EMAIL, True
     return None
 
+
+def _store_rehash(db: Session, user: DBUser, password_hash: str) -> None:
+    user.password_hash = password_hash
+    db.commit()
+    logger.info(f"Rehashed password for {user.email} with current Argon2 parameters")
+
+
+def _maybe_rehash(db: Session, user: DBUser, password: str) -> None:
+    """Upgrade a hash made with outdated Argon2 parameters; best effort."""
+    if not password_needs_rehash(user.password_hash):
+        return
+    try:
+        _store_rehash(db, user, hash_password(password))
+    except Exception:
+        # A busy pool or DB hiccup must not fail an otherwise valid login.
+        db.rollback()
+
+
+async def _maybe_rehash_async(db: Session, user: DBUser, password: str) -> None:
+    if not password_needs_rehash(user.password_hash):
+        return
+    try:
+        _store_rehash(db, user, await hash_password_async(password))
+    except Exception:
+        db.rollback()
+
+
+def _authenticate_user(db: Session, identifier: str, password: str) -> Optional[Tuple[str, bool]]:
+    try:
+        user = _find_user(db, identifier)
+        if user and verify_password(password, user.password_hash):
+            _maybe_rehash(db, user, password)
+            return _subject(user)
+    except HashingBusy as exc:  # includes HashingUnavailable (the pool failed)
+        raise _hashing_busy(exc) from exc
+    except SQLAlchemyError:
+        pass  # no usable users table: only the demo admin can sign in
+    return _demo_subject(identifier, password)
+
+
+async def _authenticate_user_async(db: Session, identifier: str, password: str) -> Optional[Tuple[str, bool]]:
+    """Like :func:`_authenticate_user`, but awaits the Argon2 check off the event loop."""
+    try:
+        user = _find_user(db, identifier)
+        if user and await verify_password_async(password, user.password_hash):
+            await _maybe_rehash_async(db, user, password)
+            return _subject(user)
+    except HashingBusy as exc:  # includes HashingUnavailable (the pool failed)
+        raise _hashing_busy(exc) from exc
+    except SQLAlchemyError:
+        pass  # no usable users table: only the demo admin can sign in
+    return _demo_subject(identifier, password)
+
+def _locked_response(decision: GuardDecision) -> JSONResponse:
+    headers: Dict[str, str] = {}
+    if decision.captcha_required:
+        headers["X-Captcha-Required"] = "true"
+    if decision.retry_after:
+        headers["Retry-After"] = str(decision.retry_after)
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"error": "locked", "retry_after": decision.retry_after},
+        headers=headers or None,
+    )
+
 # ---------------- Login handler ----------------
-def _handle_login(request: Request, payload: LoginPayload, db: Session, *, force_fail: bool = False) -> LoginResponse:
-    settings = get_settings()
-    guards_enabled = settings.enable_login_guards
+async def _handle_login(request: Request, payload: LoginPayload, db: Session, *, force_fail: bool = False) -> LoginResponse:
+    guard = get_login_guard()
+    guards_enabled = guard.config.enabled
     ip = _client_ip(request)
     identifier = payload.email
     logger.info(f"Login attempt for {identifier} from IP {ip} Email:{payload.email} Password:[REDACTED]")
 
-    guard_key = _guard_key(str(identifier), ip) if guards_enabled else None
-    state = store.get(guard_key, window_seconds=settings.login_lockout_seconds) if guards_enabled and guard_key else None
+    # One read decides lockout and captcha for this (email, ip).
+    guard_key = guard.key(str(identifier), ip)
+    decision = guard.evaluate(guard_key)
 
     # Handle locked account
-    if guards_enabled and guard_key:
-        locked, retry_after = store.is_locked(guard_key)
-        if locked:
-            headers: Dict[str, str] = {}
-            if state and state.fails >= settings.login_captcha_fail_threshold:
-                headers["X-Captcha-Required"] = "true"
-            if retry_after:
-                headers["Retry-After"] = str(retry_after)
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={"error": "locked", "retry_after": retry_after},
-                headers=headers or None,
-            )
+    if decision.locked:
+        return _locked_response(decision)
 
     # Legacy captcha guard if login guards disabled
-    if not guards_enabled and needs_captcha(identifier, ip) and not verify_captcha_token(payload.captcha_token):
+    if not guards_enabled and decision.captcha_required and not guard.captcha_ok(payload.captcha_token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="captcha_required_or_invalid",
@@ -235,48 +280,24 @@ def _handle_login(request: Request, payload: LoginPayload, db: Session, *, force
     simulate_fail = bool(force_fail) if guards_enabled else False
 
     # Simulate fail if requested
-    subject = None if simulate_fail else _authenticate_user(db, identifier, payload.password)
+    subject = None if simulate_fail else await _authenticate_user_async(db, identifier, payload.password)
     if not subject:
-        headers: Dict[str, str] = {}
-        retry_after = 0
-        captcha_required = False
-        if guards_enabled and guard_key:
-            fails, locked_now, retry_after = store.register_fail(
-                guard_key,
-                settings.login_fail_limit,
-                settings.login_lockout_seconds,
-            )
-            if fails >= settings.login_captcha_fail_threshold:
-                headers["X-Captcha-Required"] = "true"
-                captcha_required = True
-            if locked_now:
-                if retry_after:
-                    headers["Retry-After"] = str(retry_after)
-                logger.warning(f"Failed login for {identifier} from IP {ip}  Email:{payload.email} Password:[REDACTED]")
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={"error": "locked", "retry_after": retry_after},
-                    headers=headers or None,
-                )
-
-        failed = record_failed(identifier, ip)
+        decision = guard.record(guard_key, FAILURE)
         logger.warning(f"Failed login for {identifier} from IP {ip}  Email:{payload.email} Password:[REDACTED]")
+        if decision.locked:
+            return _locked_response(decision)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail={"error": "invalid_credentials", "failed_attempts": failed},
-            headers=headers or None,
+            detail={"error": "invalid_credentials", "failed_attempts": decision.failures},
+            headers={"X-Captcha-Required": "true"} if guards_enabled and decision.captcha_required else None,
         )
 
-    if guards_enabled and guard_key:
-        current_state = state or store.get(guard_key, window_seconds=settings.login_lockout_seconds)
-        captcha_required = current_state.fails >= settings.login_captcha_fail_threshold
-        if captcha_required and not verify_captcha_token(payload.captcha_token):
-            headers = {"X-Captcha-Required": "true"}
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="captcha_required_or_invalid",
-                headers=headers,
-            )
+    if guards_enabled and decision.captcha_required and not guard.captcha_ok(payload.captcha_token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="captcha_required_or_invalid",
+            headers={"X-Captcha-Required": "true"},
+        )
 
     canonical_email, is_admin = subject
 
@@ -295,26 +316,35 @@ def _handle_login(request: Request, payload: LoginPayload, db: Session, *, force
 
     logger.info(f"Successful login for {identifier} from IP {ip}  Email:{payload.email} Password:[REDACTED]")
 
-    # Success → clear counters, register success, update idle
-    clear(identifier, ip)
-    if guards_enabled and guard_key:
-        store.register_success(guard_key)
-    update_activity(identifier)
+    # Success → clear counters, update idle
+    guard.record(guard_key, SUCCESS)
+    update_activity(canonical_email)
 
     role = "admin" if is_admin else "voter"
-    token = create_access_token({"sub": canonical_email, "role": role})
-    return LoginResponse(access_token=token)
+    return _issue_tokens(canonical_email, role, refresh_tokens.issue(canonical_email, role))
+
+
+def _issue_tokens(subject: str, role: str, refresh_token: str) -> LoginResponse:
+    return LoginResponse(
+        access_token=create_access_token({"sub": subject, "role": role}),
+        expires_in=get_settings().access_token_expire_minutes * 60,
+        refresh_token=refresh_token,
+    )
 
 # ---------------- Login route ----------------
-if limiter:
-    @router.post("/login", response_model=LoginResponse)
-    @limiter.limit("3/10seconds;5/minute")
-    async def login(request: Request, payload: LoginPayload, force_fail: int = Query(0, include_in_schema=False), db: Session = Depends(get_db)) -> LoginResponse:
-        return _handle_login(request, payload, db, force_fail=bool(force_fail))
-else:
-    @router.post("/login", response_model=LoginResponse)
-    async def login(request: Request, payload: LoginPayload, force_fail: int = Query(0, include_in_schema=False), db: Session = Depends(get_db)) -> LoginResponse:
-        return _handle_login(request, payload, db, force_fail=bool(force_fail))
+def _limit_login(request: Request, email: str) -> None:
+    """Per (IP, email) limit, plus a looser per-IP limit against email spraying."""
+    settings = get_settings()
+    limiter = get_rate_limiter()
+    ip = _client_ip(request)
+    limiter.hit("login-ip", ip, settings.rate_limit_login_ip)
+    limiter.hit("login", f"{ip}|{email.strip().lower()}", settings.rate_limit_login)
+
+
+@router.post("/login", response_model=LoginResponse)
+async def login(request: Request, payload: LoginPayload, force_fail: int = Query(0, include_in_schema=False), db: Session = Depends(get_db)) -> LoginResponse:
+    _limit_login(request, str(payload.email))
+    return await _handle_login(request, payload, db, force_fail=bool(force_fail))
 
 # ---------------- Signup ----------------
 @router.post("/signup", response_model=SignupResponse, status_code=201)
@@ -322,7 +352,7 @@ def signup(payload: SignupPayload, db: Session = Depends(get_db)) -> SignupRespo
     username = payload.username
     email = payload.email
 
-    if username.lower() == DEMO_USERNAME.lower() or str(email).lower() == DEMO_ADMIN_EMAIL.lower():
+    if is_reserved_identity(username, email):
         raise HTTPException(status_code=403, detail="reserved_identity")
 
     stmt = select(DBUser).where(or_(DBUser.username == username, DBUser.email == email))
@@ -330,7 +360,11 @@ def signup(payload: SignupPayload, db: Session = Depends(get_db)) -> SignupRespo
     if existing:
         raise HTTPException(status_code=409, detail="username_or_email_already_exists")
 
-    user = DBUser(username=username, email=str(email), password_hash=hash_password(payload.password))
+    try:
+        password_hash = hash_password(payload.password)
+    except HashingBusy as exc:
+        raise _hashing_busy(exc) from exc
+    user = DBUser(username=username, email=str(email), password_hash=password_hash)
     db.add(user)
     db.commit()
     db.refresh(user)
@@ -350,7 +384,7 @@ def enroll_mfa(payload: MfaEnrollPayload, db: Session = Depends(get_db)) -> MfaE
 
     record = mfa_enroll(canonical_email)
     otpauth_uri = mfa_provisioning_uri(canonical_email)
-    backup_codes = latest_backup_codes(canonical_email)
+    backup_codes = take_backup_codes(canonical_email)
     return MfaEnrollResponse(otpauth_uri=otpauth_uri, backup_codes=backup_codes)
 
 @router.post("/mfa/verify-setup", status_code=status.HTTP_204_NO_CONTENT)
@@ -361,8 +395,14 @@ def verify_mfa_setup(payload: MfaVerifyPayload) -> Response:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_otp")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
+
 @router.post("/mfa/qrcode")
-def get_mfa_qrcode(payload: MfaQrPayload, db: Session = Depends(get_db)) -> Response:
+def get_mfa_qrcode(
+    payload: MfaQrPayload,
+    fmt: str = Query("png", alias="format", pattern="^(png|svg)$"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     subject = _authenticate_user(db, payload.email, payload.password)
     if not subject:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_credentials")
@@ -375,27 +415,60 @@ def get_mfa_qrcode(payload: MfaQrPayload, db: Session = Depends(get_db)) -> Resp
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="mfa_not_enrolled")
 
     otpauth_uri = mfa_provisioning_uri(canonical_email)
-    img = qrcode.make(otpauth_uri)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    return Response(content=buf.getvalue(), media_type="image/png")
+    # The QR carries the TOTP secret: cache only privately, always revalidate.
+    headers = {"Cache-Control": "private, no-cache"}
+    etag = qr_etag(otpauth_uri, fmt)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={**headers, "ETag": etag})
+    rendered = get_qr_cache().render(canonical_email, otpauth_uri, fmt)
+    return Response(content=rendered.content, media_type=rendered.media_type, headers={**headers, "ETag": rendered.etag})
+
 
 # ---------------- Refresh JWT / Idle ----------------
 @router.post("/refresh", response_model=RefreshResponse)
 async def refresh(payload: LoginPayload, authorization: str = Header(...)):
     token = authorization.split(" ")[1]  # extract token
-    verify_token(token)
+    token_claims = verify_token(token)
 
-    username = payload.email
+    # Idle times are keyed by the canonical email, as login and /token/refresh do.
+    username = token_claims.get("sub") or payload.email
     if check_idle(username):
         logger.info(f"Auto-logout triggered for user: {username} due to inactivity.")
         raise HTTPException(status_code=401, detail="idle_timeout")
 
     update_activity(username)
-    access_token = create_access_token({"sub": username})
+    claims = {"sub": username}
+    role = token_claims.get("role")
+    if role in ("admin", "voter"):
+        claims["role"] = role
+    access_token = create_access_token(claims)
     logger.info(f"Session refreshed for {username}")
     return RefreshResponse(access_token=access_token)
 
+
+@router.post("/token/refresh", response_model=LoginResponse)
+def rotate_refresh_token(payload: RefreshTokenPayload) -> LoginResponse:
+    """Exchange a refresh token for a new access token and a new refresh token."""
+    try:
+        new_refresh, subject, role = refresh_tokens.rotate(payload.refresh_token)
+    except RefreshTokenReused:
+        logger.warning("Refresh token reuse detected; token family revoked")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="refresh_token_reused")
+    except RefreshTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_refresh_token")
+    if check_idle(subject):
+        refresh_tokens.revoke(new_refresh)
+        logger.info(f"Auto-logout triggered for user: {subject} due to inactivity.")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="idle_timeout")
+    update_activity(subject)
+    return _issue_tokens(subject, role, new_refresh)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(payload: RefreshTokenPayload) -> Response:
+    refresh_tokens.revoke(payload.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 # ---------------- UX events (REQ-16 simple) ----------------
 @router.post("/ux", status_code=status.HTTP_204_NO_CONTENT)
 def ux_event(event: UxEventPayload, authorization: str = Header(...)) -> Response:
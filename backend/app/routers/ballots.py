@@ -1,86 +1,484 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models import Ballot, VoteRequest, VoteResponse
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from app.core.response_cache import Payload, ResponseCache
+from app.core.settings import get_settings
+from app.core.state import get_state_backend
+from app.models import (
+    Ballot,
+    BallotBulkLoadResponse,
+    BallotSpec,
+    BatchVoteResponse,
+    BatchVoteResult,
+    VoteRequest,
+    VoteResponse,
+)
 from app.security import User, require_role
+from app.voting.batch import BatchFormatError, JsonArrayStream, validate_item
+from app.voting.catalog import DEMO_BALLOTS, BallotCatalog, BallotInfo, utc_naive, utc_now
+from app.voting.dedup import VoterIndex
+from app.voting.ingest import DuplicateVote, IngestQueueFull, VoteIngestor
+from app.voting.ledger import VoteLedger, VoteTuple, get_ledger, normalize_voter
+from app.voting.stream import KEEPALIVE_FRAME, TallyBroadcaster
+from app.voting.tally import TallyReplica, tally
 
 router = APIRouter(prefix="/ballots", tags=["ballots"])
+logger = logging.getLogger(__name__)
 
-# In-memory ballots (no persistence)
-BALLOTS = {
-    1: {
-        "title": "City Council Election",
-        "options": ["Alice Smith", "Bob Jones", "Carol Diaz"],
-        "votes": [0, 0, 0],
-    },
-    2: {
-        "title": "Referendum: Approve Park Renovation?",
-        "options": ["Yes", "No"],
-        "votes": [0, 0],
-    },
-}
-
-# Track per-user voting to prevent multiple votes per ballot (in-memory).
-# Key: (email_lower, ballot_id) -> True
-VOTED: dict[tuple[str, int], bool] = {}
+# Ballot metadata lives in the catalog tables next to the ledger; vote counts
+# live in the tally engine and are rebuilt from the durable ledger. A ballot's
+# optional durability ("flush" or "enqueue") overrides VOTE_DURABILITY.
+_counts_lock = threading.Lock()
+_counts_source: Optional[VoteLedger] = None
+_catalog: Optional[BallotCatalog] = None
+# Set when the state backend is shared between workers (STATE_BACKEND=sqlite/redis).
+_replica: Optional[TallyReplica] = None
+# Shared counter bumped by every worker's bulk loads (shared backends only).
+_catalog_key: Optional[str] = None
 
 
-@router.get("/tally")
-def tally_admin(user: User = Depends(require_role("admin"))):
+def _load_tally(info: BallotInfo, counts: Dict[int, Dict[int, int]]) -> None:
+    per_option = counts.get(info.id, {})
+    votes = [per_option.get(i, 0) for i in range(len(info.options))]
+    tally.load(info.id, votes)
+    if _replica is not None:
+        _replica.seed(info.id, votes)
+
+
+def _load_counts(ledger: VoteLedger) -> None:
+    """Open the catalog and rebuild the tally from ``ledger`` the first time it is used."""
+    global _counts_source, _catalog, _replica, _catalog_key
+    if _counts_source is ledger:
+        return
+    with _counts_lock:
+        if _counts_source is ledger:
+            return
+        if _replica is not None:
+            _replica.detach()
+            _replica = None
+        _catalog_key = None
+        backend = get_state_backend()
+        if backend.shared:
+            interval = get_settings().tally_stream_interval_ms / 1000.0
+            # Counters are scoped to the ledger database they were rebuilt from.
+            scope = hashlib.blake2b(str(ledger.engine.url).encode(), digest_size=6).hexdigest()
+            _replica = TallyReplica(tally, backend, interval=interval, prefix=f"tally:{scope}")
+            _replica.attach()
+            _catalog_key = f"catalog:{scope}:version"
+        catalog = BallotCatalog(ledger.engine)
+        catalog.seed(DEMO_BALLOTS)
+        counts = ledger.counts()
+        for info in catalog.all():
+            _load_tally(info, counts)
+        _catalog = catalog
+        _counts_source = ledger
+
+
+def _shared_catalog_version() -> int:
+    """How many bulk loads any worker has made; 0 without a shared backend."""
+    if _catalog_key is None:
+        return 0
+    return int(get_state_backend().get(_catalog_key) or 0)
+
+
+def _ballot_widths() -> List[Tuple[int, int]]:
+    return [(info.id, len(info.options)) for info in _catalog.all()] if _catalog is not None else []
+
+
+def _sync_tally() -> None:
+    """Fold other workers' votes into the local tally (rate-limited)."""
+    if _replica is not None:
+        _replica.maybe_pull(_ballot_widths)
+
+
+def current_ledger(ledger: VoteLedger = Depends(get_ledger)) -> VoteLedger:
+    _load_counts(ledger)
+    _sync_tally()
+    return ledger
+
+
+def get_catalog(ledger: VoteLedger = Depends(current_ledger)) -> BallotCatalog:
+    if _catalog is None:
+        raise RuntimeError("ballot catalog was not opened by current_ledger")
+    return _catalog
+
+
+def _find_ballot(catalog: BallotCatalog, ledger: VoteLedger, ballot_id: int) -> Optional[BallotInfo]:
+    info, added = catalog.lookup(ballot_id)
+    if added:
+        # Added by another worker since startup; count its stored votes once.
+        _load_tally(info, ledger.counts(ballot_id))
+    return info
+
+
+def _remember_ballots(catalog: BallotCatalog, ledger: VoteLedger, infos: List[BallotInfo]) -> None:
+    """Mirror ballots read by a listing, so their votes are counted and pulled like the rest."""
+    for info in catalog.remember(infos):
+        _load_tally(info, ledger.counts(info.id))
+
+
+def _find_ballots(
+    catalog: BallotCatalog, ledger: VoteLedger, ballot_ids: Set[int]
+) -> Dict[int, Optional[BallotInfo]]:
+    """:func:`_find_ballot` for many ids; run it off the event loop, it may query the database."""
+    return {ballot_id: _find_ballot(catalog, ledger, ballot_id) for ballot_id in ballot_ids}
+
+
+_ingestor: Optional[VoteIngestor] = None
+_ingestor_lock = threading.Lock()
+
+
+def get_ingestor(ledger: VoteLedger = Depends(current_ledger)) -> VoteIngestor:
+    global _ingestor
+    if _ingestor is not None and _ingestor.ledger is ledger:
+        return _ingestor
+    with _ingestor_lock:
+        if _ingestor is None or _ingestor.ledger is not ledger:
+            settings = get_settings()
+            index: Optional[VoterIndex] = None
+            # The index only knows this worker's votes; with several workers
+            # its "never voted" answers would be wrong, so go to the ledger.
+            if not get_state_backend().shared:
+                index = VoterIndex.rebuild(
+                    ledger.iter_keys(),
+                    expected=ledger.vote_count(),
+                    bloom_bits_per_entry=settings.vote_index_bloom_bits,
+                )
+                logger.info("Voter index rebuilt: %s", index.stats())
+            _ingestor = VoteIngestor(
+                ledger,
+                tally,
+                max_queue=settings.ingest_queue_size,
+                batch_size=settings.ingest_batch_size,
+                flush_interval=settings.ingest_flush_interval_ms / 1000.0,
+                retry_after=settings.ingest_retry_after_seconds,
+                index=index,
+            )
+    return _ingestor
+
+
+async def shutdown_ingestion() -> None:
+    # Write-behind votes acknowledged on enqueue must reach the ledger.
+    if _ingestor is not None:
+        await _ingestor.close()
+
+
+def _tally_rows(snapshot: Dict[int, Tuple[List[int], int]]) -> List[Dict[str, Any]]:
     out = []
-    for bid, data in BALLOTS.items():
+    for info in _catalog.all() if _catalog is not None else []:
+        votes, total = snapshot.get(info.id, ([0] * len(info.options), 0))
         out.append({
-            "id": bid,
-            "title": data["title"],
-            "options": data["options"],
-            "votes": data["votes"],
-            "totalVotes": sum(data["votes"]),
+            "id": info.id,
+            "title": info.title,
+            "options": list(info.options),
+            "votes": votes,
+            "totalVotes": total,
         })
     return out
 
-@router.get("", response_model=list[Ballot])
-def list_ballots():
-    out = []
-    for bid, data in BALLOTS.items():
-        out.append(Ballot(
-            id=bid,
-            title=data["title"],
-            options=data["options"],
-            totalVotes=sum(data["votes"])
-        ))
+
+_broadcaster: Optional[TallyBroadcaster] = None
+
+
+def get_broadcaster(ledger: VoteLedger = Depends(current_ledger)) -> TallyBroadcaster:
+    global _broadcaster
+    if _broadcaster is None:
+        interval = get_settings().tally_stream_interval_ms / 1000.0
+        _broadcaster = TallyBroadcaster(tally, _tally_rows, interval=interval, refresh=_sync_tally)
+    return _broadcaster
+
+
+@router.get("/tally")
+def tally_admin(user: User = Depends(require_role("admin")), ledger: VoteLedger = Depends(current_ledger)):
+    return _tally_rows(tally.snapshot())
+
+
+@router.post("/recount")
+async def recount_admin(
+    bucket_seconds: int = Query(default=60, ge=1, le=86400),
+    user: User = Depends(require_role("admin")),
+    ingestor: VoteIngestor = Depends(get_ingestor),
+):
+    """Audit recount of the whole ledger, with drift against the live tally."""
+    from app.voting.recount import live_counts, recount
+
+    # Votes acknowledged on enqueue are not in the ledger yet.
+    await ingestor.drain()
+    if _replica is not None:
+        await asyncio.to_thread(_replica.pull, _ballot_widths())
+    version = tally.version
+    live = live_counts(tally.snapshot())
+    report = await asyncio.to_thread(
+        recount, ingestor.ledger.engine, live=live, bucket_seconds=bucket_seconds
+    )
+    out = report.to_dict()
+    # Votes cast while the recount ran show up as drift; flag it so the audit is rerun.
+    out["liveChanged"] = tally.version != version
     return out
 
+
+# Comment frame sent when nothing else was, so proxies keep the stream open.
+STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+@router.get("/tally/stream")
+async def tally_stream(
+    request: Request,
+    user: User = Depends(require_role("admin")),
+    broadcaster: TallyBroadcaster = Depends(get_broadcaster),
+):
+    """Server-Sent Events: one ``snapshot`` frame, then coalesced ``delta`` frames."""
+    queue = broadcaster.subscribe()
+
+    async def frames():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE_FRAME
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Encoded ballot responses; rebuilt only when the catalog or tally version moves.
+# The tally follows other workers' votes through the replica; bulk loads on
+# other workers are seen through the shared catalog counter.
+ballot_cache = ResponseCache()
+
+# Largest catalog accepted by one bulk-load request.
+BULK_LOAD_MAX_ITEMS = 50_000
+
+
+def _ballot(info: BallotInfo) -> Dict[str, Any]:
+    return Ballot(
+        id=info.id,
+        title=info.title,
+        options=list(info.options),
+        totalVotes=tally.total(info.id),
+        jurisdiction=info.jurisdiction,
+        status=info.status,
+    ).model_dump()
+
+
+@router.get("", response_model=list[Ballot])
+def list_ballots(
+    request: Request,
+    cursor: Optional[int] = Query(default=None, ge=0),
+    limit: int = Query(default=100, ge=1, le=500),
+    jurisdiction: Optional[str] = Query(default=None, max_length=64),
+    status: Optional[str] = Query(default=None, pattern="^(draft|open|closed)$"),
+    open_at: Optional[datetime] = None,
+    open_now: bool = False,
+    ledger: VoteLedger = Depends(current_ledger),
+    catalog: BallotCatalog = Depends(get_catalog),
+):
+    """
+    One page of ballots ordered by id. Pass the ``X-Next-Cursor`` response
+    header back as ``cursor`` to fetch the next page; it is absent on the last.
+    """
+    window = None if open_now else utc_naive(open_at)
+    key = ("list", cursor, limit, jurisdiction, status, window, open_now)
+    version: Tuple[Any, ...] = (catalog.version, _shared_catalog_version(), tally.version)
+    if open_now:
+        # "Open now" moves with the clock; re-evaluate at most once a second.
+        version += (int(time.time()),)
+
+    def build() -> Payload:
+        infos, next_cursor = catalog.page(
+            after=cursor,
+            limit=limit,
+            jurisdiction=jurisdiction,
+            status=status,
+            open_at=utc_now() if open_now else window,
+        )
+        _remember_ballots(catalog, ledger, infos)
+        headers = {"X-Next-Cursor": str(next_cursor)} if next_cursor is not None else {}
+        return Payload([_ballot(info) for info in infos], headers)
+
+    return ballot_cache.respond(request, key, version, build)
+
+
+@router.post("/bulk", response_model=BallotBulkLoadResponse)
+def bulk_load_ballots(
+    specs: List[BallotSpec],
+    user: User = Depends(require_role("admin")),
+    catalog: BallotCatalog = Depends(get_catalog),
+):
+    """Load many ballots in one transaction (existing ids are rejected)."""
+    if len(specs) > BULK_LOAD_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail="batch_too_large")
+    try:
+        infos = catalog.bulk_load([spec.model_dump() for spec in specs])
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="ballot_exists")
+    for info in infos:
+        _load_tally(info, {})
+    if _catalog_key is not None:
+        get_state_backend().incr(_catalog_key)
+    return BallotBulkLoadResponse(loaded=len(infos), ids=[info.id for info in infos])
+
+
 @router.get("/{ballot_id}", response_model=Ballot)
-def get_ballot(ballot_id: int):
-    b = BALLOTS.get(ballot_id)
-    if not b:
+def get_ballot(
+    ballot_id: int,
+    request: Request,
+    ledger: VoteLedger = Depends(current_ledger),
+    catalog: BallotCatalog = Depends(get_catalog),
+):
+    info = _find_ballot(catalog, ledger, ballot_id)
+    if info is None:
         raise HTTPException(status_code=404, detail="Ballot not found")
-    return Ballot(
-        id=ballot_id,
-        title=b["title"],
-        options=b["options"],
-        totalVotes=sum(b["votes"])
+    return ballot_cache.respond(
+        request,
+        ("ballot", ballot_id),
+        tally.ballot_version(ballot_id),
+        lambda: _ballot(info),
     )
 
 @router.post("/{ballot_id}/vote", response_model=VoteResponse)
-def cast_vote(ballot_id: int, payload: VoteRequest, user: User = Depends(require_role("voter"))):
-    b = BALLOTS.get(ballot_id)
-    if not b:
+async def cast_vote(
+    ballot_id: int,
+    payload: VoteRequest,
+    user: User = Depends(require_role("voter")),
+    ingestor: VoteIngestor = Depends(get_ingestor),
+    catalog: BallotCatalog = Depends(get_catalog),
+):
+    # A miss, or a ballot created on another worker, costs database reads.
+    info = await asyncio.to_thread(_find_ballot, catalog, ingestor.ledger, ballot_id)
+    if info is None:
         raise HTTPException(status_code=404, detail="Ballot not found")
-    if payload.option_index < 0 or payload.option_index >= len(b["options"]):
+    if payload.option_index < 0 or payload.option_index >= len(info.options):
         raise HTTPException(status_code=400, detail="Invalid option index")
+    if not info.is_open(utc_now()):
+        raise HTTPException(status_code=403, detail="ballot_not_open")
 
-    key = ((user.email or "").strip().lower(), ballot_id)
-    if VOTED.get(key):
+    durability = info.durability or get_settings().vote_durability
+    try:
+        new_total = await ingestor.submit(
+            normalize_voter(user.email),
+            ballot_id,
+            payload.option_index,
+            durability=durability,
+        )
+    except DuplicateVote:
         raise HTTPException(status_code=409, detail="already_voted")
-    b["votes"][payload.option_index] += 1
-    VOTED[key] = True
+    except IngestQueueFull as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="vote_queue_full",
+            headers={"Retry-After": str(exc.retry_after)},
+        )
     return VoteResponse(
         ballot_id=ballot_id,
         option_index=payload.option_index,
-        new_total=sum(b["votes"])
+        new_total=new_total
+    )
+
+
+@router.post("/batch", response_model=BatchVoteResponse)
+async def submit_vote_batch(
+    request: Request,
+    ingestor: VoteIngestor = Depends(get_ingestor),
+    catalog: BallotCatalog = Depends(get_catalog),
+):
+    """
+    Kiosk sync: a JSON array of signed vote records, validated as the body
+    streams in and stored in a single ledger transaction.
+    """
+    settings = get_settings()
+    key = settings.kiosk_signing_key
+    if not key:
+        raise HTTPException(status_code=503, detail="kiosk_sync_disabled")
+    max_items = settings.kiosk_batch_max_items
+    max_bytes = settings.kiosk_batch_max_bytes
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(status_code=413, detail="batch_too_large")
+
+    results: List[Optional[BatchVoteResult]] = []
+    votes: List[VoteTuple] = []
+    positions: List[int] = []
+    # Ballots seen so far in this batch; resolved once per chunk, off the event loop.
+    ballots: Dict[int, Optional[BallotInfo]] = {}
+
+    async def consume(items: List[Any]) -> None:
+        if len(results) + len(items) > max_items:
+            raise HTTPException(status_code=413, detail="batch_too_large")
+        checked = [validate_item(raw, key) for raw in items]
+        unseen = {vote.ballot_id for vote, _ in checked if vote is not None} - ballots.keys()
+        if unseen:
+            ballots.update(await asyncio.to_thread(_find_ballots, catalog, ingestor.ledger, unseen))
+        for vote, error in checked:
+            index = len(results)
+            if vote is not None:
+                info = ballots[vote.ballot_id]
+                if info is None:
+                    error = "unknown_ballot"
+                elif vote.option_index < 0 or vote.option_index >= len(info.options):
+                    error = "invalid_option"
+                elif info.status != "open":
+                    # Kiosk records were cast offline, possibly before closes_at,
+                    # so only an explicit status change stops them syncing.
+                    error = "ballot_not_open"
+            if vote is None or error:
+                results.append(BatchVoteResult(index=index, status="invalid", error=error))
+                continue
+            voter = normalize_voter(vote.voter)
+            if ingestor.is_pending(voter, vote.ballot_id):
+                results.append(BatchVoteResult(index=index, status="duplicate"))
+                continue
+            results.append(None)
+            votes.append((voter, vote.ballot_id, vote.option_index))
+            positions.append(index)
+
+    stream = JsonArrayStream()
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes:
+                raise HTTPException(status_code=413, detail="batch_too_large")
+            await consume(stream.feed(chunk))
+        await consume(stream.close())
+    except BatchFormatError:
+        raise HTTPException(status_code=400, detail="malformed_batch")
+
+    stored = await asyncio.to_thread(ingestor.ledger.write_batch, votes)
+    for index, (voter, ballot_id, option_index), ok in zip(positions, votes, stored):
+        if ok:
+            ingestor.mark_stored(voter, ballot_id)
+            tally.increment(ballot_id, option_index)
+            results[index] = BatchVoteResult(index=index, status="accepted")
+        else:
+            results[index] = BatchVoteResult(index=index, status="duplicate")
+
+    final = [r for r in results if r is not None]
+    return BatchVoteResponse(
+        accepted=sum(r.status == "accepted" for r in final),
+        duplicate=sum(r.status == "duplicate" for r in final),
+        invalid=sum(r.status == "invalid" for r in final),
+        results=final,
     )
 
 
 @router.get("/{ballot_id}/status")
-def vote_status(ballot_id: int, user: User = Depends(require_role("voter"))):
-    key = ((user.email or "").strip().lower(), ballot_id)
-    return {"already_voted": bool(VOTED.get(key))}
+def vote_status(
+    ballot_id: int,
+    user: User = Depends(require_role("voter")),
+    ingestor: VoteIngestor = Depends(get_ingestor),
+):
+    return {"already_voted": ingestor.has_voted(normalize_voter(user.email), ballot_id)}
@@ -1,9 +1,10 @@
-from typing import Literal, Optional
+from typing import Any, Dict, Literal, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from jose import JWTError, jwt
 
 from app.core.settings import get_settings
+from app.security.token_cache import TokenCache
 
 Role = Literal["admin", "voter"]
 
@@ -14,8 +15,29 @@ class User:
         self.role = role
 
 
+_token_cache: Optional[TokenCache] = None
+
+
+def _get_token_cache(size: int) -> TokenCache:
+    global _token_cache
+    if _token_cache is None or _token_cache.maxsize != size:
+        _token_cache = TokenCache(size)
+    return _token_cache
+
+
+def token_cache_stats() -> Dict[str, Any]:
+    return _get_token_cache(get_settings().token_cache_size).stats()
+
+
 def _parse_jwt_token(token: str) -> tuple[Optional[str], Optional[Role]]:
     settings = get_settings()
+    # Verified tokens are cached until their exp; the settings object is the
+    # cache owner, so reload_settings() (e.g. a rotated secret) starts afresh.
+    cache = _get_token_cache(settings.token_cache_size)
+    cached = cache.get(token, settings)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+
     secret = settings.jwt_secret or "your-secret-key"
     algorithm = settings.jwt_algorithm or "HS256"
     try:
@@ -26,6 +48,8 @@ def _parse_jwt_token(token: str) -> tuple[Optional[str], Optional[Role]]:
     email = payload.get("sub")
     role = payload.get("role")
     if isinstance(email, str) and role in ("admin", "voter"):
+        exp = payload.get("exp")
+        cache.put(token, settings, (email, role), float(exp) if isinstance(exp, (int, float)) else None)
         return (email, role)  # type: ignore[return-value]
     return (None, None)
 
@@ -0,0 +1,56 @@
+"""
+Account rules shared by ``POST /auth/signup`` and the voter-roll import:
+the reserved demo identity and the :class:`SignupPayload` validation.
+"""
+
+from __future__ import annotations
+
+import re
+
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+# ---- Demo credentials ----
+DEMO_ADMIN_EMAIL = "admin@evp-demo.com"
+DEMO_USERNAME = "admin"
+DEMO_PASSWORD = "secret123"
+
+
+def is_reserved_identity(username: str, email: str) -> bool:
+    """True for the demo admin's username or email, which nobody may register."""
+    return username.lower() == DEMO_USERNAME.lower() or str(email).lower() == DEMO_ADMIN_EMAIL.lower()
+
+
+class SignupPayload(BaseModel):
+    username: str = Field(min_length=3, max_length=32)
+    email: EmailStr
+    password: str = Field(min_length=8, max_length=128)
+
+    @field_validator("username")
+    @classmethod
+    def _username_rules(cls, v: str) -> str:
+        v2 = v.strip()
+        if v2 != v:
+            raise ValueError("username must not have surrounding spaces")
+        if not re.fullmatch(r"[A-Za-z0-9][A-Za-z0-9_]*", v):
+            raise ValueError("username must be alphanumeric with underscores")
+        return v
+
+    @field_validator("password")
+    @classmethod
+    def _password_rules(cls, v: str) -> str:
+        if any(ord(ch) < 32 for ch in v):
+            raise ValueError("password contains control characters")
+        if v.strip() != v:
+            raise ValueError("password must not have surrounding spaces")
+        if not re.search(r"[a-z]", v):
+            raise ValueError("password must include a lowercase letter")
+        if not re.search(r"[A-Z]", v):
+            raise ValueError("password must include an uppercase letter")
+        if not re.search(r"\d", v):
+            raise ValueError("password must include a digit")
+        if not re.search(r"[^A-Za-z0-9]", v):
+            raise ValueError("password must include a special character")
+        return v
+
+
+__all__ = ["DEMO_ADMIN_EMAIL", "DEMO_PASSWORD", "DEMO_USERNAME", "SignupPayload", "is_reserved_identity"]
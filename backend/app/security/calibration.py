@@ -0,0 +1,120 @@
+"""
+Host-specific Argon2id calibration.
+
+The right Argon2 cost depends on the hardware: parameters that verify in
+250 ms on a laptop may take a second on a small VM, throttling logins.
+:func:`calibrate` benchmarks Argon2id on the current host and picks the
+strongest ``(time_cost, memory_cost, parallelism)`` whose verify latency
+stays under a target and whose memory stays under a ceiling.  The result
+is saved as JSON at ``settings.argon2_profile_path`` and picked up by
+:func:`app.core.settings.get_settings` on start-up; existing hashes are
+upgraded on the next successful login.
+
+Memory is preferred over iterations (memory hardness is what resists GPU
+attacks), so the search starts at the ceiling, halves memory only until a
+single pass fits the target, then adds passes while they still fit.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+from passlib.hash import argon2
+
+MIN_MEMORY_COST = 8 * 1024  # KiB; below this Argon2id gives little protection
+MAX_TIME_COST = 10
+_PROBE = "calibration-probe-password"
+
+
+@dataclass(frozen=True)
+class Argon2Profile:
+    time_cost: int
+    memory_cost: int  # KiB
+    parallelism: int
+    verify_ms: float
+    target_ms: float
+    host: str = ""
+    calibrated_at: str = ""
+
+    @property
+    def params(self):
+        return self.time_cost, self.memory_cost, self.parallelism
+
+
+def measure_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int = 3) -> float:
+    """Median wall time of one Argon2id verify with the given parameters."""
+    hasher = argon2.using(type="ID", time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    encoded = hasher.hash(_PROBE)
+    timings = []
+    for _ in range(max(1, samples)):
+        start = time.perf_counter()
+        hasher.verify(_PROBE, encoded)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(
+    target_ms: float = 250.0,
+    max_memory_kib: int = 64 * 1024,
+    parallelism: Optional[int] = None,
+    *,
+    samples: int = 3,
+    min_memory_kib: int = MIN_MEMORY_COST,
+    max_time_cost: int = MAX_TIME_COST,
+    measure: Callable[[int, int, int, int], float] = measure_ms,
+) -> Argon2Profile:
+    """Pick the strongest parameters meeting ``target_ms`` within ``max_memory_kib``."""
+    lanes = max(1, parallelism or min(4, os.cpu_count() or 1))
+    # Argon2 needs at least 8 KiB per lane.
+    floor = max(8 * lanes, min(min_memory_kib, max_memory_kib))
+    memory = max(floor, max_memory_kib)
+
+    elapsed = measure(1, memory, lanes, samples)
+    while elapsed > target_ms and memory > floor:
+        memory = max(floor, memory // 2)
+        elapsed = measure(1, memory, lanes, samples)
+
+    time_cost = 1
+    while time_cost < max_time_cost:
+        candidate = measure(time_cost + 1, memory, lanes, samples)
+        if candidate > target_ms:
+            break
+        time_cost, elapsed = time_cost + 1, candidate
+
+    return Argon2Profile(
+        time_cost=time_cost,
+        memory_cost=memory,
+        parallelism=lanes,
+        verify_ms=round(elapsed, 2),
+        target_ms=target_ms,
+        host=platform.node(),
+        calibrated_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+
+
+def save_profile(profile: Argon2Profile, path: str) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_text(json.dumps(asdict(profile), indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp, target)
+    return target
+
+
+def load_profile(path: str) -> Optional[Argon2Profile]:
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return Argon2Profile(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+__all__ = ["Argon2Profile", "calibrate", "load_profile", "measure_ms", "save_profile"]
@@ -0,0 +1,33 @@
+"""
+Fernet encryption for PII and secrets at rest.
+
+The application's counterpart of the stand-alone ``encryption_service.py``
+at the repository root: the same ciphertext format, importable as part of
+the ``app`` package and without the console output.
+"""
+
+from __future__ import annotations
+
+from typing import Union
+
+from cryptography.fernet import Fernet
+
+
+def generate_key() -> str:
+    """A new random Fernet key, as stored in ``FERNET_KEY``."""
+    return Fernet.generate_key().decode("ascii")
+
+
+def encrypt_pii(cipher: Fernet, plaintext: Union[str, bytes]) -> bytes:
+    """Ciphertext for the database; never the plaintext."""
+    if isinstance(plaintext, str):
+        plaintext = plaintext.encode("utf-8")
+    return cipher.encrypt(plaintext)
+
+
+def decrypt_pii(cipher: Fernet, ciphertext: bytes) -> str:
+    """Plaintext of ``ciphertext``; raises ``cryptography.fernet.InvalidToken`` on a wrong key or tampering."""
+    return cipher.decrypt(ciphertext).decode("utf-8")
+
+
+__all__ = ["decrypt_pii", "encrypt_pii", "generate_key"]
@@ -0,0 +1,325 @@
+"""
+Argon2 hashing on a bounded process pool.
+
+Argon2id is deliberately slow and memory-hard, so running it on the event
+loop (or on a thread while the loop waits) stalls every request in the
+worker.  :class:`HashingService` runs hashes and verifications in a small
+process pool instead:
+
+* concurrency is capped by a memory budget (``memory_cost`` × running jobs),
+* at most ``max_queue`` further jobs wait; beyond that callers get
+  :class:`HashingBusy` immediately so the API can answer 503 fast,
+* queue depth, rejections and latencies are tracked for monitoring,
+* a pool whose worker died is dropped and rebuilt on the next job; the
+  callers caught by it get :class:`HashingUnavailable` (also a 503), never
+  a failed password check.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, CancelledError, Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from app.core.settings import Settings, get_settings
+
+ParamsKey = Tuple[int, int, int]
+
+
+class HashingBusy(RuntimeError):
+    """The hashing service is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, retry_after: int, message: str = "hashing service saturated") -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HashingUnavailable(HashingBusy):
+    """The pool failed (a worker died or it was shut down); it is rebuilt on the next job."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(retry_after, "hashing pool unavailable")
+
+
+# Raised by a job's future when its pool broke or was shut down under it.
+_POOL_ERRORS = (BrokenExecutor, CancelledError)
+
+
+def _task_cancelling() -> bool:
+    """Is the current asyncio task itself being cancelled?"""
+    task = asyncio.current_task()
+    cancelling = getattr(task, "cancelling", None)
+    return bool(cancelling()) if cancelling is not None else False
+
+
+# ---------------- Pool workers (run in child processes) ----------------
+@lru_cache(maxsize=8)
+def _hasher(time_cost: int, memory_cost: int, parallelism: int):
+    from passlib.hash import argon2
+
+    return argon2.using(type="ID", time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+
+def _hash_job(secret: str, params: ParamsKey) -> str:
+    return _hasher(*params).hash(secret)
+
+
+def _verify_job(secret: str, encoded: str) -> bool:
+    from passlib.hash import argon2
+
+    try:
+        return bool(argon2.verify(secret, encoded))
+    except Exception:
+        return False
+
+
+class HashingService:
+    """Runs Argon2 jobs in a process pool with admission control."""
+
+    # Recent latencies kept for percentile reporting.
+    _LATENCY_SAMPLES = 512
+
+    def __init__(
+        self,
+        params: ParamsKey,
+        *,
+        workers: int = 2,
+        max_queue: int = 64,
+        memory_budget_bytes: int = 512 * 1024 * 1024,
+        retry_after: int = 1,
+    ) -> None:
+        self.params = params
+        per_job = params[1] * 1024  # memory_cost is in KiB
+        # Never run more Argon2 jobs at once than the memory budget allows.
+        self.concurrency = max(1, min(max(1, workers), memory_budget_bytes // per_job))
+        self.max_queue = max(0, max_queue)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.retry_after = retry_after
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies: Deque[float] = deque(maxlen=self._LATENCY_SAMPLES)
+        # Counters for monitoring.
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.restarts = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: forking a process that already runs writer threads is unsafe.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs admitted but waiting for a free worker."""
+        return max(0, self._pending - self.concurrency)
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> "Future[Any]":
+        with self._lock:
+            if self._pending >= self.concurrency + self.max_queue:
+                self.rejected += 1
+                raise HashingBusy(self.retry_after)
+            self._pending += 1
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, self.queue_depth)
+            try:
+                pool = self._executor()
+            except BaseException:
+                self._pending -= 1
+                raise
+        submitted_at = time.perf_counter()
+        try:
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenExecutor:
+                # A worker died since the pool was handed out; retry once on a fresh one.
+                self._discard(pool)
+                with self._lock:
+                    pool = self._executor()
+                future = pool.submit(fn, *args)
+        except RuntimeError as exc:
+            # Broken again, or shut down by close() in the meantime.
+            with self._lock:
+                self._pending -= 1
+            raise HashingUnavailable(self.retry_after) from exc
+
+        def done(f: "Future[Any]") -> None:
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self._latencies.append(time.perf_counter() - submitted_at)
+            if not f.cancelled() and isinstance(f.exception(), BrokenExecutor):
+                self._discard(pool, shutdown=False)  # runs on the pool's own thread
+
+        future.add_done_callback(done)
+        return future
+
+    def _discard(self, pool: ProcessPoolExecutor, *, shutdown: bool = True) -> None:
+        """Forget a failed pool so the next job starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.restarts += 1
+        if shutdown:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _result(self, future: "Future[Any]") -> Any:
+        try:
+            return future.result()
+        except _POOL_ERRORS as exc:
+            raise HashingUnavailable(self.retry_after) from exc
+
+    async def _await(self, future: "Future[Any]") -> Any:
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenExecutor as exc:
+            raise HashingUnavailable(self.retry_after) from exc
+        except asyncio.CancelledError as exc:
+            # The job was cancelled by a pool shutdown, not by our caller:
+            # report it like a broken pool instead of cancelling the request.
+            if future.cancelled() and not _task_cancelling():
+                raise HashingUnavailable(self.retry_after) from exc
+            raise
+
+    # ---------------- Public API ----------------
+    def hash_sync(self, secret: str) -> str:
+        return self._result(self._submit(_hash_job, secret, self.params))
+
+    def hash_many(self, secrets: Iterable[str]) -> List[str]:
+        """
+        Hash a batch in order (bulk imports).  At most ``concurrency +
+        max_queue`` jobs are in flight; the caller waits for the oldest
+        instead of being rejected.
+        """
+        window = self.concurrency + self.max_queue
+        futures: Deque["Future[str]"] = deque()
+        results: List[str] = []
+        for secret in secrets:
+            while len(futures) >= window or self._pending >= window:
+                if not futures:
+                    time.sleep(0.005)  # the pool is busy with other callers
+                    continue
+                results.append(self._result(futures.popleft()))
+            futures.append(self._submit(_hash_job, secret, self.params))
+        results.extend(self._result(f) for f in futures)
+        return results
+
+    def verify_sync(self, secret: str, encoded: str) -> bool:
+        return self._result(self._submit(_verify_job, secret, encoded))
+
+    async def hash(self, secret: str) -> str:
+        return await self._await(self._submit(_hash_job, secret, self.params))
+
+    async def verify(self, secret: str, encoded: str) -> bool:
+        return await self._await(self._submit(_verify_job, secret, encoded))
+
+    def needs_update(self, encoded: str) -> bool:
+        """Cheap (no hashing): does ``encoded`` use parameters other than ours?"""
+        try:
+            return bool(_hasher(*self.params).needs_update(encoded))
+        except Exception:
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = sorted(self._latencies)
+
+        def pct(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            "params": {"time_cost": self.params[0], "memory_cost": self.params[1], "parallelism": self.params[2]},
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "in_flight": self._pending,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)},
+        }
+
+    def close(self, *, wait: bool = True) -> None:
+        """Stop the pool; ``wait=False`` lets jobs already running finish in the background."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=wait)
+
+
+ServiceKey = Tuple[ParamsKey, int, int, int, int]
+
+_service: Optional[HashingService] = None
+_service_key: Optional[ServiceKey] = None
+_service_owner: Any = None
+_service_lock = threading.Lock()
+
+
+def _key_for(settings: Settings) -> ServiceKey:
+    from app.security.passwords import argon2_params
+
+    return (
+        argon2_params(settings),
+        settings.hash_workers or min(4, os.cpu_count() or 1),
+        settings.hash_queue_size,
+        settings.hash_memory_budget_mb * 1024 * 1024,
+        settings.hash_retry_after_seconds,
+    )
+
+
+def get_hashing_service() -> HashingService:
+    """
+    The shared pool for the current settings.  It is rebuilt only when a
+    settings reload (e.g. a new Argon2 profile) changes its configuration;
+    the old pool finishes its running jobs in the background.
+    """
+    global _service, _service_key, _service_owner
+    settings = get_settings()
+    service = _service
+    if service is not None and settings is _service_owner:
+        return service
+    with _service_lock:
+        if _service is None or settings is not _service_owner:
+            key = _key_for(settings)
+            if _service is None or key != _service_key:
+                params, workers, max_queue, budget, retry_after = key
+                previous, _service = _service, HashingService(
+                    params,
+                    workers=workers,
+                    max_queue=max_queue,
+                    memory_budget_bytes=budget,
+                    retry_after=retry_after,
+                )
+                if previous is not None:
+                    previous.close(wait=False)
+            _service_key, _service_owner = key, settings
+        return _service
+
+
+def shutdown_hashing() -> None:
+    global _service, _service_key, _service_owner
+    with _service_lock:
+        service, _service, _service_key, _service_owner = _service, None, None, None
+    if service is not None:
+        service.close()
+
+
+__all__ = ["HashingBusy", "HashingService", "HashingUnavailable", "get_hashing_service", "shutdown_hashing"]
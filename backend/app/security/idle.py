@@ -0,0 +1,189 @@
+"""
+Idle-session tracking on a hashed timing wheel.
+
+Sessions are stamped with an integer tick (``time.monotonic()`` in
+``tick_seconds`` units) and filed into coarse buckets of ``bucket_ticks``
+on a ring of slots covering ``retention_seconds``:
+
+* ``touch`` moves a session from its old bucket to the current one: O(1),
+* ``is_idle`` compares integer ticks, no datetime objects,
+* advancing the wheel drops whole buckets that fell out of retention,
+  so memory follows the sessions seen recently rather than every login
+  since start-up,
+* beyond ``max_sessions`` the oldest buckets are evicted first.
+
+Buckets are kept for ``retention_seconds``, by default just past the idle
+timeout.  A session swept out of them leaves an expired marker (its key,
+no bucket) for ``IDLE_MARKER_SECONDS``, so it still reads as idle rather
+than as unknown; markers are capped at ``max_sessions`` as well.  With
+``sweep_interval`` set a background thread sweeps, so memory is released
+even when no request touches the tracker.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Set
+
+from app.core.settings import get_settings
+
+# How long a session past the idle timeout is still remembered as idle.
+IDLE_MARKER_SECONDS = 24 * 60 * 60
+
+
+class IdleTracker:
+    def __init__(
+        self,
+        idle_seconds: float,
+        *,
+        retention_seconds: Optional[float] = None,
+        marker_seconds: float = IDLE_MARKER_SECONDS,
+        max_sessions: int = 100_000,
+        tick_seconds: float = 1.0,
+        bucket_ticks: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+        sweep_interval: Optional[float] = None,
+    ) -> None:
+        self.tick_seconds = tick_seconds
+        self.idle_ticks = max(0, int(idle_seconds / tick_seconds))
+        self.bucket_ticks = max(1, bucket_ticks)
+        retention_ticks = max(self.idle_ticks + 1, int((retention_seconds or 0) / tick_seconds))
+        self.marker_ticks = int(marker_seconds / tick_seconds)
+        # Buckets younger than this many buckets are kept; one spare slot so
+        # the current bucket never shares a slot with one still retained.
+        self._keep = -(-retention_ticks // self.bucket_ticks) + 1
+        self._slots: List[Set[str]] = [set() for _ in range(self._keep + 1)]
+        self._last: Dict[str, int] = {}
+        # Swept sessions -> the tick they were swept at, oldest first.
+        self._expired: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = clock
+        self._swept = self._bucket(self._tick()) - 1
+        self._lock = threading.Lock()
+        self.max_sessions = max_sessions
+        self.expired = 0
+        self.evicted = 0
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if sweep_interval:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(sweep_interval,), name="idle-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _tick(self) -> int:
+        return int(self._clock() / self.tick_seconds)
+
+    def _bucket(self, tick: int) -> int:
+        return tick // self.bucket_ticks
+
+    def _slot(self, bucket: int) -> Set[str]:
+        return self._slots[bucket % len(self._slots)]
+
+    def _drop_bucket(self, bucket: int, tick: int) -> int:
+        slot = self._slot(bucket)
+        for key in slot:
+            del self._last[key]
+            self._expired[key] = tick
+        dropped = len(slot)
+        slot.clear()
+        return dropped
+
+    def _advance(self, tick: int) -> None:
+        # Caller holds the lock.  Every bucket older than the retention
+        # horizon is dropped whole; at most one pass over the ring.
+        horizon = self._bucket(tick) - self._keep
+        start = max(self._swept + 1, horizon - len(self._slots) + 1)
+        for bucket in range(start, horizon + 1):
+            self.expired += self._drop_bucket(bucket, tick)
+        self._swept = max(self._swept, horizon)
+        expired = self._expired
+        while expired and (
+            len(expired) > self.max_sessions or tick - next(iter(expired.values())) > self.marker_ticks
+        ):
+            expired.popitem(last=False)
+
+    def _evict(self) -> None:
+        bucket = self._swept + 1
+        while len(self._last) > self.max_sessions:
+            slot = self._slot(bucket)
+            while slot and len(self._last) > self.max_sessions:
+                del self._last[slot.pop()]
+                self.evicted += 1
+            bucket += 1
+
+    def touch(self, key: str) -> None:
+        with self._lock:
+            tick = self._tick()
+            self._advance(tick)
+            previous = self._last.get(key)
+            if previous is not None:
+                self._slot(self._bucket(previous)).discard(key)
+            else:
+                self._expired.pop(key, None)
+            self._last[key] = tick
+            self._slot(self._bucket(tick)).add(key)
+            if len(self._last) > self.max_sessions:
+                self._evict()
+
+    def is_idle(self, key: str) -> bool:
+        """True if ``key`` was seen but not within the idle timeout."""
+        with self._lock:
+            tick = self._tick()
+            self._advance(tick)
+            last = self._last.get(key)
+            if last is None:
+                return key in self._expired
+            return tick - last > self.idle_ticks
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            last = self._last.pop(key, None)
+            if last is not None:
+                self._slot(self._bucket(last)).discard(key)
+            self._expired.pop(key, None)
+
+    def sweep(self) -> None:
+        with self._lock:
+            self._advance(self._tick())
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.sweep()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=1)
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            tick = self._tick()
+            self._advance(tick)
+            live = sum(1 for last in self._last.values() if tick - last <= self.idle_ticks)
+            idle = len(self._last) - live + len(self._expired)
+        return {
+            "live": live,
+            "idle": idle,
+            "max_sessions": self.max_sessions,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_idle_tracker() -> IdleTracker:
+    settings = get_settings()
+    return IdleTracker(
+        settings.idle_timeout_seconds,
+        max_sessions=settings.idle_session_cap,
+        sweep_interval=settings.state_sweep_interval_seconds or None,
+    )
+
+
+__all__ = ["IDLE_MARKER_SECONDS", "IdleTracker", "get_idle_tracker"]
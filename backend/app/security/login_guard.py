@@ -0,0 +1,294 @@
+"""
+Single-pass login guard: lockout, captcha requirement and failure counters
+kept in one record per ``(email, ip)``.
+
+It replaces two stores - lockout counters and captcha counters - that a
+failed login used to touch with separate reads, writes and expiry rules,
+re-reading the captcha configuration from the environment on every call.
+Here:
+
+* ``evaluate(key)`` is one read and returns a :class:`GuardDecision` with the
+  lock status, retry-after and captcha requirement together,
+* ``record(key, outcome)`` is one atomic read-modify-write (one Lua script on
+  Redis) and returns the decision after the attempt,
+* :class:`GuardConfig` is resolved from settings once and only rebuilt when
+  the settings object changes (``reload_settings``).
+
+The record holds the lockout window (``fails``, ``lock_until``,
+``first_failed_at``) and the running failure count since the last success
+(``failures``, ``last_failed_at``), which drives the legacy captcha when
+``ENABLE_LOGIN_GUARDS=0`` and the ``failed_attempts`` reported to clients.
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+from app.core.settings import Settings, get_settings
+from app.core.state import StateBackend, get_state_backend, redis_client
+
+FAILURE = "failure"
+SUCCESS = "success"
+
+
+@dataclass(frozen=True)
+class GuardConfig:
+    enabled: bool
+    fail_limit: int
+    lockout_seconds: int
+    captcha_fail_threshold: int
+    legacy_captcha_threshold: int
+    failure_ttl_seconds: int
+    captcha_token: str
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "GuardConfig":
+        return cls(
+            enabled=settings.enable_login_guards,
+            fail_limit=settings.login_fail_limit,
+            lockout_seconds=settings.login_lockout_seconds,
+            captcha_fail_threshold=settings.login_captcha_fail_threshold,
+            legacy_captcha_threshold=settings.captcha_threshold,
+            failure_ttl_seconds=settings.failed_ttl_seconds,
+            captcha_token=settings.captcha_valid_token,
+        )
+
+    @property
+    def record_ttl(self) -> float:
+        # Long enough for both the lockout window and the failure counter;
+        # expiry itself is decided from the timestamps, the TTL reclaims memory.
+        return max(2.0 * self.lockout_seconds + 1.0, float(self.failure_ttl_seconds), 1.0)
+
+
+@dataclass
+class GuardState:
+    fails: int = 0
+    lock_until: float = 0.0
+    first_failed_at: Optional[float] = None
+    failures: int = 0
+    last_failed_at: Optional[float] = None
+
+    def normalize(self, config: GuardConfig, now: float) -> "GuardState":
+        """Forget an expired lock or window and a stale failure count."""
+        if self.lock_until and self.lock_until <= now:
+            self.fails, self.lock_until, self.first_failed_at = 0, 0.0, None
+        elif self.first_failed_at is not None and now - self.first_failed_at > config.lockout_seconds:
+            self.fails, self.first_failed_at = 0, None
+        if self.last_failed_at is not None and now - self.last_failed_at > config.failure_ttl_seconds:
+            self.failures, self.last_failed_at = 0, None
+        return self
+
+
+@dataclass(frozen=True)
+class GuardDecision:
+    locked: bool = False
+    retry_after: int = 0
+    captcha_required: bool = False
+    failures: int = 0
+
+
+class LoginGuard:
+    """Guard records in the configured state backend (in-memory by default)."""
+
+    def __init__(self, backend: Optional[StateBackend] = None, *, config: Optional[GuardConfig] = None) -> None:
+        self._backend = backend
+        self._fixed = config
+        self._config: Optional[GuardConfig] = None
+        self._owner: Any = None
+
+    @property
+    def backend(self) -> StateBackend:
+        # Resolved lazily so STATE_BACKEND is read after settings are loaded.
+        return self._backend if self._backend is not None else get_state_backend()
+
+    @property
+    def config(self) -> GuardConfig:
+        if self._fixed is not None:
+            return self._fixed
+        settings = get_settings()
+        if settings is not self._owner:
+            # Resolved once per settings object, not per attempt.
+            self._config = GuardConfig.from_settings(settings)
+            self._owner = settings
+        return self._config  # type: ignore[return-value]
+
+    def _now(self) -> float:
+        # Wall-clock time: records may be shared with other worker processes.
+        return time.time()
+
+    def key(self, email: str, ip: str) -> str:
+        return f"guard:{(email or '').strip().lower()}:{ip or '0.0.0.0'}"
+
+    @staticmethod
+    def _decode(raw: Optional[str]) -> GuardState:
+        return GuardState(**json.loads(raw)) if raw else GuardState()
+
+    @staticmethod
+    def _encode(state: GuardState) -> str:
+        return json.dumps(asdict(state), separators=(",", ":"))
+
+    @staticmethod
+    def decide(state: GuardState, config: GuardConfig, now: float) -> GuardDecision:
+        locked = config.enabled and state.lock_until > now
+        if config.enabled:
+            captcha = state.fails >= config.captcha_fail_threshold
+        else:
+            captcha = state.failures >= config.legacy_captcha_threshold
+        return GuardDecision(
+            locked=locked,
+            retry_after=int(max(0.0, state.lock_until - now)) if locked else 0,
+            captcha_required=captcha,
+            failures=state.failures,
+        )
+
+    @staticmethod
+    def fail(state: GuardState, config: GuardConfig, now: float) -> GuardState:
+        if config.enabled:
+            state.fails += 1
+            if state.first_failed_at is None:
+                state.first_failed_at = now
+            if state.fails >= config.fail_limit:
+                state.lock_until = now + config.lockout_seconds
+        state.failures += 1
+        state.last_failed_at = now
+        return state
+
+    def evaluate(self, key: str) -> GuardDecision:
+        """Lock status, retry-after and captcha requirement before an attempt."""
+        config, now = self.config, self._now()
+        return self.decide(self._decode(self.backend.get(key)).normalize(config, now), config, now)
+
+    def record(self, key: str, outcome: str) -> GuardDecision:
+        """Record a login ``outcome`` (``FAILURE`` or ``SUCCESS``) and return the new decision."""
+        if outcome == SUCCESS:
+            self.backend.delete(key)
+            return GuardDecision()
+        if outcome != FAILURE:
+            raise ValueError(f"unknown login outcome: {outcome!r}")
+        config = self.config
+
+        def apply(raw: Optional[str]):
+            now = self._now()
+            state = self.fail(self._decode(raw).normalize(config, now), config, now)
+            return self._encode(state), self.decide(state, config, now)
+
+        return self.backend.update(key, apply, ttl=config.record_ttl)
+
+    def captcha_ok(self, token: Optional[str]) -> bool:
+        expected = self.config.captcha_token
+        return token is not None and hmac.compare_digest(token.encode("utf-8"), expected.encode("utf-8"))
+
+
+# ---------------- Redis ----------------
+# The record is a hash {f, l, s, c, t} mirroring GuardState; a failure is one
+# script (normalize + fail) so concurrent workers cannot lose updates, and
+# ``evaluate`` is a single HMGET decided in Python.
+_RECORD_FAIL_SCRIPT = """
+local now, enabled, limit, lockout, ttl = tonumber(ARGV[1]), ARGV[2] == '1', tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local h = redis.call('HMGET', KEYS[1], 'f', 'l', 's', 'c', 't')
+local f, l, s, c, t = tonumber(h[1]) or 0, tonumber(h[2]) or 0, tonumber(h[3]), tonumber(h[4]) or 0, tonumber(h[5])
+if l > 0 and l <= now then f, l, s = 0, 0, nil
+elseif s ~= nil and now - s > lockout then f, s = 0, nil end
+if t ~= nil and now - t > ttl then c, t = 0, nil end
+if enabled then
+  f = f + 1
+  if s == nil then s = now end
+  if f >= limit then l = now + lockout end
+end
+c, t = c + 1, now
+redis.call('HSET', KEYS[1], 'f', f, 'l', tostring(l), 's', s and tostring(s) or '', 'c', c, 't', tostring(t))
+redis.call('PEXPIRE', KEYS[1], ARGV[6])
+return {f, tostring(l), s and tostring(s) or '', c, tostring(t)}
+"""
+
+_FIELDS = ("f", "l", "s", "c", "t")
+
+
+def _state_from_reply(values) -> GuardState:
+    f, l, s, c, t = values
+    return GuardState(
+        fails=int(f or 0),
+        lock_until=float(l or 0),
+        first_failed_at=float(s) if s else None,
+        failures=int(c or 0),
+        last_failed_at=float(t) if t else None,
+    )
+
+
+class RedisLoginGuard(LoginGuard):
+    """
+    Guard records in Redis (or any Redis-protocol server) so lockouts hold
+    across workers and nodes; clients share a connection pool.
+    """
+
+    def __init__(self, url: Optional[str] = None, *, client: Any = None, prefix: str = "evp:guard:", max_connections: int = 50, config: Optional[GuardConfig] = None) -> None:
+        super().__init__(config=config)
+        if client is None:
+            client = redis_client(url, max_connections)
+        self._redis = client
+        self._prefix = prefix
+        self._record_fail = client.register_script(_RECORD_FAIL_SCRIPT)
+        # Load up front so every failure is a plain EVALSHA hit.
+        client.script_load(_RECORD_FAIL_SCRIPT)
+
+    def _k(self, key: str) -> str:
+        return self._prefix + key
+
+    def evaluate(self, key: str) -> GuardDecision:
+        config, now = self.config, self._now()
+        values = self._redis.hmget(self._k(key), _FIELDS)
+        state = _state_from_reply(values) if values[0] is not None else GuardState()
+        return self.decide(state.normalize(config, now), config, now)
+
+    def record(self, key: str, outcome: str) -> GuardDecision:
+        if outcome == SUCCESS:
+            self._redis.delete(self._k(key))
+            return GuardDecision()
+        if outcome != FAILURE:
+            raise ValueError(f"unknown login outcome: {outcome!r}")
+        config, now = self.config, self._now()
+        reply = self._record_fail(
+            keys=[self._k(key)],
+            args=[
+                repr(now),
+                "1" if config.enabled else "0",
+                config.fail_limit,
+                config.lockout_seconds,
+                config.failure_ttl_seconds,
+                int(config.record_ttl * 1000),
+            ],
+        )
+        return self.decide(_state_from_reply(reply), config, now)
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+def build_login_guard(redis_url: Optional[str]) -> LoginGuard:
+    if redis_url:
+        return RedisLoginGuard(redis_url, max_connections=get_settings().redis_max_connections)
+    return LoginGuard()
+
+
+@lru_cache(maxsize=1)
+def get_login_guard() -> LoginGuard:
+    """Redis-backed when REDIS_URL is set, otherwise on the state backend."""
+    return build_login_guard(get_settings().redis_url)
+
+
+__all__ = [
+    "FAILURE",
+    "SUCCESS",
+    "GuardConfig",
+    "GuardDecision",
+    "GuardState",
+    "LoginGuard",
+    "RedisLoginGuard",
+    "build_login_guard",
+    "get_login_guard",
+]
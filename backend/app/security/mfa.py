@@ -1,32 +1,97 @@
+"""
+TOTP enrolment and single-use backup codes.
+
+Enrolments are kept in the database by :mod:`app.security.mfa_store`, with
+the TOTP secret encrypted and a read-through in-process cache in front, so
+they survive deploys and are shared by every worker while the login path
+stays at memory speed.
+
+Backup codes are stored as bcrypt hashes.  Each also gets a lookup id - a
+keyed HMAC of ``(email, code)`` under ``MFA_LOOKUP_KEY`` - so a submitted
+code maps to at most one candidate and costs one bcrypt verification
+rather than one per unused code; a wrong code costs none.  The HMAC key
+never leaves the server, so the ids do not help an offline guesser.
+
+The plaintext codes of a new enrolment are shown once
+(:func:`take_backup_codes`) and then forgotten.  Records enrolled before
+lookup ids (or under a rotated key) are migrated lazily: ids are recomputed
+from the plaintext codes if they have not been shown yet - which also
+forgets them - otherwise the remaining codes fall back to a scan and get
+their id when they are used.  Records still in the state backend (from
+before the database table) are moved into it on first use, with ids
+computed from their codes there and then.
+"""
+
 from __future__ import annotations
 
+import hashlib
+import hmac
+import json
+import os
 import secrets
-from dataclasses import dataclass, field
-from typing import Dict, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import bcrypt
 import pyotp
 
+from app.core.settings import get_settings
+from app.core.state import get_state_backend
+from app.security.mfa_store import MfaRecord, get_mfa_store
+
 
 ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
 BACKUP_CODE_LENGTH = 8
 BACKUP_CODES_TOTAL = 10
 
 
-@dataclass
-class MfaRecord:
-    email: str
-    secret: str
-    backup_code_hashes: List[bytes]
-    used_backup_codes: Set[bytes] = field(default_factory=set)
+def _normalize(email: str) -> str:
+    return (email or "").strip().lower()
 
 
-_records: Dict[str, MfaRecord] = {}
-_latest_codes: Dict[str, List[str]] = {}
+# Where records lived before the database table; read only to migrate them.
+def _record_key(normalized: str) -> str:
+    return f"mfa:record:{normalized}"
 
 
-def _normalize(email: str) -> str:
-    return (email or "").strip().lower()
+def _codes_key(normalized: str) -> str:
+    return f"mfa:codes:{normalized}"
+
+
+def _decode_legacy(raw: str) -> MfaRecord:
+    data = json.loads(raw)
+    return MfaRecord(
+        email=data["email"],
+        secret=data["secret"],
+        backup_code_hashes=[h.encode("ascii") for h in data["backup_code_hashes"]],
+        used_backup_codes={h.encode("ascii") for h in data["used_backup_codes"]},
+        backup_code_ids=list(data.get("backup_code_ids") or []),
+        lookup_key=data.get("lookup_key"),
+    )
+
+
+def _import_legacy(normalized: str) -> Optional[MfaRecord]:
+    backend = get_state_backend()
+    raw = backend.get(_record_key(normalized))
+    if not raw:
+        return None
+    codes = json.loads(backend.get(_codes_key(normalized)) or "[]")
+    record = _decode_legacy(raw)
+    if codes and len(codes) == len(record.backup_code_hashes):
+        # Stored in the same order as their hashes; the plaintext is not kept.
+        key, fingerprint = _lookup_key()
+        record.backup_code_ids = [_lookup_id(key, normalized, code) for code in codes]
+        record.lookup_key = fingerprint
+    get_mfa_store().put(normalized, record, [])
+    backend.delete(_record_key(normalized))
+    backend.delete(_codes_key(normalized))
+    return record
+
+
+def _load(normalized: str, *, fresh: bool = False) -> Optional[MfaRecord]:
+    record = get_mfa_store().get(normalized, fresh=fresh)
+    return record if record is not None else _import_legacy(normalized)
 
 
 def _generate_secret() -> str:
@@ -41,60 +106,151 @@ def _hash_backup_code(code: str) -> bytes:
     return bcrypt.hashpw(code.encode("utf-8"), bcrypt.gensalt())
 
 
+@lru_cache(maxsize=1)
+def _bcrypt_pool() -> ThreadPoolExecutor:
+    # bcrypt releases the GIL, so threads hash the codes in parallel.
+    return ThreadPoolExecutor(max_workers=min(BACKUP_CODES_TOTAL, os.cpu_count() or 1), thread_name_prefix="mfa-bcrypt")
+
+
+@lru_cache(maxsize=4)
+def _derive_lookup_key(configured: str, jwt_secret: str) -> bytes:
+    if configured:
+        return configured.encode("utf-8")
+    return hmac.new(jwt_secret.encode("utf-8"), b"mfa-backup-code-lookup", hashlib.sha256).digest()
+
+
+def _lookup_key() -> Tuple[bytes, str]:
+    """``(key, fingerprint)``; without MFA_LOOKUP_KEY the key is derived from JWT_SECRET."""
+    settings = get_settings()
+    key = _derive_lookup_key(settings.mfa_lookup_key, settings.jwt_secret)
+    return key, hashlib.sha256(key).hexdigest()[:12]
+
+
+def _lookup_id(key: bytes, normalized: str, code: str) -> str:
+    message = f"{normalized}\x00{code}".encode("utf-8")
+    return hmac.new(key, message, hashlib.sha256).hexdigest()[:32]
+
+
 def is_enrolled(email: str) -> bool:
-    return _normalize(email) in _records
+    return _load(_normalize(email)) is not None
 
 
 def enroll(email: str) -> MfaRecord:
     normalized = _normalize(email)
     secret = _generate_secret()
     codes = [_generate_backup_code() for _ in range(BACKUP_CODES_TOTAL)]
-    hashes = [_hash_backup_code(code) for code in codes]
-    record = MfaRecord(email=email, secret=secret, backup_code_hashes=hashes)
-    _records[normalized] = record
-    _latest_codes[normalized] = codes
+    hashes = list(_bcrypt_pool().map(_hash_backup_code, codes))
+    key, fingerprint = _lookup_key()
+    record = MfaRecord(
+        email=email,
+        secret=secret,
+        backup_code_hashes=hashes,
+        backup_code_ids=[_lookup_id(key, normalized, code) for code in codes],
+        lookup_key=fingerprint,
+    )
+    get_mfa_store().put(normalized, record, codes)
     return record
 
 
 def provisioning_uri(email: str, issuer: str = "EVP") -> str:
     normalized = _normalize(email)
-    record = _records.get(normalized)
+    record = _load(normalized)
     if not record:
         raise ValueError("MFA not enrolled for this email")
     totp = pyotp.TOTP(record.secret)
     return totp.provisioning_uri(name=email, issuer_name=issuer)
 
 
+def _totp_ok(secret: str, code: str, valid_window: int) -> bool:
+    try:
+        return bool(pyotp.TOTP(secret).verify(code, valid_window=valid_window))
+    except Exception:
+        return False
+
+
 def verify_totp(email: str, code: str, valid_window: int = 1) -> bool:
     normalized = _normalize(email)
-    record = _records.get(normalized)
+    record = _load(normalized)
     if not record or not code:
         return False
-    totp = pyotp.TOTP(record.secret)
-    try:
-        return bool(totp.verify(code, valid_window=valid_window))
-    except Exception:
-        return False
+    if _totp_ok(record.secret, code, valid_window):
+        return True
+    # The cached secret may predate a re-enrolment on another worker.
+    current = _load(normalized, fresh=True)
+    return current is not None and current.secret != record.secret and _totp_ok(current.secret, code, valid_window)
+
+
+def _migrate(normalized: str, record: MfaRecord, key: bytes, fingerprint: str) -> MfaRecord:
+    """Give ``record`` lookup ids under the current key, as far as they can be known."""
+    if record.lookup_key == fingerprint and len(record.backup_code_ids) == len(record.backup_code_hashes):
+        return record
+    store = get_mfa_store()
+    ids: List[Optional[str]] = [None] * len(record.backup_code_hashes)
+    codes = store.latest_codes(normalized)
+    if len(codes) == len(ids):
+        # enroll() stores the plaintext codes in the same order as their hashes.
+        ids = [_lookup_id(key, normalized, code) for code in codes]
+
+    def apply(current: Optional[MfaRecord]) -> Tuple[Optional[MfaRecord], MfaRecord]:
+        if current is None or current.backup_code_hashes != record.backup_code_hashes:
+            return None, current or record  # re-enrolled meanwhile; leave it alone
+        if current.lookup_key == fingerprint and len(current.backup_code_ids) == len(ids):
+            return None, current
+        current.backup_code_ids, current.lookup_key = ids, fingerprint
+        return current, current
+
+    # Once the ids are written, the plaintext codes have served their purpose.
+    return store.update(normalized, apply, clear_codes=bool(codes))
 
 
 def try_backup_code(email: str, code: str) -> bool:
     normalized = _normalize(email)
-    record = _records.get(normalized)
+    # Read through: another worker may have used or re-issued codes.
+    record = _load(normalized, fresh=True)
     if not record or not code:
         return False
+    key, fingerprint = _lookup_key()
+    record = _migrate(normalized, record, key, fingerprint)
+    lookup = _lookup_id(key, normalized, code)
     code_bytes = code.encode("utf-8")
-    for hashed in record.backup_code_hashes:
-        if hashed in record.used_backup_codes:
+
+    if lookup in record.backup_code_ids:
+        hashed = record.backup_code_hashes[record.backup_code_ids.index(lookup)]
+        if hashed in record.used_backup_codes or not bcrypt.checkpw(code_bytes, hashed):
+            return False
+        return _consume(normalized, hashed)
+
+    # Only codes whose id is still unknown (pre-migration) need a scan.
+    for hashed, known in zip(record.backup_code_hashes, record.backup_code_ids):
+        if known is not None or hashed in record.used_backup_codes:
             continue
         if bcrypt.checkpw(code_bytes, hashed):
-            record.used_backup_codes.add(hashed)
-            return True
+            return _consume(normalized, hashed, lookup)
     return False
 
 
-def latest_backup_codes(email: str) -> List[str]:
-    """Return the most recently generated backup codes for an email."""
-    return list(_latest_codes.get(_normalize(email), []))
+def _consume(normalized: str, hashed: bytes, lookup: Optional[str] = None) -> bool:
+    """Mark a backup code used; False if another request (or worker) used it first."""
+
+    def apply(current: Optional[MfaRecord]) -> Tuple[Optional[MfaRecord], bool]:
+        if current is None or hashed not in current.backup_code_hashes or hashed in current.used_backup_codes:
+            return None, False
+        current.used_backup_codes.add(hashed)
+        index = current.backup_code_hashes.index(hashed)
+        if lookup is not None and index < len(current.backup_code_ids):
+            current.backup_code_ids[index] = lookup
+        return current, True
+
+    # bcrypt runs outside the update so the transaction stays short.
+    return get_mfa_store().update(normalized, apply)
+
+
+def take_backup_codes(email: str) -> List[str]:
+    """The backup codes of the latest enrolment; only the first call gets them."""
+    normalized = _normalize(email)
+    if _load(normalized) is None:
+        return []
+    return get_mfa_store().take_latest_codes(normalized)
 
 
 __all__ = [
@@ -104,5 +260,5 @@ __all__ = [
     "provisioning_uri",
     "verify_totp",
     "try_backup_code",
-    "latest_backup_codes",
+    "take_backup_codes",
 ]
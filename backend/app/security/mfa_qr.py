@@ -0,0 +1,89 @@
+"""
+QR codes for MFA enrolment, rendered once per enrolment.
+
+``qrcode`` (and Pillow, which it pulls in) is imported on the first render,
+not with the app.  Renders are cached per ``(email, format)`` and tagged
+with a digest of the otpauth URI, so a re-enrolment - a new secret -
+changes the ETag and replaces the cached image.  SVG output builds the
+image from path data without going through Pillow or PNG encoding.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+FORMATS = ("png", "svg")
+_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+@dataclass(frozen=True)
+class RenderedQr:
+    content: bytes
+    media_type: str
+    etag: str
+
+
+def qr_etag(otpauth_uri: str, fmt: str) -> str:
+    """Strong ETag for one enrolment's QR in ``fmt``; reveals nothing about the secret."""
+    digest = hashlib.sha256(f"{fmt}\x00{otpauth_uri}".encode("utf-8")).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _render(otpauth_uri: str, fmt: str) -> bytes:
+    import qrcode  # deferred: imaging is only needed when a QR is requested
+
+    if fmt == "svg":
+        from qrcode.image.svg import SvgPathImage
+
+        return qrcode.make(otpauth_uri, image_factory=SvgPathImage).to_string()
+    buf = io.BytesIO()
+    qrcode.make(otpauth_uri).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class QrCache:
+    """Bounded LRU of rendered QR codes keyed by ``(email, format)``."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self._max = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], RenderedQr]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Observability: renders actually performed.
+        self.renders = 0
+
+    def render(self, email: str, otpauth_uri: str, fmt: str = "png") -> RenderedQr:
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported QR format: {fmt!r}")
+        key, etag = (email, fmt), qr_etag(otpauth_uri, fmt)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached.etag == etag:
+                self._entries.move_to_end(key)
+                return cached
+        # Rendered outside the lock; a concurrent miss just renders twice.
+        rendered = RenderedQr(_render(otpauth_uri, fmt), _MEDIA_TYPES[fmt], etag)
+        with self._lock:
+            self.renders += 1
+            self._entries[key] = rendered
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max:
+                self._entries.popitem(last=False)
+        return rendered
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@lru_cache(maxsize=1)
+def get_qr_cache() -> QrCache:
+    return QrCache()
+
+
+__all__ = ["FORMATS", "QrCache", "RenderedQr", "get_qr_cache", "qr_etag"]
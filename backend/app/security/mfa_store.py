@@ -0,0 +1,262 @@
+"""
+Durable MFA enrolments in the ``mfa_enrollments`` table.
+
+Enrolments used to live in the state backend, which is process memory by
+default: every deploy dropped them and each worker had its own.  Here the
+database is the source of truth and
+
+* TOTP secrets are Fernet-encrypted (:mod:`app.security.crypto`) under
+  ``FERNET_KEY``, derived from ``JWT_SECRET`` when unset like the
+  backup-code lookup key,
+* a new enrolment's plaintext backup codes are kept, encrypted the same
+  way, only until they are shown (:meth:`MfaStore.take_latest_codes`) or
+  used to migrate the record to lookup ids,
+* reads go through an in-process cache, so ``is_enrolled``/``verify_totp``
+  on the login path are a dict lookup; a write replaces the cached entry,
+  and entries written by another worker are picked up within
+  ``MFA_CACHE_TTL_SECONDS`` (callers re-read with ``fresh=True`` where a
+  stale answer would matter),
+* :meth:`MfaStore.update` is a compare-and-swap on the row's ``version``, so
+  a backup code cannot be consumed twice, even by two workers.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from cryptography.fernet import Fernet
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from app.core.settings import get_settings
+from app.db_models import MfaEnrollment
+from app.security.crypto import decrypt_pii, encrypt_pii
+
+_TABLE = MfaEnrollment.__table__
+# Retries of a compare-and-swap that lost to a concurrent write.
+_CAS_ATTEMPTS = 8
+
+T = TypeVar("T")
+
+
+@dataclass
+class MfaRecord:
+    email: str
+    secret: str
+    backup_code_hashes: List[bytes]
+    used_backup_codes: Set[bytes] = field(default_factory=set)
+    # Aligned with ``backup_code_hashes``; None where not yet known.
+    backup_code_ids: List[Optional[str]] = field(default_factory=list)
+    # Fingerprint of the key the ids were made with.
+    lookup_key: Optional[str] = None
+
+
+@lru_cache(maxsize=4)
+def mfa_cipher(fernet_key: str, jwt_secret: str) -> Fernet:
+    """Cipher for MFA secrets; without FERNET_KEY the key is derived from JWT_SECRET."""
+    if fernet_key:
+        return Fernet(fernet_key.encode("ascii"))
+    derived = hmac.new(jwt_secret.encode("utf-8"), b"mfa-secret-encryption", hashlib.sha256).digest()
+    return Fernet(base64.urlsafe_b64encode(derived))
+
+
+class MfaStore:
+    """MFA records in the database (see :func:`app.db.init_db`) behind a read-through in-process cache."""
+
+    def __init__(self, engine: Engine, cipher: Fernet, *, cache_ttl: float = 30.0) -> None:
+        self._engine = engine
+        self._cipher = cipher
+        self._ttl = max(0.0, cache_ttl)
+        self._cache: Dict[str, Tuple[float, MfaRecord]] = {}
+        self._lock = threading.Lock()
+        # Observability: cache hits and database reads so far.
+        self.hits = 0
+        self.loads = 0
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine
+
+    # ---------------- Cache ----------------
+    def _cached(self, normalized: str) -> Optional[MfaRecord]:
+        entry = self._cache.get(normalized)
+        if entry is None or time.monotonic() - entry[0] > self._ttl:
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def _remember(self, normalized: str, record: Optional[MfaRecord]) -> None:
+        with self._lock:
+            if record is None:
+                self._cache.pop(normalized, None)
+            else:
+                self._cache[normalized] = (time.monotonic(), record)
+
+    def invalidate(self, normalized: Optional[str] = None) -> None:
+        """Drop one cached record, or all of them."""
+        with self._lock:
+            if normalized is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(normalized, None)
+
+    # ---------------- Rows ----------------
+    def _decrypt(self, ciphertext: bytes) -> str:
+        return decrypt_pii(self._cipher, ciphertext)
+
+    def _encrypt(self, plaintext: str) -> bytes:
+        return encrypt_pii(self._cipher, plaintext)
+
+    def _to_record(self, row: Any) -> MfaRecord:
+        return MfaRecord(
+            email=row.display_email,
+            secret=self._decrypt(row.secret_encrypted),
+            backup_code_hashes=[h.encode("ascii") for h in json.loads(row.backup_code_hashes)],
+            used_backup_codes={h.encode("ascii") for h in json.loads(row.used_backup_codes)},
+            backup_code_ids=list(json.loads(row.backup_code_ids)),
+            lookup_key=row.lookup_key,
+        )
+
+    def _to_values(self, record: MfaRecord) -> Dict[str, Any]:
+        return {
+            "display_email": record.email,
+            "secret_encrypted": self._encrypt(record.secret),
+            "backup_code_hashes": json.dumps([h.decode("ascii") for h in record.backup_code_hashes]),
+            "backup_code_ids": json.dumps(record.backup_code_ids),
+            "used_backup_codes": json.dumps(sorted(h.decode("ascii") for h in record.used_backup_codes)),
+            "lookup_key": record.lookup_key,
+        }
+
+    def _select(self, conn: Connection, normalized: str) -> Any:
+        self.loads += 1
+        return conn.execute(select(_TABLE).where(_TABLE.c.email == normalized)).first()
+
+    # ---------------- API ----------------
+    def get(self, normalized: str, *, fresh: bool = False) -> Optional[MfaRecord]:
+        """The record for a normalized email; treat it as read-only."""
+        if not fresh:
+            cached = self._cached(normalized)
+            if cached is not None:
+                return cached
+        with self._engine.connect() as conn:
+            row = self._select(conn, normalized)
+        record = self._to_record(row) if row is not None else None
+        self._remember(normalized, record)
+        return record
+
+    def put(self, normalized: str, record: MfaRecord, codes: Sequence[str]) -> None:
+        """Store a new enrolment, replacing any previous one for the email.
+
+        ``codes`` are the plaintext backup codes to keep until they are shown.
+        """
+        values = self._to_values(record)
+        values["latest_codes_encrypted"] = self._encrypt(json.dumps(list(codes))) if codes else None
+        for _ in range(_CAS_ATTEMPTS):
+            try:
+                with self._engine.begin() as conn:
+                    row = self._select(conn, normalized)
+                    if row is None:
+                        conn.execute(insert(_TABLE).values(email=normalized, version=1, **values))
+                    else:
+                        conn.execute(
+                            update(_TABLE).where(_TABLE.c.email == normalized).values(version=row.version + 1, **values)
+                        )
+            except IntegrityError:
+                continue  # enrolled concurrently elsewhere; replace that one
+            self._remember(normalized, record)
+            return
+        raise RuntimeError(f"could not store MFA enrolment for {normalized}")
+
+    def update(
+        self,
+        normalized: str,
+        apply: Callable[[Optional[MfaRecord]], Tuple[Optional[MfaRecord], T]],
+        *,
+        clear_codes: bool = False,
+    ) -> T:
+        """
+        Atomically read-modify-write a record.
+
+        ``apply(current)`` gets a private copy read from the database (None
+        when not enrolled) and returns ``(new_record, result)``;
+        ``new_record=None`` writes nothing.  A write that raced another is
+        retried on the new row.  ``clear_codes`` also drops the kept
+        plaintext backup codes with the write.
+        """
+        extra: Dict[str, Any] = {"latest_codes_encrypted": None} if clear_codes else {}
+        for _ in range(_CAS_ATTEMPTS):
+            with self._engine.begin() as conn:
+                row = self._select(conn, normalized)
+                current = self._to_record(row) if row is not None else None
+                new, result = apply(current)
+                if new is None or row is None:
+                    self._remember(normalized, current)
+                    return result
+                written = conn.execute(
+                    update(_TABLE)
+                    .where(_TABLE.c.email == normalized, _TABLE.c.version == row.version)
+                    .values(version=row.version + 1, **self._to_values(new), **extra)
+                ).rowcount
+            if written:
+                self._remember(normalized, new)
+                return result
+        raise RuntimeError(f"MFA record for {normalized} kept changing")
+
+    def latest_codes(self, normalized: str) -> List[str]:
+        """Plaintext backup codes of the current enrolment, if still kept."""
+        with self._engine.connect() as conn:
+            ciphertext = conn.execute(
+                select(_TABLE.c.latest_codes_encrypted).where(_TABLE.c.email == normalized)
+            ).scalar()
+        return list(json.loads(self._decrypt(ciphertext))) if ciphertext else []
+
+    def take_latest_codes(self, normalized: str) -> List[str]:
+        """Plaintext backup codes of the current enrolment, forgetting them: they are shown once."""
+        with self._engine.begin() as conn:
+            ciphertext = conn.execute(
+                select(_TABLE.c.latest_codes_encrypted).where(_TABLE.c.email == normalized)
+            ).scalar()
+            if not ciphertext:
+                return []
+            taken = conn.execute(
+                update(_TABLE)
+                .where(_TABLE.c.email == normalized, _TABLE.c.latest_codes_encrypted == ciphertext)
+                .values(latest_codes_encrypted=None)
+            ).rowcount
+        # Another request took them first.
+        return list(json.loads(self._decrypt(ciphertext))) if taken else []
+
+    def stats(self) -> Dict[str, int]:
+        return {"cached": len(self._cache), "hits": self.hits, "loads": self.loads}
+
+
+def build_mfa_store(database_url: str = "") -> MfaStore:
+    """Store in ``database_url``, or the application database when empty."""
+    settings = get_settings()
+    if database_url:
+        connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+        engine = create_engine(database_url, connect_args=connect_args)
+    else:
+        from app.db import engine
+    return MfaStore(
+        engine,
+        mfa_cipher(settings.fernet_key, settings.jwt_secret),
+        cache_ttl=settings.mfa_cache_ttl_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_mfa_store() -> MfaStore:
+    return build_mfa_store(get_settings().mfa_database_url)
+
+
+__all__ = ["MfaRecord", "MfaStore", "build_mfa_store", "get_mfa_store", "mfa_cipher"]
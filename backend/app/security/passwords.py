@@ -3,11 +3,20 @@ from __future__ import annotations
 import os
 import hmac
 import hashlib
-from passlib.hash import argon2
+from typing import List, Optional, Sequence, Tuple
 
+from app.core.settings import Settings, get_settings
+from app.security.hashing import HashingService, get_hashing_service
 
-# Explicit Argon2id configuration
-_argon = argon2.using(type="ID", time_cost=3, memory_cost=65536, parallelism=2)
+
+def argon2_params(settings: Optional[Settings] = None) -> Tuple[int, int, int]:
+    """Argon2id ``(time_cost, memory_cost KiB, parallelism)`` from settings.
+
+    Defaults can be replaced per host with ``scripts/calibrate_argon2.py``.
+    Hashing itself runs in the process pool of app.security.hashing.
+    """
+    settings = settings or get_settings()
+    return settings.argon2_time_cost, settings.argon2_memory_cost, settings.argon2_parallelism
 
 
 def _pepper_bytes() -> bytes:
@@ -31,12 +40,28 @@ def _pepperize(password: str) -> str:
 
 
 def hash_password(password: str) -> str:
-    return _argon.hash(_pepperize(password))
+    """Blocking; for sync code paths. Raises HashingBusy when the pool is saturated."""
+    return get_hashing_service().hash_sync(_pepperize(password))
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    try:
-        return _argon.verify(_pepperize(password), password_hash)
-    except Exception:
-        return False
+    """Blocking; for sync code paths. Raises HashingBusy when the pool is saturated."""
+    return get_hashing_service().verify_sync(_pepperize(password), password_hash)
+
+
+def hash_passwords(passwords: Sequence[str], service: Optional[HashingService] = None) -> List[str]:
+    """Hash many passwords across the process pool (bulk imports); order is kept."""
+    return (service or get_hashing_service()).hash_many(_pepperize(p) for p in passwords)
+
+
+async def hash_password_async(password: str) -> str:
+    return await get_hashing_service().hash(_pepperize(password))
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await get_hashing_service().verify(_pepperize(password), password_hash)
+
 
+def password_needs_rehash(password_hash: str) -> bool:
+    """True if ``password_hash`` was made with different Argon2 parameters."""
+    return get_hashing_service().needs_update(password_hash)
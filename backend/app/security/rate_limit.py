@@ -0,0 +1,210 @@
+"""
+GCRA rate limiting on the shared state backend.
+
+Each key keeps one *theoretical arrival time* (TAT) per limit instead of a
+window of counters: for ``count`` requests per ``period`` the emission
+interval is ``T = period / count`` and a request is allowed while
+``TAT - now <= period - T``, after which ``TAT`` advances by ``T``.  A check
+is O(1) in time and storage, bursts of up to ``count`` are allowed, and
+there is no window edge where twice the rate gets through.
+
+All limits of one rule (e.g. ``"3/10seconds;5/minute"``) live in one record
+and are checked and advanced in one atomic ``StateBackend.update`` - or one
+Lua script when ``REDIS_URL`` is set - so every worker enforces the same
+budget.  ``reset()`` moves this process to a fresh key space; the old
+records simply expire.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.core.settings import get_settings
+from app.core.state import StateBackend, get_state_backend, redis_client
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d*)\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+# Float slack so exactly ``count`` requests fit in a burst; epoch seconds
+# only carry about 0.2 microseconds of precision.
+_EPSILON = 1e-6
+
+
+class RateLimited(Exception):
+    """The caller exceeded a limit; retry after ``retry_after`` seconds."""
+
+    def __init__(self, scope: str, retry_after: float) -> None:
+        super().__init__(f"rate limit exceeded for {scope}")
+        self.scope = scope
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+@dataclass(frozen=True)
+class Limit:
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        return self.period / self.count
+
+    @property
+    def tolerance(self) -> float:
+        return self.period - self.interval
+
+
+@lru_cache(maxsize=32)
+def parse_limits(spec: str) -> Tuple[Limit, ...]:
+    """``"3/10seconds;5/minute"`` -> limits; an empty spec means no limit."""
+    limits = []
+    for part in spec.split(";"):
+        if not part.strip():
+            continue
+        match = _LIMIT.match(part)
+        if not match or int(match.group(1)) <= 0:
+            raise ValueError(f"invalid rate limit: {part!r}")
+        count, multiple, unit = match.groups()
+        limits.append(Limit(int(count), float(int(multiple or 1) * _UNITS[unit.lower()])))
+    return tuple(limits)
+
+
+def gcra(tats: Sequence[float], limits: Sequence[Limit], now: float) -> Tuple[float, List[float]]:
+    """
+    Check one request against every limit.
+
+    Returns ``(retry_after, new_tats)``; ``retry_after`` is 0 when allowed, in
+    which case ``new_tats`` are the advanced arrival times to store.
+    """
+    retry_after = 0.0
+    new_tats = []
+    for index, limit in enumerate(limits):
+        tat = max(tats[index] if index < len(tats) else now, now)
+        if tat - now > limit.tolerance + _EPSILON:
+            retry_after = max(retry_after, tat - now - limit.tolerance)
+        new_tats.append(tat + limit.interval)
+    return retry_after, new_tats
+
+
+class RateLimiter:
+    """Limits kept in the configured state backend (in-memory by default)."""
+
+    def __init__(self, backend: Optional[StateBackend] = None) -> None:
+        self._backend = backend
+        # Part of every key; all workers start at 0 so they share records.
+        self._epoch = 0
+
+    @property
+    def backend(self) -> StateBackend:
+        # Resolved lazily so STATE_BACKEND is read after settings are loaded.
+        return self._backend if self._backend is not None else get_state_backend()
+
+    def _now(self) -> float:
+        # Wall-clock time: arrival times are shared with other worker processes.
+        return time.time()
+
+    def _key(self, scope: str, key: str) -> str:
+        return f"rl:{self._epoch}:{scope}:{key}"
+
+    def _acquire(self, key: str, limits: Sequence[Limit]) -> float:
+        def apply(raw: Optional[str]):
+            retry_after, new_tats = gcra(json.loads(raw) if raw else [], limits, self._now())
+            if retry_after:
+                return raw, retry_after
+            return json.dumps(new_tats), 0.0
+
+        # An allowed request never moves a TAT more than one period ahead,
+        # so the longest period bounds how long the record matters.
+        return self.backend.update(key, apply, ttl=max(limit.period for limit in limits))
+
+    def hit(self, scope: str, key: str, spec: str) -> None:
+        """Count one request for ``key``; raises :class:`RateLimited` when over ``spec``."""
+        limits = parse_limits(spec)
+        if not limits:
+            return
+        retry_after = self._acquire(self._key(scope, key), limits)
+        if retry_after:
+            raise RateLimited(scope, retry_after)
+
+    def reset(self) -> None:
+        """Forget all limits held by this process (tests, operational resets)."""
+        self._epoch += 1
+
+
+# ---------------- Redis ----------------
+# The record is a hash {1: tat, 2: tat, ...}, one field per limit; the check
+# and the advance are one script.  ARGV: now, then (interval, tolerance) pairs.
+_GCRA_SCRIPT = """
+local now = tonumber(ARGV[1])
+local n = (#ARGV - 1) / 2
+local retry, ttl, new = 0, 0, {}
+for i = 1, n do
+  local interval, tolerance = tonumber(ARGV[2 * i]), tonumber(ARGV[2 * i + 1])
+  local tat = tonumber(redis.call('HGET', KEYS[1], tostring(i))) or now
+  if tat < now then tat = now end
+  if tat - now > tolerance + 1e-6 then retry = math.max(retry, tat - now - tolerance) end
+  new[i] = tat + interval
+end
+if retry > 0 then return string.format('%.17g', retry) end
+for i = 1, n do
+  redis.call('HSET', KEYS[1], tostring(i), string.format('%.17g', new[i]))
+  ttl = math.max(ttl, new[i] - now)
+end
+redis.call('PEXPIRE', KEYS[1], math.max(1, math.ceil(ttl * 1000)))
+return '0'
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """Limits in Redis (or any Redis-protocol server); one script per request."""
+
+    def __init__(self, url: Optional[str] = None, *, client: Any = None, prefix: str = "evp:", max_connections: int = 50) -> None:
+        super().__init__()
+        if client is None:
+            client = redis_client(url, max_connections)
+        self._redis = client
+        self._prefix = prefix
+        self._script = client.register_script(_GCRA_SCRIPT)
+        # Load up front so every request is a plain EVALSHA hit.
+        client.script_load(_GCRA_SCRIPT)
+
+    def _acquire(self, key: str, limits: Sequence[Limit]) -> float:
+        args: List[Any] = [repr(self._now())]
+        for limit in limits:
+            args += [repr(limit.interval), repr(limit.tolerance)]
+        return float(self._script(keys=[self._prefix + key], args=args))
+
+    def close(self) -> None:
+        self._redis.close()
+
+
+def build_rate_limiter(redis_url: Optional[str]) -> RateLimiter:
+    if redis_url:
+        return RedisRateLimiter(redis_url, max_connections=get_settings().redis_max_connections)
+    return RateLimiter()
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    """Redis-backed when REDIS_URL is set, otherwise on the state backend."""
+    return build_rate_limiter(get_settings().redis_url)
+
+
+__all__ = [
+    "Limit",
+    "RateLimited",
+    "RateLimiter",
+    "RedisRateLimiter",
+    "build_rate_limiter",
+    "gcra",
+    "get_rate_limiter",
+    "parse_limits",
+]
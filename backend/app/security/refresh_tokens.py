@@ -0,0 +1,199 @@
+"""
+Opaque rotating refresh tokens with family-based reuse detection.
+
+A login starts a *family*; each refresh exchanges the presented token for a
+new one in the same family and makes the old one stale.  Presenting a stale
+token means it was copied (the legitimate client already rotated past it),
+so the whole family is revoked and both parties must log in again.
+
+Except briefly: tabs of one browser share a refresh token, so two of them
+can rotate it at nearly the same time.  Within
+``REFRESH_REUSE_GRACE_SECONDS`` of a rotation, the token it replaced is
+answered with the *same* successor instead of being treated as reuse.
+Successors are derived from their predecessor with a server-side key, so
+the grace path needs no plaintext token at rest; once the successor has
+itself been rotated, or the window has passed, replay is reuse again.
+
+Tokens are random strings; only their SHA-256 digests are stored, in the
+shared state backend so every worker sees rotations and revocations:
+
+* ``refresh:tok:{digest}`` -> ``{"family": ...}`` (TTL: token lifetime)
+* ``refresh:fam:{family}`` -> subject, role, current digest, revoked flag
+  (TTL: absolute family lifetime)
+
+The family record is changed with ``StateBackend.update`` so two workers
+racing to rotate the same token cannot both succeed.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+from app.core.settings import get_settings
+from app.core.state import StateBackend, get_state_backend
+
+
+class RefreshTokenError(Exception):
+    """The refresh token is unknown, expired or revoked."""
+
+
+class RefreshTokenReused(RefreshTokenError):
+    """A rotated-out token was presented again; its family is now revoked."""
+
+
+@dataclass
+class TokenFamily:
+    subject: str
+    role: str
+    current: str
+    expires_at: float
+    revoked: bool = False
+    # The digest ``current`` replaced, and when (for the reuse grace window).
+    previous: Optional[str] = None
+    rotated_at: float = 0.0
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class RefreshTokenStore:
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        *,
+        ttl_seconds: Optional[int] = None,
+        family_ttl_seconds: Optional[int] = None,
+        grace_seconds: Optional[float] = None,
+    ) -> None:
+        self._backend = backend
+        self._ttl_seconds = ttl_seconds
+        self._family_ttl_seconds = family_ttl_seconds
+        self._grace_seconds = grace_seconds
+
+    # Resolved lazily so the state backend and lifetimes follow settings.
+    @property
+    def backend(self) -> StateBackend:
+        return self._backend if self._backend is not None else get_state_backend()
+
+    @property
+    def ttl_seconds(self) -> int:
+        return self._ttl_seconds or get_settings().refresh_token_ttl_seconds
+
+    @property
+    def family_ttl_seconds(self) -> int:
+        return self._family_ttl_seconds or get_settings().refresh_family_ttl_seconds
+
+    @property
+    def grace_seconds(self) -> float:
+        if self._grace_seconds is not None:
+            return self._grace_seconds
+        return get_settings().refresh_reuse_grace_seconds
+
+    @staticmethod
+    def _successor(token: str, family: str) -> str:
+        """The token that replaces ``token``; only the server can compute it."""
+        key = hmac.new(get_settings().jwt_secret.encode("utf-8"), b"refresh-successor", hashlib.sha256).digest()
+        mac = hmac.new(key, f"{family}\x00{token}".encode("utf-8"), hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(mac).rstrip(b"=").decode("ascii")
+
+    @staticmethod
+    def _token_key(digest: str) -> str:
+        return f"refresh:tok:{digest}"
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"refresh:fam:{family}"
+
+    def _store_token(self, digest: str, family: str, family_expires_at: float) -> None:
+        ttl = max(1.0, min(self.ttl_seconds, family_expires_at - time.time()))
+        self.backend.set(self._token_key(digest), json.dumps({"family": family}), ttl=ttl)
+
+    def issue(self, subject: str, role: str) -> str:
+        """Start a new family for a fresh login and return its first token."""
+        token = secrets.token_urlsafe(32)
+        family = secrets.token_hex(16)
+        digest = _digest(token)
+        record = TokenFamily(
+            subject=subject,
+            role=role,
+            current=digest,
+            expires_at=time.time() + self.family_ttl_seconds,
+        )
+        self.backend.set(self._family_key(family), json.dumps(asdict(record)), ttl=self.family_ttl_seconds)
+        self._store_token(digest, family, record.expires_at)
+        return token
+
+    def _family_of(self, token: str) -> Tuple[str, str]:
+        digest = _digest(token)
+        raw = self.backend.get(self._token_key(digest))
+        if not raw:
+            raise RefreshTokenError("unknown or expired refresh token")
+        return digest, json.loads(raw)["family"]
+
+    def rotate(self, token: str) -> Tuple[str, str, str]:
+        """Exchange ``token`` for a new one; returns ``(new_token, subject, role)``."""
+        digest, family = self._family_of(token)
+        new_token = self._successor(token, family)
+        new_digest = _digest(new_token)
+
+        def apply(raw: Optional[str]):
+            if not raw:
+                return None, ("gone", None)
+            record = TokenFamily(**json.loads(raw))
+            now = time.time()
+            if record.revoked or record.expires_at <= now:
+                return raw, ("revoked", record)
+            if record.current != digest:
+                if (
+                    record.previous == digest
+                    and record.current == new_digest
+                    and now - record.rotated_at <= self.grace_seconds
+                ):
+                    return raw, ("grace", record)  # another tab just rotated it
+                record.revoked = True
+                return json.dumps(asdict(record)), ("reused", record)
+            record.previous, record.current, record.rotated_at = digest, new_digest, now
+            return json.dumps(asdict(record)), ("ok", record)
+
+        outcome, record = self.backend.update(
+            self._family_key(family), apply, ttl=self.family_ttl_seconds
+        )
+        if outcome == "reused":
+            raise RefreshTokenReused("refresh token reuse detected")
+        if outcome not in ("ok", "grace"):
+            raise RefreshTokenError("refresh token family revoked or expired")
+        # The old token's record stays until it expires so a replay is
+        # recognised as reuse rather than as an unknown token.
+        if outcome == "ok":
+            self._store_token(new_digest, family, record.expires_at)
+        return new_token, record.subject, record.role
+
+    def revoke(self, token: str) -> bool:
+        """Revoke the family of ``token`` (logout); False if it is unknown."""
+        try:
+            _, family = self._family_of(token)
+        except RefreshTokenError:
+            return False
+
+        def apply(raw: Optional[str]):
+            if not raw:
+                return None, False
+            record = TokenFamily(**json.loads(raw))
+            record.revoked = True
+            return json.dumps(asdict(record)), True
+
+        return self.backend.update(self._family_key(family), apply, ttl=self.family_ttl_seconds)
+
+
+refresh_tokens = RefreshTokenStore()
+
+
+__all__ = ["RefreshTokenError", "RefreshTokenReused", "RefreshTokenStore", "TokenFamily", "refresh_tokens"]
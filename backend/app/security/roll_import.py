@@ -0,0 +1,299 @@
+"""
+Bulk import of a voter roll into ``users``.
+
+``POST /auth/signup`` costs one SELECT, one Argon2 hash, one INSERT and one
+commit per voter, which does not scale to onboarding a county.  The import
+streams a CSV or NDJSON roll (``username``, ``email``, optional
+``password``) in batches:
+
+* every row is validated with the signup rules (:class:`SignupPayload`,
+  reserved identities); bad rows go to an optional rejects file,
+* duplicates - within the batch or already in the database - are dropped
+  before any hashing,
+* passwords are hashed across a dedicated process pool; rows without a
+  password get an activation token instead, hashed the same way and written
+  to a separate file for distribution (if a batch is retried after a crash,
+  the last token listed for an email is the valid one),
+* each batch is one ``executemany`` INSERT in one transaction, after which
+  a checkpoint records how many input rows are done.  ``resume=True``
+  skips those rows; a crash between commit and checkpoint only makes the
+  next run see the batch as duplicates.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import secrets
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+from sqlalchemy.engine import Engine
+
+from app.db_models import User
+from app.security.accounts import SignupPayload, is_reserved_identity
+from app.security.hashing import HashingService, ParamsKey
+from app.security.passwords import hash_passwords
+
+_TABLE = User.__table__
+
+DEFAULT_BATCH_SIZE = 5_000
+# Stay below SQLite's bound-parameter limit in the duplicate lookups.
+_LOOKUP_CHUNK = 900
+
+Record = Optional[Dict[str, Any]]
+
+
+@dataclass
+class ImportReport:
+    source: str
+    rows: int = 0
+    inserted: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    activation_tokens: int = 0
+    batches: int = 0
+    resumed_from: int = 0
+    elapsed_seconds: float = 0.0
+    hash_seconds: float = 0.0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "activationTokens": self.activation_tokens,
+            "batches": self.batches,
+            "resumedFrom": self.resumed_from,
+            "elapsedSeconds": round(self.elapsed_seconds, 3),
+            "hashSeconds": round(self.hash_seconds, 3),
+            "rowsPerSecond": round(self.rows_per_second, 1),
+        }
+
+
+# ---------------- Input ----------------
+def detect_format(path: Path) -> str:
+    return "csv" if path.suffix.lower() == ".csv" else "ndjson"
+
+
+def iter_roll(stream: TextIO, fmt: str) -> Iterator[Record]:
+    """Yield one record per data row; ``None`` for an NDJSON line that is not an object."""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield {k.strip(): (v or "").strip() for k, v in row.items() if k}
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield None
+            continue
+        yield record if isinstance(record, dict) else None
+
+
+def activation_token() -> str:
+    """Random initial secret that itself satisfies the signup password rules."""
+    while True:
+        token = f"{secrets.token_urlsafe(18)}-"
+        try:
+            SignupPayload(username="token", email="token@example.com", password=token)
+        except ValidationError:
+            continue
+        return token
+
+
+def validate(record: Record, allow_tokens: bool) -> Tuple[Optional[SignupPayload], bool, Optional[str]]:
+    """``(payload, token_issued, error)`` for one input record."""
+    if record is None:
+        return None, False, "invalid_record"
+    issued = False
+    password = record.get("password") or ""
+    if not password and allow_tokens:
+        password, issued = activation_token(), True
+    try:
+        payload = SignupPayload(username=record.get("username", ""), email=record.get("email", ""), password=password)
+    except ValidationError as exc:
+        first = exc.errors()[0]
+        return None, False, f"{'.'.join(str(p) for p in first['loc'])}: {first['msg']}"
+    if is_reserved_identity(payload.username, payload.email):
+        return None, False, "reserved_identity"
+    return payload, issued, None
+
+
+# ---------------- Checkpoints ----------------
+def _source_id(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size}
+
+
+def load_checkpoint(checkpoint: Path, source: Path) -> int:
+    """Input rows already imported from ``source``; 0 without a checkpoint."""
+    if not checkpoint.exists():
+        return 0
+    data = json.loads(checkpoint.read_text(encoding="utf-8"))
+    if data.get("source") != _source_id(source):
+        raise ValueError(f"checkpoint {checkpoint} belongs to a different roll")
+    return int(data["rows"])
+
+
+def save_checkpoint(checkpoint: Path, source: Path, rows: int) -> None:
+    tmp = checkpoint.with_suffix(checkpoint.suffix + ".tmp")
+    tmp.write_text(json.dumps({"source": _source_id(source), "rows": rows}), encoding="utf-8")
+    os.replace(tmp, checkpoint)
+
+
+# ---------------- Import ----------------
+def _existing(engine: Engine, usernames: Sequence[str], emails: Sequence[str]) -> Tuple[Set[str], Set[str]]:
+    taken_names: Set[str] = set()
+    taken_emails: Set[str] = set()
+    with engine.connect() as conn:
+        for i in range(0, max(len(usernames), len(emails)), _LOOKUP_CHUNK):
+            names, mails = usernames[i : i + _LOOKUP_CHUNK], emails[i : i + _LOOKUP_CHUNK]
+            stmt = select(_TABLE.c.username, _TABLE.c.email).where(
+                or_(_TABLE.c.username.in_(names), _TABLE.c.email.in_(mails))
+            )
+            for name, mail in conn.execute(stmt):
+                taken_names.add(name)
+                taken_emails.add(mail)
+    return taken_names, taken_emails
+
+
+class _Batch:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.payloads: List[Tuple[SignupPayload, bool]] = []
+
+
+def import_roll(
+    engine: Engine,
+    source: Path,
+    *,
+    fmt: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    service: HashingService,
+    checkpoint: Optional[Path] = None,
+    resume: bool = False,
+    rejects: Optional[Path] = None,
+    tokens: Optional[Path] = None,
+    progress: Optional[Callable[[ImportReport], None]] = None,
+) -> ImportReport:
+    """Import ``source`` into ``users``; see the module docstring."""
+    report = ImportReport(source=str(source))
+    skip = load_checkpoint(checkpoint, source) if checkpoint is not None and resume else 0
+    report.resumed_from = skip
+    started = time.perf_counter()
+
+    mode = "a" if resume else "w"
+    rejects_out = rejects.open(mode, encoding="utf-8") if rejects else None
+    tokens_out = tokens.open(mode, encoding="utf-8", newline="") if tokens else None
+    token_writer = csv.writer(tokens_out) if tokens_out else None
+    if token_writer and not (resume and tokens_out.tell()):
+        token_writer.writerow(["email", "activation_token"])
+
+    def flush(batch: _Batch, done: int) -> None:
+        seen_names: Set[str] = set()
+        seen_emails: Set[str] = set()
+        unique: List[Tuple[SignupPayload, bool]] = []
+        for payload, issued in batch.payloads:
+            if payload.username in seen_names or str(payload.email) in seen_emails:
+                report.duplicates += 1
+                continue
+            seen_names.add(payload.username)
+            seen_emails.add(str(payload.email))
+            unique.append((payload, issued))
+        taken_names, taken_emails = _existing(engine, list(seen_names), list(seen_emails))
+        fresh = [(p, t) for p, t in unique if p.username not in taken_names and str(p.email) not in taken_emails]
+        report.duplicates += len(unique) - len(fresh)
+
+        hash_started = time.perf_counter()
+        hashes = hash_passwords([p.password for p, _ in fresh], service)
+        report.hash_seconds += time.perf_counter() - hash_started
+
+        if token_writer:
+            # Written before the commit so no account exists without its token.
+            for payload, issued in fresh:
+                if issued:
+                    token_writer.writerow([str(payload.email), payload.password])
+                    report.activation_tokens += 1
+            tokens_out.flush()
+        if fresh:
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(_TABLE),
+                    [
+                        {"username": p.username, "email": str(p.email), "password_hash": h}
+                        for (p, _), h in zip(fresh, hashes)
+                    ],
+                )
+        report.inserted += len(fresh)
+        report.batches += 1
+        report.rows = done - skip
+        report.elapsed_seconds = time.perf_counter() - started
+        if checkpoint is not None:
+            save_checkpoint(checkpoint, source, done)
+        if progress:
+            progress(report)
+
+    try:
+        with source.open(encoding="utf-8", newline="") as stream:
+            batch = _Batch()
+            done = 0
+            for number, record in enumerate(iter_roll(stream, fmt or detect_format(source)), start=1):
+                done = number
+                if number <= skip:
+                    continue
+                payload, issued, error = validate(record, allow_tokens=tokens is not None)
+                if error:
+                    report.rejected += 1
+                    if len(report.errors) < 100:
+                        report.errors.append((number, error))
+                    if rejects_out:
+                        rejects_out.write(json.dumps({"row": number, "error": error}) + "\n")
+                else:
+                    batch.payloads.append((payload, issued))  # type: ignore[arg-type]
+                batch.rows += 1
+                if batch.rows >= batch_size:
+                    flush(batch, done)
+                    batch = _Batch()
+            if batch.rows or report.batches == 0:
+                flush(batch, max(done, skip))
+    finally:
+        if rejects_out:
+            rejects_out.close()
+        if tokens_out:
+            tokens_out.close()
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+def import_service(params: ParamsKey, workers: int, memory_budget_bytes: int) -> HashingService:
+    """A pool of its own so an import never competes with API logins for queue slots."""
+    return HashingService(params, workers=workers, max_queue=4 * workers, memory_budget_bytes=memory_budget_bytes)
+
+
+__all__ = [
+    "DEFAULT_BATCH_SIZE",
+    "ImportReport",
+    "activation_token",
+    "detect_format",
+    "import_roll",
+    "import_service",
+    "iter_roll",
+    "load_checkpoint",
+    "save_checkpoint",
+    "validate",
+]
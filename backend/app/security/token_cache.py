@@ -0,0 +1,99 @@
+"""
+Bounded cache of verified JWTs.
+
+Every authenticated request used to pay for ``jwt.decode`` - base64, an HMAC
+and claim validation - even when a voter's client sends the same token on
+each call.  :class:`TokenCache` remembers the parsed ``(email, role)`` of
+tokens that verified successfully:
+
+* keys are a BLAKE2b digest of the token, so raw bearer tokens are not kept,
+* an entry is dropped once the token's ``exp`` passes,
+* least recently used entries are evicted beyond ``maxsize``,
+* the whole cache is cleared when the settings object changes (secret or
+  algorithm may have been rotated by ``reload_settings``).
+
+Only successful verifications are cached; invalid tokens always take the
+slow path so garbage cannot flush useful entries.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+Parsed = Tuple[str, str]
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[str, str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._owner: Any = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    def _sync_owner(self, owner: Any) -> None:
+        # Caller holds the lock.
+        if owner is not self._owner:
+            self._entries.clear()
+            self._owner = owner
+
+    def get(self, token: str, owner: Any) -> Optional[Parsed]:
+        """Cached ``(email, role)`` for ``token`` under the settings ``owner``."""
+        if self.maxsize <= 0:
+            return None
+        key = self._digest(token)
+        with self._lock:
+            self._sync_owner(owner)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            email, role, exp = entry
+            if exp is not None and exp <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return email, role
+
+    def put(self, token: str, owner: Any, parsed: Parsed, exp: Optional[float]) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._sync_owner(owner)
+            self._entries[key] = (parsed[0], parsed[1], exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+__all__ = ["TokenCache"]
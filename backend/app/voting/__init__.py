@@ -0,0 +1 @@
+"""Vote storage and counting."""
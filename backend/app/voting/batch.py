@@ -0,0 +1,152 @@
+"""
+Helpers for kiosk batch vote submission.
+
+Polling-station kiosks buffer votes offline and upload them in one request.
+Each record is signed with the shared ``KIOSK_SIGNING_KEY`` (HMAC-SHA256 over
+``voter:ballot_id:option_index``), so the batch endpoint authenticates every
+vote without a per-vote JWT.  The body is a JSON array that is decoded item by
+item as it streams in, so a large upload never has to be buffered whole.
+"""
+
+from __future__ import annotations
+
+import codecs
+import hashlib
+import hmac
+import json
+from typing import Any, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.voting.ledger import normalize_voter
+
+
+class BatchFormatError(ValueError):
+    """The request body is not a well-formed JSON array."""
+
+
+class KioskVote(BaseModel):
+    voter: str = Field(min_length=3, max_length=255)
+    ballot_id: int
+    option_index: int
+    signature: str = Field(min_length=64, max_length=64)
+
+
+def _message(voter: str, ballot_id: int, option_index: int) -> bytes:
+    return f"{normalize_voter(voter)}:{ballot_id}:{option_index}".encode("utf-8")
+
+
+def sign_vote(key: str, voter: str, ballot_id: int, option_index: int) -> str:
+    """Return the hex signature a kiosk attaches to one vote record."""
+    return hmac.new(key.encode("utf-8"), _message(voter, ballot_id, option_index), hashlib.sha256).hexdigest()
+
+
+def verify_vote(key: str, vote: KioskVote) -> bool:
+    expected = sign_vote(key, vote.voter, vote.ballot_id, vote.option_index)
+    return hmac.compare_digest(expected, vote.signature.lower())
+
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonArrayStream:
+    """
+    Incrementally decode the items of a top-level JSON array.
+
+    ``feed`` accepts raw byte chunks and returns the items completed so far;
+    ``close`` must be called once the body ends to detect truncation.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        # start -> first (item or "]") -> sep ("," or "]") -> item -> ... -> end
+        self._state = "start"
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        try:
+            self._buf += self._text.decode(chunk)
+        except UnicodeDecodeError as exc:
+            raise BatchFormatError("body is not valid UTF-8") from exc
+        return self._drain(final=False)
+
+    def close(self) -> List[Any]:
+        try:
+            self._buf += self._text.decode(b"", final=True)
+        except UnicodeDecodeError as exc:
+            raise BatchFormatError("body is not valid UTF-8") from exc
+        items = self._drain(final=True)
+        if self._state != "end":
+            raise BatchFormatError("unterminated JSON array")
+        return items
+
+    def _drain(self, *, final: bool) -> List[Any]:
+        buf = self._buf
+        pos = 0
+        items: List[Any] = []
+        n = len(buf)
+        while True:
+            while pos < n and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= n:
+                break
+            ch = buf[pos]
+            if self._state == "start":
+                if ch != "[":
+                    raise BatchFormatError("expected a JSON array")
+                self._state = "first"
+                pos += 1
+            elif self._state in ("first", "item"):
+                if self._state == "first" and ch == "]":
+                    self._state = "end"
+                    pos += 1
+                    continue
+                try:
+                    value, end = self._decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise BatchFormatError("malformed item in JSON array") from None
+                    break  # wait for more data
+                # A value that runs to the end of the buffer may be a truncated
+                # number or literal; only accept it once something follows.
+                if end >= n and not final:
+                    break
+                items.append(value)
+                self._state = "sep"
+                pos = end
+            elif self._state == "sep":
+                if ch == ",":
+                    self._state = "item"
+                elif ch == "]":
+                    self._state = "end"
+                else:
+                    raise BatchFormatError("expected ',' or ']' in JSON array")
+                pos += 1
+            else:  # end
+                raise BatchFormatError("trailing data after JSON array")
+        self._buf = buf[pos:]
+        return items
+
+
+def validate_item(raw: Any, key: str) -> tuple[Optional[KioskVote], Optional[str]]:
+    """Return ``(vote, None)`` for a well-formed, correctly signed record, else ``(None, reason)``."""
+    if not isinstance(raw, dict):
+        return None, "not_an_object"
+    try:
+        vote = KioskVote.model_validate(raw)
+    except ValueError:
+        return None, "malformed_record"
+    if not verify_vote(key, vote):
+        return None, "bad_signature"
+    return vote, None
+
+
+__all__ = [
+    "BatchFormatError",
+    "JsonArrayStream",
+    "KioskVote",
+    "sign_vote",
+    "validate_item",
+    "verify_vote",
+]
@@ -0,0 +1,288 @@
+"""
+Ballot catalog backed by the ``ballots`` and ``ballot_options`` tables.
+
+Listing is served by keyset (``id > cursor``) queries over indexed columns,
+so a page costs the same whether the election has ten contests or ten
+thousand.  The vote hot path only needs ``get(ballot_id)``, which is answered
+from an in-memory mirror of the catalog and falls back to the database for
+ballots added by another worker.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.engine import Connection, Engine
+
+from app.db_models import BallotOption, BallotRecord
+
+_BALLOTS = BallotRecord.__table__
+_OPTIONS = BallotOption.__table__
+
+# Seeded into an empty catalog so a fresh deployment has something to vote on.
+DEMO_BALLOTS: List[Dict[str, Any]] = [
+    {
+        "id": 1,
+        "title": "City Council Election",
+        "options": ["Alice Smith", "Bob Jones", "Carol Diaz"],
+    },
+    {
+        "id": 2,
+        "title": "Referendum: Approve Park Renovation?",
+        "options": ["Yes", "No"],
+    },
+]
+
+STATUSES = ("draft", "open", "closed")
+
+# SQLite caps bound parameters per statement; chunk IN (...) lookups.
+_IN_CHUNK = 500
+# Bound on remembered unknown ids; the set is simply dropped when full.
+_MISSING_MAX = 10_000
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Store timestamps as naive UTC, matching ``datetime.utcnow()`` elsewhere."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class BallotInfo:
+    id: int
+    title: str
+    options: Tuple[str, ...]
+    jurisdiction: Optional[str] = None
+    status: str = "open"
+    opens_at: Optional[datetime] = None
+    closes_at: Optional[datetime] = None
+    durability: Optional[str] = None
+
+    def is_open(self, now: datetime) -> bool:
+        if self.status != "open":
+            return False
+        if self.opens_at is not None and now < self.opens_at:
+            return False
+        if self.closes_at is not None and now >= self.closes_at:
+            return False
+        return True
+
+
+class BallotCatalog:
+    """Ballot metadata in the database (see :func:`app.db.init_db`), mirrored in memory for lookups."""
+
+    def __init__(self, engine: Engine, *, miss_ttl: float = 1.0) -> None:
+        self._engine = engine
+        self._by_id: Dict[int, BallotInfo] = {}
+        # Recently looked-up ids that do not exist -> monotonic time of the miss.
+        self._missing: Dict[int, float] = {}
+        self._miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        # Bumped whenever catalog contents change; used as a cache version.
+        self.version = 0
+        self.reload()
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine
+
+    # ---------------- Loading ----------------
+    @staticmethod
+    def _assemble(conn: Connection, rows: Sequence[Any]) -> List[BallotInfo]:
+        ids = [row.id for row in rows]
+        labels: Dict[int, List[str]] = {bid: [] for bid in ids}
+        for start in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[start : start + _IN_CHUNK]
+            stmt = (
+                select(_OPTIONS.c.ballot_id, _OPTIONS.c.label)
+                .where(_OPTIONS.c.ballot_id.in_(chunk))
+                .order_by(_OPTIONS.c.ballot_id, _OPTIONS.c.position)
+            )
+            for ballot_id, label in conn.execute(stmt):
+                labels[ballot_id].append(label)
+        return [
+            BallotInfo(
+                id=row.id,
+                title=row.title,
+                options=tuple(labels[row.id]),
+                jurisdiction=row.jurisdiction,
+                status=row.status,
+                opens_at=row.opens_at,
+                closes_at=row.closes_at,
+                durability=row.durability,
+            )
+            for row in rows
+        ]
+
+    def reload(self) -> None:
+        with self._engine.connect() as conn:
+            rows = conn.execute(select(_BALLOTS).order_by(_BALLOTS.c.id)).all()
+            infos = self._assemble(conn, rows)
+        with self._lock:
+            self._by_id = {info.id: info for info in infos}
+            self._missing.clear()
+            self.version += 1
+
+    # ---------------- Reads ----------------
+    def get(self, ballot_id: int) -> Optional[BallotInfo]:
+        return self.lookup(ballot_id)[0]
+
+    def lookup(self, ballot_id: int) -> Tuple[Optional[BallotInfo], bool]:
+        """
+        ``(info, added)``: ``added`` is True only for the one call that loaded
+        ``ballot_id`` into the mirror (a ballot created by another worker).
+        Unknown ids are remembered for ``miss_ttl`` seconds, so repeated
+        requests for them do not each query the database.
+        """
+        info = self._by_id.get(ballot_id)
+        if info is not None:
+            return info, False
+        missed_at = self._missing.get(ballot_id)
+        if missed_at is not None and time.monotonic() - missed_at < self._miss_ttl:
+            return None, False
+        with self._engine.connect() as conn:
+            rows = conn.execute(select(_BALLOTS).where(_BALLOTS.c.id == ballot_id)).all()
+            found = self._assemble(conn, rows)
+        with self._lock:
+            if not found:
+                if len(self._missing) >= _MISSING_MAX:
+                    self._missing.clear()
+                self._missing[ballot_id] = time.monotonic()
+                return None, False
+            current = self._by_id.get(ballot_id)
+            if current is not None:
+                return current, False  # loaded concurrently by another request
+            self._by_id[ballot_id] = found[0]
+            self._missing.pop(ballot_id, None)
+            self.version += 1
+        return found[0], True
+
+    def remember(self, infos: Iterable[BallotInfo]) -> List[BallotInfo]:
+        """
+        Mirror ballots read from the database (e.g. a listing page); returns
+        the ones not mirrored yet, i.e. created by another worker.
+        """
+        added: List[BallotInfo] = []
+        with self._lock:
+            for info in infos:
+                if info.id not in self._by_id:
+                    self._by_id[info.id] = info
+                    self._missing.pop(info.id, None)
+                    added.append(info)
+            if added:
+                self.version += 1
+        return added
+
+    def all(self) -> List[BallotInfo]:
+        return sorted(self._by_id.values(), key=lambda info: info.id)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def page(
+        self,
+        *,
+        after: Optional[int] = None,
+        limit: int = 100,
+        jurisdiction: Optional[str] = None,
+        status: Optional[str] = None,
+        open_at: Optional[datetime] = None,
+    ) -> Tuple[List[BallotInfo], Optional[int]]:
+        """
+        Return up to ``limit`` ballots with ``id > after`` matching the filters,
+        plus the cursor for the next page (``None`` on the last page).
+        """
+        conditions = []
+        if after is not None:
+            conditions.append(_BALLOTS.c.id > after)
+        if jurisdiction is not None:
+            conditions.append(_BALLOTS.c.jurisdiction == jurisdiction)
+        if status is not None:
+            conditions.append(_BALLOTS.c.status == status)
+        if open_at is not None:
+            conditions.append(or_(_BALLOTS.c.opens_at.is_(None), _BALLOTS.c.opens_at <= open_at))
+            conditions.append(or_(_BALLOTS.c.closes_at.is_(None), _BALLOTS.c.closes_at > open_at))
+        stmt = select(_BALLOTS).order_by(_BALLOTS.c.id).limit(limit + 1)
+        if conditions:
+            stmt = stmt.where(and_(*conditions))
+        with self._engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+            has_more = len(rows) > limit
+            infos = self._assemble(conn, rows[:limit])
+        next_cursor = infos[-1].id if has_more and infos else None
+        return infos, next_cursor
+
+    # ---------------- Writes ----------------
+    def seed(self, specs: Iterable[Mapping[str, Any]]) -> bool:
+        """Load ``specs`` only if the catalog is empty; returns whether it did."""
+        with self._engine.connect() as conn:
+            if conn.execute(select(_BALLOTS.c.id).limit(1)).first() is not None:
+                return False
+        self.bulk_load(list(specs))
+        return True
+
+    def bulk_load(self, specs: Sequence[Mapping[str, Any]]) -> List[BallotInfo]:
+        """
+        Insert many ballots (and their options) in one transaction using
+        executemany.  Specs without an ``id`` get one assigned by the database.
+        """
+        def row(spec: Mapping[str, Any]) -> Dict[str, Any]:
+            return {
+                "title": spec["title"],
+                "jurisdiction": spec.get("jurisdiction"),
+                "status": spec.get("status") or "open",
+                "opens_at": utc_naive(spec.get("opens_at")),
+                "closes_at": utc_naive(spec.get("closes_at")),
+                "durability": spec.get("durability"),
+            }
+
+        explicit = [spec for spec in specs if spec.get("id") is not None]
+        implicit = [spec for spec in specs if spec.get("id") is None]
+        assigned: Dict[int, int] = {}  # position in ``implicit`` -> id
+        with self._engine.begin() as conn:
+            if explicit:
+                conn.execute(insert(_BALLOTS), [{"id": spec["id"], **row(spec)} for spec in explicit])
+            if implicit:
+                result = conn.execute(
+                    insert(_BALLOTS).returning(_BALLOTS.c.id, sort_by_parameter_order=True),
+                    [row(spec) for spec in implicit],
+                )
+                assigned = {i: new_id for i, (new_id,) in enumerate(result)}
+            ids = [spec["id"] for spec in explicit] + [assigned[i] for i in range(len(implicit))]
+            ordered = explicit + implicit
+            option_rows = [
+                {"ballot_id": bid, "position": pos, "label": label}
+                for bid, spec in zip(ids, ordered)
+                for pos, label in enumerate(spec["options"])
+            ]
+            if option_rows:
+                conn.execute(insert(_OPTIONS), option_rows)
+
+        infos = [
+            BallotInfo(
+                id=bid,
+                title=spec["title"],
+                options=tuple(spec["options"]),
+                **{k: v for k, v in row(spec).items() if k != "title"},
+            )
+            for bid, spec in zip(ids, ordered)
+        ]
+        with self._lock:
+            for info in infos:
+                self._by_id[info.id] = info
+                self._missing.pop(info.id, None)
+            self.version += 1
+        return infos
+
+
+__all__ = ["BallotCatalog", "BallotInfo", "DEMO_BALLOTS", "STATUSES", "utc_naive", "utc_now"]
@@ -0,0 +1,188 @@
+"""
+Compact "has this voter voted on this ballot?" index.
+
+Instead of keeping ``(email, ballot_id)`` tuples in a dict (hundreds of bytes
+per entry), each pair is reduced to a 64-bit keyed BLAKE2b fingerprint stored
+in a flat ``array('Q')`` hash table with linear probing – 16-32 bytes per vote
+at the configured load factor.  An optional Bloom filter in front of the table
+answers most "never voted" lookups without probing.
+
+Fingerprints are only ever *possibly* equal for two different pairs, so a hit
+means "maybe voted": callers confirm hits against the durable ledger.  The key
+is random per process and the index is rebuilt from the ledger at startup.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import secrets
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+_EMPTY = 0
+_MIN_CAPACITY = 1024
+_MAX_LOAD = 0.5
+
+
+def _capacity_for(entries: int) -> int:
+    cap = _MIN_CAPACITY
+    while entries > cap * _MAX_LOAD:
+        cap *= 2
+    return cap
+
+
+@dataclass
+class _Table:
+    slots: array
+    mask: int
+    bloom: Optional[bytearray]
+    bloom_m: int
+    bloom_k: int
+
+
+class VoterIndex:
+    """Open-addressing set of 64-bit ``(voter, ballot_id)`` fingerprints."""
+
+    def __init__(
+        self,
+        *,
+        expected: int = 0,
+        bloom_bits_per_entry: int = 0,
+        key: Optional[bytes] = None,
+    ) -> None:
+        self._key = key or secrets.token_bytes(16)
+        self._bloom_bits_per_entry = max(0, bloom_bits_per_entry)
+        self._size = 0
+        self._table = self._new_table(_capacity_for(expected))
+
+    # ---------------- Hashing ----------------
+    def fingerprint(self, voter: str, ballot_id: int) -> int:
+        digest = hashlib.blake2b(
+            f"{voter}\x00{ballot_id}".encode("utf-8"), key=self._key, digest_size=8
+        ).digest()
+        fp = int.from_bytes(digest, "little")
+        return fp or 1  # 0 marks an empty slot
+
+    # ---------------- Storage ----------------
+    def _new_table(self, capacity: int) -> _Table:
+        bloom_m = 0
+        if self._bloom_bits_per_entry:
+            bloom_m = max(64, int(capacity * _MAX_LOAD) * self._bloom_bits_per_entry)
+            bloom_m = (bloom_m + 7) // 8 * 8
+        return _Table(
+            slots=array("Q", bytes(8 * capacity)),
+            mask=capacity - 1,
+            bloom=bytearray(bloom_m // 8) if bloom_m else None,
+            bloom_m=bloom_m,
+            bloom_k=max(1, round(self._bloom_bits_per_entry * math.log(2))) if bloom_m else 0,
+        )
+
+    @staticmethod
+    def _bloom_positions(t: "_Table", fp: int) -> Iterable[int]:
+        h1 = fp & 0xFFFFFFFF
+        h2 = (fp >> 32) | 1
+        m = t.bloom_m
+        return ((h1 + i * h2) % m for i in range(t.bloom_k))
+
+    def _bloom_add(self, t: "_Table", fp: int) -> None:
+        bloom = t.bloom
+        if bloom is None:
+            return
+        for pos in self._bloom_positions(t, fp):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+
+    def _bloom_may_contain(self, t: "_Table", fp: int) -> bool:
+        bloom = t.bloom
+        if bloom is None:
+            return True
+        for pos in self._bloom_positions(t, fp):
+            if not bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    @staticmethod
+    def _probe(t: "_Table", fp: int) -> Tuple[bool, int]:
+        slots = t.slots
+        mask = t.mask
+        i = fp & mask
+        while True:
+            slot = slots[i]
+            if slot == fp:
+                return True, i
+            if slot == _EMPTY:
+                return False, i
+            i = (i + 1) & mask
+
+    def _insert_fp(self, t: "_Table", fp: int) -> bool:
+        found, i = self._probe(t, fp)
+        if found:
+            return False
+        t.slots[i] = fp
+        self._bloom_add(t, fp)
+        return True
+
+    def _grow(self) -> None:
+        old = self._table
+        new = self._new_table((old.mask + 1) * 2)
+        for fp in old.slots:
+            if fp != _EMPTY:
+                self._insert_fp(new, fp)
+        # Readers on other threads grab ``self._table`` once per lookup, so
+        # the resized table is published with a single assignment.
+        self._table = new
+
+    # ---------------- Public API ----------------
+    def add(self, voter: str, ballot_id: int) -> bool:
+        """Record a vote; returns ``False`` if the fingerprint was already present."""
+        if (self._size + 1) > (self._table.mask + 1) * _MAX_LOAD:
+            self._grow()
+        added = self._insert_fp(self._table, self.fingerprint(voter, ballot_id))
+        if added:
+            self._size += 1
+        return added
+
+    def might_contain(self, voter: str, ballot_id: int) -> bool:
+        """``False`` means definitely not voted; ``True`` must be confirmed by the ledger."""
+        t = self._table
+        fp = self.fingerprint(voter, ballot_id)
+        if not self._bloom_may_contain(t, fp):
+            return False
+        return self._probe(t, fp)[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the fingerprint table and Bloom filter."""
+        t = self._table
+        total = len(t.slots) * t.slots.itemsize
+        if t.bloom is not None:
+            total += len(t.bloom)
+        return total
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": self._size,
+            "capacity": self._table.mask + 1,
+            "bloom_bits": self._table.bloom_m,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+    @classmethod
+    def rebuild(
+        cls,
+        pairs: Iterable[Tuple[str, int]],
+        *,
+        expected: int = 0,
+        bloom_bits_per_entry: int = 0,
+    ) -> "VoterIndex":
+        """Build an index from stored ``(voter, ballot_id)`` pairs, e.g. the ledger at startup."""
+        index = cls(expected=expected, bloom_bits_per_entry=bloom_bits_per_entry)
+        for voter, ballot_id in pairs:
+            index.add(voter, ballot_id)
+        return index
+
+
+__all__ = ["VoterIndex"]
@@ -0,0 +1,246 @@
+"""
+Asynchronous write-behind vote ingestion.
+
+``VoteIngestor.submit`` admits a vote into a bounded asyncio queue, applies it
+to the in-memory tally straight away and lets a single flush task persist
+queued votes to the ledger in batches (whichever comes first of
+``batch_size`` votes or ``flush_interval`` seconds).  This is the ledger's
+group commit: concurrent voters share one transaction, and one fsync, per
+batch (``INGEST_BATCH_SIZE``, ``INGEST_FLUSH_INTERVAL_MS``).
+
+Two durability policies are supported per call:
+
+* ``"flush"``   – the caller is acknowledged only after its batch committed.
+* ``"enqueue"`` – the caller is acknowledged as soon as the vote is queued;
+  a crash before the next flush loses it.
+
+When the queue is full ``submit`` fails fast with :class:`IngestQueueFull`
+instead of letting requests pile up behind the database.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Set, Tuple
+
+from app.voting.dedup import VoterIndex
+from app.voting.ledger import VoteLedger, VoteTuple
+from app.voting.tally import TallyEngine
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_FLUSH = "flush"
+DURABILITY_ENQUEUE = "enqueue"
+
+
+class DuplicateVote(Exception):
+    """The voter already has a (queued or stored) vote on this ballot."""
+
+
+class IngestQueueFull(Exception):
+    """The ingestion queue is at capacity; the caller should retry later."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__("vote ingestion queue is full")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _QueuedVote:
+    vote: VoteTuple
+    future: Optional[asyncio.Future] = None  # set only for ack-after-flush
+
+
+class VoteIngestor:
+    """Bounded write-behind queue between the vote route and the ledger."""
+
+    def __init__(
+        self,
+        ledger: VoteLedger,
+        engine: TallyEngine,
+        *,
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 0.01,
+        retry_after: int = 1,
+        index: Optional[VoterIndex] = None,
+    ) -> None:
+        self.ledger = ledger
+        self.index = index
+        self._tally = engine
+        self._max_queue = max(1, max_queue)
+        self._batch_size = max(1, batch_size)
+        self._interval = max(0.0, flush_interval)
+        self._retry_after = retry_after
+        self._inflight: Set[Tuple[str, int]] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Counters for monitoring.
+        self.accepted = 0
+        self.rejected_full = 0
+        self.flushed_batches = 0
+        self.flush_failures = 0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def is_pending(self, voter: str, ballot_id: int) -> bool:
+        return (voter, ballot_id) in self._inflight
+
+    def has_voted(self, voter: str, ballot_id: int) -> bool:
+        """Blocking check across queued votes, the index and (on an index hit) the ledger."""
+        if (voter, ballot_id) in self._inflight:
+            return True
+        if self.index is not None and not self.index.might_contain(voter, ballot_id):
+            return False
+        return self.ledger.has_voted(voter, ballot_id)
+
+    async def _stored_vote_exists(self, voter: str, ballot_id: int) -> bool:
+        # The index rules out most first-time voters without touching the
+        # database; a hit may be a fingerprint collision, so confirm it.
+        if self.index is not None and not self.index.might_contain(voter, ballot_id):
+            return False
+        return await asyncio.to_thread(self.ledger.has_voted, voter, ballot_id)
+
+    def mark_stored(self, voter: str, ballot_id: int) -> None:
+        """Add a queued or stored vote to the duplicate index."""
+        if self.index is not None:
+            self.index.add(voter, ballot_id)
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        if queue is None or self._loop is not loop or self._task is None or self._task.done():
+            queue = asyncio.Queue(maxsize=self._max_queue)
+            self._loop, self._queue = loop, queue
+            self._task = loop.create_task(self._flush_loop(queue))
+        return queue
+
+    async def submit(
+        self,
+        voter: str,
+        ballot_id: int,
+        option_index: int,
+        *,
+        durability: str = DURABILITY_FLUSH,
+    ) -> int:
+        """
+        Admit one vote and return the ballot's new running total.
+
+        Raises :class:`DuplicateVote` or :class:`IngestQueueFull`.
+        """
+        queue = self._ensure_started()
+        key = (voter, ballot_id)
+        if key in self._inflight:
+            raise DuplicateVote()
+        if queue.full():
+            self.rejected_full += 1
+            raise IngestQueueFull(self._retry_after)
+
+        # Claim the key before awaiting so a concurrent request for the same
+        # voter/ballot sees it as in flight.
+        self._inflight.add(key)
+        try:
+            voted = await self._stored_vote_exists(voter, ballot_id)
+        except BaseException:
+            self._inflight.discard(key)
+            raise
+        if voted:
+            self._inflight.discard(key)
+            raise DuplicateVote()
+
+        item = _QueuedVote(vote=(voter, ballot_id, option_index))
+        if durability == DURABILITY_FLUSH:
+            item.future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._inflight.discard(key)
+            self.rejected_full += 1
+            raise IngestQueueFull(self._retry_after) from None
+
+        # A vote that later fails to flush leaves a stale fingerprint behind;
+        # that only costs a ledger lookup on the voter's retry.
+        self.mark_stored(voter, ballot_id)
+        new_total = self._tally.increment(ballot_id, option_index)
+        self.accepted += 1
+        if item.future is not None:
+            await item.future
+        return new_total
+
+    async def _flush_loop(self, queue: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[_QueuedVote] = [await queue.get()]
+            deadline = loop.time() + self._interval
+            while len(batch) < self._batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _flush(self, batch: List[_QueuedVote]) -> None:
+        votes = [item.vote for item in batch]
+        try:
+            results = await asyncio.to_thread(self.ledger.write_batch, votes)
+        except Exception as exc:
+            self.flush_failures += 1
+            logger.error("Vote flush of %d votes failed: %s", len(batch), exc)
+            for item in batch:
+                self._settle(item, stored=False, error=exc)
+            return
+        self.flushed_batches += 1
+        for item, stored in zip(batch, results):
+            self._settle(item, stored=stored, error=None if stored else DuplicateVote())
+
+    def _settle(self, item: _QueuedVote, *, stored: bool, error: Optional[BaseException]) -> None:
+        voter, ballot_id, option_index = item.vote
+        self._inflight.discard((voter, ballot_id))
+        if not stored:
+            # Undo the optimistic tally update for votes that did not land.
+            self._tally.increment(ballot_id, option_index, -1)
+        if item.future is None or item.future.done():
+            return
+        if error is not None:
+            item.future.set_exception(error)
+        else:
+            item.future.set_result(None)
+
+    async def drain(self) -> None:
+        """Wait until every queued vote has been flushed."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def close(self) -> None:
+        await self.drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._task = None
+
+
+__all__ = [
+    "DURABILITY_ENQUEUE",
+    "DURABILITY_FLUSH",
+    "DuplicateVote",
+    "IngestQueueFull",
+    "VoteIngestor",
+]
@@ -0,0 +1,131 @@
+"""
+Durable, append-only vote ledger.
+
+Every accepted vote is one row in ``vote_ledger``; the unique constraint on
+``(voter, ballot_id)`` is what prevents double voting.  Writes are batches
+(:meth:`VoteLedger.write_batch`, one transaction and therefore one fsync
+each).  The group commit itself is :class:`app.voting.ingest.VoteIngestor`:
+votes arriving within its flush interval share one batch, so durability
+does not cap throughput at one disk flush per vote.
+"""
+
+from __future__ import annotations
+
+import time
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+
+from app.db import engine as default_engine
+from app.db_models import VoteRecord
+
+# (voter, ballot_id, option_index)
+VoteTuple = Tuple[str, int, int]
+
+_TABLE = VoteRecord.__table__
+
+
+def normalize_voter(email: Optional[str]) -> str:
+    return (email or "").strip().lower()
+
+
+class VoteLedger:
+    """Append-only vote storage written in batches; the table comes from :func:`app.db.init_db`."""
+
+    def __init__(self, engine: Engine) -> None:
+        self._engine = engine
+        # Observability: number of transactions and rows written so far.
+        self.commits = 0
+        self.committed_votes = 0
+
+    @property
+    def engine(self) -> Engine:
+        return self._engine
+
+    # ---------------- Writes ----------------
+    def _insert_stmt(self):
+        if self._engine.dialect.name == "postgresql":
+            base = pg_insert(_TABLE)
+        else:
+            base = sqlite_insert(_TABLE)
+        return base.on_conflict_do_nothing(index_elements=["voter", "ballot_id"])
+
+    def write_batch(self, votes: Sequence[VoteTuple]) -> List[bool]:
+        """
+        Insert ``votes`` in a single transaction.
+
+        Returns one flag per vote: ``True`` if it was stored, ``False`` if the
+        voter already had a vote on that ballot (including earlier in the
+        same batch).
+        """
+        if not votes:
+            return []
+        stmt = self._insert_stmt()
+        now = time.time()
+        results: List[bool] = []
+        with self._engine.begin() as conn:
+            for voter, ballot_id, option_index in votes:
+                res = conn.execute(
+                    stmt,
+                    {
+                        "voter": voter,
+                        "ballot_id": ballot_id,
+                        "option_index": option_index,
+                        "cast_at": now,
+                    },
+                )
+                results.append(res.rowcount == 1)
+        self.commits += 1
+        self.committed_votes += sum(results)
+        return results
+
+    # ---------------- Reads ----------------
+    def has_voted(self, voter: str, ballot_id: int) -> bool:
+        stmt = (
+            select(_TABLE.c.id)
+            .where(_TABLE.c.voter == voter, _TABLE.c.ballot_id == ballot_id)
+            .limit(1)
+        )
+        with self._engine.connect() as conn:
+            return conn.execute(stmt).first() is not None
+
+    def counts(self, ballot_id: Optional[int] = None) -> Dict[int, Dict[int, int]]:
+        """Return ``{ballot_id: {option_index: votes}}`` aggregated from the ledger."""
+        stmt = select(
+            _TABLE.c.ballot_id, _TABLE.c.option_index, func.count()
+        ).group_by(_TABLE.c.ballot_id, _TABLE.c.option_index)
+        if ballot_id is not None:
+            stmt = stmt.where(_TABLE.c.ballot_id == ballot_id)
+        out: Dict[int, Dict[int, int]] = {}
+        with self._engine.connect() as conn:
+            for ballot_id, option_index, n in conn.execute(stmt):
+                out.setdefault(ballot_id, {})[option_index] = int(n)
+        return out
+
+    def vote_count(self) -> int:
+        with self._engine.connect() as conn:
+            return int(conn.execute(select(func.count()).select_from(_TABLE)).scalar_one())
+
+    def iter_keys(self, chunk_size: int = 50_000) -> Iterator[Tuple[str, int]]:
+        """Stream every stored ``(voter, ballot_id)`` pair without loading the table at once."""
+        stmt = select(_TABLE.c.voter, _TABLE.c.ballot_id)
+        with self._engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(stmt)
+            while True:
+                rows = result.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for voter, ballot_id in rows:
+                    yield voter, ballot_id
+
+
+@lru_cache(maxsize=1)
+def get_ledger() -> VoteLedger:
+    return VoteLedger(default_engine)
+
+
+__all__ = ["VoteLedger", "VoteTuple", "get_ledger", "normalize_voter"]
@@ -0,0 +1,202 @@
+"""
+Full recount of the vote ledger for audits.
+
+Ledger rows are streamed in large chunks straight into NumPy arrays; each
+chunk is reduced with ``bincount`` into per-(ballot, option) totals and a
+time-bucketed histogram, so memory stays bounded by the chunk size and the
+per-row work happens in C rather than in a Python loop.  The result can be
+compared against the live tally counters to surface drift.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from app.db_models import VoteRecord
+
+_TABLE = VoteRecord.__table__
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+DEFAULT_BUCKET_SECONDS = 60
+
+
+@dataclass
+class Drift:
+    ballot_id: int
+    option_index: int
+    ledger: int
+    live: int
+
+    @property
+    def delta(self) -> int:
+        return self.live - self.ledger
+
+
+@dataclass
+class RecountReport:
+    rows: int
+    chunks: int
+    elapsed_seconds: float
+    bucket_seconds: int
+    totals: Dict[int, List[int]]
+    # Start of each non-empty bucket (epoch seconds) -> votes cast in it.
+    histogram: Dict[int, int]
+    drift: List[Drift] = field(default_factory=list)
+    compared: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "elapsedSeconds": round(self.elapsed_seconds, 3),
+            "bucketSeconds": self.bucket_seconds,
+            "totals": [
+                {"id": bid, "votes": votes, "totalVotes": sum(votes)}
+                for bid, votes in sorted(self.totals.items())
+            ],
+            "histogram": [{"start": start, "votes": n} for start, n in sorted(self.histogram.items())],
+            "compared": self.compared,
+            "drift": [
+                {
+                    "ballotId": d.ballot_id,
+                    "optionIndex": d.option_index,
+                    "ledger": d.ledger,
+                    "live": d.live,
+                    "delta": d.delta,
+                }
+                for d in self.drift
+            ],
+        }
+
+
+def iter_chunks(engine: Engine, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Yield ``(n, 3)`` float64 arrays of ``(ballot_id, option_index, cast_at)``."""
+    stmt = select(_TABLE.c.ballot_id, _TABLE.c.option_index, _TABLE.c.cast_at)
+    sql = str(stmt.compile(dialect=engine.dialect))
+    # Plain DB-API tuples convert to an ndarray ~50x faster than Row objects.
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield np.array(rows, dtype=np.float64)
+        cursor.close()
+    finally:
+        raw.close()
+
+
+class _Recount:
+    """Accumulates chunk reductions into running totals."""
+
+    def __init__(self, bucket_seconds: int) -> None:
+        self.bucket_seconds = bucket_seconds
+        self.totals: Dict[int, np.ndarray] = {}
+        self.histogram: Dict[int, int] = {}
+        self.rows = 0
+        self.chunks = 0
+
+    def add(self, chunk: np.ndarray) -> None:
+        if not len(chunk):
+            return
+        self.rows += len(chunk)
+        self.chunks += 1
+        ballots = chunk[:, 0].astype(np.int64)
+        options = chunk[:, 1].astype(np.int64)
+
+        # Ballot ids can be sparse; compress them before the 2-D bincount.
+        ids, inverse = np.unique(ballots, return_inverse=True)
+        width = int(options.max()) + 1
+        grid = np.bincount(inverse * width + options, minlength=len(ids) * width).reshape(len(ids), width)
+        for bid, row in zip(ids.tolist(), grid):
+            current = self.totals.get(bid)
+            if current is None:
+                self.totals[bid] = row.copy()
+            elif len(current) >= width:
+                current[:width] += row
+            else:
+                row = row.copy()
+                row[: len(current)] += current
+                self.totals[bid] = row
+
+        buckets = np.floor_divide(chunk[:, 2], self.bucket_seconds).astype(np.int64)
+        first = int(buckets.min())
+        hist = np.bincount(buckets - first)
+        for offset in np.flatnonzero(hist).tolist():
+            start = (first + offset) * self.bucket_seconds
+            self.histogram[start] = self.histogram.get(start, 0) + int(hist[offset])
+
+
+def compare(
+    totals: Mapping[int, Sequence[int]],
+    live: Mapping[int, Sequence[int]],
+) -> List[Drift]:
+    """Every (ballot, option) whose live counter differs from the recount."""
+    drift: List[Drift] = []
+    for bid in sorted(set(totals) | set(live)):
+        counted = list(totals.get(bid, []))
+        current = list(live.get(bid, []))
+        for option in range(max(len(counted), len(current))):
+            ledger_n = counted[option] if option < len(counted) else 0
+            live_n = current[option] if option < len(current) else 0
+            if ledger_n != live_n:
+                drift.append(Drift(bid, option, ledger_n, live_n))
+    return drift
+
+
+def recount(
+    engine: Engine,
+    *,
+    live: Optional[Mapping[int, Sequence[int]]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    bucket_seconds: int = DEFAULT_BUCKET_SECONDS,
+) -> RecountReport:
+    """
+    Recount every ledger row.  When ``live`` (``{ballot_id: per-option counts}``)
+    is given, the report lists each counter that disagrees with the ledger.
+    """
+    if chunk_size < 1 or bucket_seconds < 1:
+        raise ValueError("chunk_size and bucket_seconds must be positive")
+    started = time.perf_counter()
+    acc = _Recount(bucket_seconds)
+    for chunk in iter_chunks(engine, chunk_size):
+        acc.add(chunk)
+    totals = {bid: row.tolist() for bid, row in acc.totals.items()}
+    report = RecountReport(
+        rows=acc.rows,
+        chunks=acc.chunks,
+        elapsed_seconds=0.0,
+        bucket_seconds=bucket_seconds,
+        totals=totals,
+        histogram=acc.histogram,
+    )
+    if live is not None:
+        report.drift = compare(totals, live)
+        report.compared = True
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+def live_counts(snapshot: Mapping[int, Tuple[List[int], int]]) -> Dict[int, List[int]]:
+    """Adapt ``TallyEngine.snapshot()`` to the ``live`` argument of :func:`recount`."""
+    return {bid: list(counts) for bid, (counts, _total) in snapshot.items()}
+
+
+__all__ = [
+    "DEFAULT_BUCKET_SECONDS",
+    "DEFAULT_CHUNK_SIZE",
+    "Drift",
+    "RecountReport",
+    "compare",
+    "iter_chunks",
+    "live_counts",
+    "recount",
+]
@@ -0,0 +1,129 @@
+"""
+Server-Sent Events fan-out for live tallies.
+
+A single :class:`TallyBroadcaster` task per worker wakes every ``interval``
+seconds, asks the tally engine what changed since its last tick and, if
+anything did, encodes *one* ``delta`` frame that is handed to every connected
+dashboard.  Encoding cost is therefore per tick, not per subscriber.
+
+New subscribers first receive a ``snapshot`` frame (cached per tally version,
+so a burst of connections encodes it once).  A subscriber that falls too far
+behind has its backlog replaced by a fresh snapshot instead of buffering
+without bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from app.voting.tally import TallyEngine
+
+# Builds the full tally rows (same shape as GET /ballots/tally) from a snapshot.
+RowsBuilder = Callable[[Dict[int, Tuple[List[int], int]]], List[Dict[str, Any]]]
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+
+def encode_event(event: str, version: int, data: Any) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"))
+    return f"event: {event}\nid: {version}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class TallyBroadcaster:
+    """Shared ticker that pushes coalesced tally deltas to SSE subscribers."""
+
+    def __init__(
+        self,
+        engine: TallyEngine,
+        rows: RowsBuilder,
+        *,
+        interval: float = 0.5,
+        subscriber_backlog: int = 16,
+        refresh: Optional[Callable[[], object]] = None,
+    ) -> None:
+        self._engine = engine
+        self._rows = rows
+        # Optional blocking hook run before each tick (e.g. pulling shared counters).
+        self._refresh = refresh
+        self._interval = max(0.01, interval)
+        self._backlog = max(1, subscriber_backlog)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_version = 0
+        self._snapshot_frame: Optional[Tuple[int, bytes]] = None
+        # Monitoring counters.
+        self.frames_encoded = 0
+        self.resyncs = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def snapshot_frame(self) -> bytes:
+        version = self._engine.version
+        cached = self._snapshot_frame
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        snapshot = self._engine.snapshot()
+        frame = encode_event("snapshot", version, {"version": version, "ballots": self._rows(snapshot)})
+        self.frames_encoded += 1
+        self._snapshot_frame = (version, frame)
+        return frame
+
+    def subscribe(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New event loop (e.g. a fresh test client): old subscribers are gone.
+            self._subscribers.clear()
+            self._task = None
+            self._loop = loop
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._backlog)
+        if not self._subscribers:
+            self._last_version = self._engine.version
+        queue.put_nowait(self.snapshot_frame())
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, frame: bytes) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and resynchronise.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot_frame())
+                self.resyncs += 1
+
+    def tick(self) -> bool:
+        """Publish one delta frame if the tally changed; returns whether it did."""
+        version, changed = self._engine.changed_since(self._last_version)
+        if not changed:
+            return False
+        self._last_version = version
+        delta = [
+            {"id": bid, "votes": counts, "totalVotes": total}
+            for bid, (counts, total) in sorted(changed.items())
+        ]
+        frame = encode_event("delta", version, {"version": version, "ballots": delta})
+        self.frames_encoded += 1
+        self._publish(frame)
+        return True
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            await asyncio.sleep(self._interval)
+            if self._refresh is not None:
+                await asyncio.to_thread(self._refresh)
+            self.tick()
+
+
+__all__ = ["KEEPALIVE_FRAME", "TallyBroadcaster", "encode_event"]
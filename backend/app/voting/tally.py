@@ -0,0 +1,187 @@
+"""
+Thread-safe vote counters with running totals.
+
+Counts live in per-ballot lists guarded by a fixed set of striped locks, so
+votes on different ballots rarely contend while votes on the same ballot are
+serialised.  Each ballot keeps its running total next to its counts, making
+every read O(1) instead of re-summing the options on each request.
+
+Every change bumps a global version and records it against the ballot, so
+readers can cheaply ask "what changed since version N?".
+
+With several worker processes, :class:`TallyReplica` mirrors each increment
+into the shared state backend and periodically pulls the global counters
+back, so every worker converges on the same totals.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.state import StateBackend
+
+DEFAULT_STRIPES = 16
+
+
+class TallyEngine:
+    """Per-ballot vote counters with striped locking."""
+
+    def __init__(self, stripes: int = DEFAULT_STRIPES) -> None:
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+        self._counts: Dict[int, List[int]] = {}
+        self._totals: Dict[int, int] = {}
+        self._versions: Dict[int, int] = {}
+        self._version = 0
+        self._version_lock = threading.Lock()
+        # Called with (ballot_id, option_index, amount) after each increment.
+        self.mirror: Optional[Callable[[int, int, int], None]] = None
+
+    def _lock_for(self, ballot_id: int) -> threading.Lock:
+        return self._locks[hash(ballot_id) % len(self._locks)]
+
+    def _bump(self, ballot_id: int) -> None:
+        # Caller holds the ballot's stripe lock.
+        with self._version_lock:
+            self._version += 1
+            self._versions[ballot_id] = self._version
+
+    @contextmanager
+    def _all_stripes(self) -> Iterator[None]:
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def ballot_version(self, ballot_id: int) -> int:
+        return self._versions.get(ballot_id, 0)
+
+    def load(self, ballot_id: int, counts: List[int]) -> None:
+        """Replace the counts of ``ballot_id`` (registering it if needed)."""
+        with self._lock_for(ballot_id):
+            self._counts[ballot_id] = list(counts)
+            self._totals[ballot_id] = sum(counts)
+            self._bump(ballot_id)
+
+    def increment(self, ballot_id: int, option_index: int, amount: int = 1) -> int:
+        """Add ``amount`` votes to one option and return the ballot's new total."""
+        with self._lock_for(ballot_id):
+            counts = self._counts[ballot_id]
+            counts[option_index] += amount
+            total = self._totals[ballot_id] + amount
+            self._totals[ballot_id] = total
+            self._bump(ballot_id)
+        if self.mirror is not None:
+            self.mirror(ballot_id, option_index, amount)
+        return total
+
+    def total(self, ballot_id: int) -> int:
+        return self._totals.get(ballot_id, 0)
+
+    def counts(self, ballot_id: int) -> Tuple[List[int], int]:
+        """Return a copy of ``(counts, total)`` for one ballot, read atomically."""
+        with self._lock_for(ballot_id):
+            return list(self._counts.get(ballot_id, [])), self._totals.get(ballot_id, 0)
+
+    def snapshot(self) -> Dict[int, Tuple[List[int], int]]:
+        """
+        Return ``{ballot_id: (counts, total)}`` for every ballot as of a single
+        instant: all stripes are held while copying, so no vote is half-applied.
+        """
+        with self._all_stripes():
+            return {bid: (list(c), self._totals[bid]) for bid, c in self._counts.items()}
+
+    def changed_since(self, version: int) -> Tuple[int, Dict[int, Tuple[List[int], int]]]:
+        """Return the current version and the ballots modified after ``version``."""
+        with self._all_stripes():
+            changed = {
+                bid: (list(self._counts[bid]), self._totals[bid])
+                for bid, v in self._versions.items()
+                if v > version
+            }
+            return self._version, changed
+
+
+class TallyReplica:
+    """Keeps a :class:`TallyEngine` in step with counters in a shared backend."""
+
+    def __init__(
+        self,
+        engine: TallyEngine,
+        backend: StateBackend,
+        *,
+        interval: float = 0.5,
+        prefix: str = "tally",
+    ) -> None:
+        self._engine = engine
+        self._backend = backend
+        self._interval = interval
+        self._prefix = prefix
+        self._pull_lock = threading.Lock()
+        self._last_pull = 0.0
+        self.pulls = 0
+
+    def _key(self, ballot_id: int, option_index: int) -> str:
+        return f"{self._prefix}:{ballot_id}:{option_index}"
+
+    def attach(self) -> None:
+        self._engine.mirror = self.record
+
+    def detach(self) -> None:
+        if self._engine.mirror == self.record:
+            self._engine.mirror = None
+
+    def seed(self, ballot_id: int, counts: List[int]) -> None:
+        """Publish counts rebuilt from the ledger unless a worker already did."""
+        for option_index, n in enumerate(counts):
+            self._backend.add(self._key(ballot_id, option_index), str(n))
+
+    def record(self, ballot_id: int, option_index: int, amount: int) -> None:
+        self._backend.incr(self._key(ballot_id, option_index), amount)
+
+    def pull(self, ballots: Iterable[Tuple[int, int]]) -> int:
+        """
+        Load the global counters for ``(ballot_id, option_count)`` pairs into
+        the engine; returns how many ballots changed.
+        """
+        ballots = list(ballots)
+        keys = [self._key(bid, opt) for bid, width in ballots for opt in range(width)]
+        values = iter(self._backend.get_many(keys))
+        changed = 0
+        for bid, width in ballots:
+            counts = [int(next(values) or 0) for _ in range(width)]
+            if counts != self._engine.counts(bid)[0]:
+                self._engine.load(bid, counts)
+                changed += 1
+        self.pulls += 1
+        return changed
+
+    def maybe_pull(self, ballots: Callable[[], Iterable[Tuple[int, int]]]) -> bool:
+        """Pull at most once per ``interval``; concurrent callers skip instead of waiting."""
+        if time.monotonic() - self._last_pull < self._interval:
+            return False
+        if not self._pull_lock.acquire(blocking=False):
+            return False
+        try:
+            if time.monotonic() - self._last_pull < self._interval:
+                return False
+            self.pull(ballots())
+            self._last_pull = time.monotonic()
+            return True
+        finally:
+            self._pull_lock.release()
+
+
+tally = TallyEngine()
+
+
+__all__ = ["TallyEngine", "TallyReplica", "tally"]
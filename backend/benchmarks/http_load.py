@@ -0,0 +1,301 @@
+"""
+HTTP load and latency benchmark for the API hot paths.
+
+Drives the ASGI app in-process through ``httpx.ASGITransport`` (default) or
+a running server (``--url http://127.0.0.1:8000``) and reports latency
+percentiles, throughput and the status/error mix per scenario:
+
+* ``login_storm``  - password logins by pre-created voters (Argon2 bound),
+* ``vote_cast``    - one vote per distinct voter on the demo ballot,
+* ``tally_poll``   - admins polling ``GET /ballots/tally``,
+* ``signup_burst`` - new accounts, i.e. one Argon2 hash each.
+
+In-process runs use a throwaway SQLite user table and vote ledger, and every
+request gets its own client address so the per-IP rate limits and login
+guards measure the handlers rather than rejecting the run.  Against a real
+server those limits apply and show up in the error mix.
+
+    python -m benchmarks.http_load --requests 500 --concurrency 32
+    python -m benchmarks.http_load --scenarios vote_cast,tally_poll --output before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+BENCH_PASSWORD = "Bench-Password-123"
+SCENARIOS = ("login_storm", "vote_cast", "tally_poll", "signup_burst")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def percentile(sorted_samples: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_samples:
+        return None
+    rank = min(len(sorted_samples) - 1, max(0, int(round(p * len(sorted_samples))) - 1))
+    return sorted_samples[rank]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    concurrency: int
+    elapsed_seconds: float
+    throughput_rps: float
+    latency_ms: Dict[str, Optional[float]]
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> int:
+        return sum(n for code, n in self.statuses.items() if code.startswith("2"))
+
+
+async def drive(
+    name: str,
+    call: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int,
+) -> ScenarioResult:
+    """Issue ``total`` requests with at most ``concurrency`` in flight."""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+    indices = iter(range(total))
+
+    async def worker() -> None:
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                response = await call(i)
+            except Exception as exc:  # transport errors count, they do not abort the run
+                errors[type(exc).__name__] += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[str(response.status_code)] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total)))))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return ScenarioResult(
+        name=name,
+        requests=total,
+        concurrency=concurrency,
+        elapsed_seconds=round(elapsed, 4),
+        throughput_rps=round(total / elapsed, 2) if elapsed else 0.0,
+        latency_ms={
+            "p50": _round(percentile(latencies, 0.50)),
+            "p95": _round(percentile(latencies, 0.95)),
+            "p99": _round(percentile(latencies, 0.99)),
+            "max": _round(latencies[-1] if latencies else None),
+        },
+        statuses=dict(sorted(statuses.items())),
+        errors=dict(errors),
+    )
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+class Target:
+    """Builds clients for either the in-process app or a remote server."""
+
+    def __init__(self, base_url: Optional[str]) -> None:
+        self.base_url = base_url or "http://bench"
+        self.remote = base_url is not None
+        self._shared: Optional[httpx.AsyncClient] = None
+
+    def client(self, i: int = 0) -> httpx.AsyncClient:
+        if self.remote:
+            if self._shared is None:
+                self._shared = httpx.AsyncClient(base_url=self.base_url, timeout=30)
+            return self._shared
+        from app.main import app
+
+        # A distinct address per request keeps the rate limiter and the login guards out of the way.
+        address = f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"
+        transport = httpx.ASGITransport(app=app, client=(address, 40000))
+        return httpx.AsyncClient(transport=transport, base_url=self.base_url, timeout=30)
+
+    async def request(self, i: int, method: str, path: str, **kwargs) -> httpx.Response:
+        client = self.client(i)
+        if self.remote:
+            return await client.request(method, path, **kwargs)
+        async with client:
+            return await client.request(method, path, **kwargs)
+
+    async def aclose(self) -> None:
+        if self._shared is not None:
+            await self._shared.aclose()
+
+
+@asynccontextmanager
+async def isolated_app(users: int) -> AsyncIterator[List[str]]:
+    """Point the app at a temporary user table and ledger; yield seeded voter emails."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db import get_db, init_db
+    from app.db_models import User as DBUser
+    from app.main import app
+    from app.routers.ballots import shutdown_ingestion
+    from app.security.hashing import shutdown_hashing
+    from app.security.passwords import hash_password_async
+    from app.voting.ledger import VoteLedger, get_ledger
+
+    with tempfile.TemporaryDirectory(prefix="evp-bench-") as tmp:
+        engine = create_engine(
+            f"sqlite:///{Path(tmp) / 'bench.db'}",
+            connect_args={"check_same_thread": False},
+        )
+        init_db(engine)
+        Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        ledger = VoteLedger(engine)
+
+        def bench_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        password_hash = await hash_password_async(BENCH_PASSWORD)
+        emails = [f"bench{i}@example.com" for i in range(users)]
+        with Session() as db:
+            db.add_all(
+                DBUser(username=f"bench{i}", email=email, password_hash=password_hash)
+                for i, email in enumerate(emails)
+            )
+            db.commit()
+
+        app.dependency_overrides[get_db] = bench_db
+        app.dependency_overrides[get_ledger] = lambda: ledger
+        try:
+            yield emails
+        finally:
+            await shutdown_ingestion()
+            app.dependency_overrides.pop(get_db, None)
+            app.dependency_overrides.pop(get_ledger, None)
+            engine.dispose()
+            shutdown_hashing()
+
+
+def scenario_calls(target: Target, emails: List[str], run_id: str) -> Dict[str, Callable[[int], Awaitable[httpx.Response]]]:
+    def login(i: int):
+        email = emails[i % len(emails)] if emails else f"bench{i}@example.com"
+        return target.request(i, "POST", "/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+
+    def vote(i: int):
+        headers = {"Authorization": f"Bearer voter:{run_id}-{i}@example.com"}
+        return target.request(i, "POST", "/ballots/1/vote", json={"option_index": i % 2}, headers=headers)
+
+    def poll(i: int):
+        return target.request(i, "GET", "/ballots/tally", headers={"Authorization": "Bearer admin-token"})
+
+    def signup(i: int):
+        body = {
+            "username": f"s{run_id[:8]}{i}",
+            "email": f"signup-{run_id}-{i}@example.com",
+            "password": BENCH_PASSWORD,
+        }
+        return target.request(i, "POST", "/auth/signup", json=body)
+
+    return {"login_storm": login, "vote_cast": vote, "tally_poll": poll, "signup_burst": signup}
+
+
+async def run(
+    scenarios: List[str],
+    requests: int,
+    concurrency: int,
+    base_url: Optional[str] = None,
+    users: int = 50,
+) -> Dict[str, object]:
+    target = Target(base_url)
+    run_id = uuid.uuid4().hex[:12]
+    results: List[ScenarioResult] = []
+
+    async def execute(emails: List[str]) -> None:
+        calls = scenario_calls(target, emails, run_id)
+        for name in scenarios:
+            results.append(await drive(name, calls[name], requests, concurrency))
+
+    try:
+        if target.remote:
+            await execute([])
+        else:
+            async with isolated_app(users) as emails:
+                await execute(emails)
+    finally:
+        await target.aclose()
+
+    return {
+        "meta": {
+            "runId": run_id,
+            "startedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": base_url or "in-process",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "scenarios": [asdict(r) for r in results],
+    }
+
+
+def _print(report: Dict[str, object]) -> None:
+    print(f"{'scenario':<14}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}  statuses / errors")
+    for r in report["scenarios"]:  # type: ignore[union-attr]
+        lat = r["latency_ms"]
+        mix = ", ".join(f"{k}:{v}" for k, v in {**r["statuses"], **r["errors"]}.items())
+        cells = "".join(f"{'-' if lat[p] is None else lat[p]:>9}" for p in ("p50", "p95", "p99"))
+        print(f"{r['name']:<14}{r['throughput_rps']:>9}{cells}  {mix}")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the API hot paths.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario (default: 200).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight (default: 16).")
+    parser.add_argument("--users", type=int, default=50, help="Voters seeded for login_storm (in-process only).")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of the in-process app.")
+    parser.add_argument("--output", type=Path, default=None, help="JSON results path (default: benchmarks/results/http-<time>.json).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    options = _parse_args(argv)
+    scenarios = [s.strip() for s in options.scenarios.split(",") if s.strip()]
+    unknown = sorted(set(scenarios) - set(SCENARIOS))
+    if unknown:
+        print(f"[ERR] Unknown scenario(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    report = asyncio.run(run(scenarios, options.requests, options.concurrency, options.url, options.users))
+    _print(report)
+    output = options.output or RESULTS_DIR / f"http-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"[OK] Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
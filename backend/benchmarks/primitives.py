@@ -0,0 +1,306 @@
+"""
+Micro-benchmarks for the security primitives that dominate CPU time.
+
+Each primitive is timed in isolation (repeated until ``--min-time`` elapses)
+and reported as ops/sec together with two memory figures:
+
+* ``py_peak_kib``  - peak Python allocations during one call (tracemalloc),
+* ``rss_peak_kib`` - process resident high-water mark after the benchmark;
+  Argon2 and bcrypt allocate in C, which only this figure sees.
+
+``hash_password``/``verify_password`` go through the hashing process pool,
+so they measure what a request pays; ``argon2_*_inline`` time the same
+parameters in this process for comparison.
+
+Results can be stored as a baseline and later runs compared against it;
+a primitive is flagged when its ops/sec drop, or its Python peak grows, by
+more than ``--threshold`` (default 25 %).
+
+    python -m benchmarks.primitives --save-baseline
+    python -m benchmarks.primitives --compare        # exit 1 on regression
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "primitives.json"
+DEFAULT_THRESHOLD = 0.25
+_PASSWORD = "Correct-Horse-Battery-9"
+_EMAIL = "bench-mfa@example.com"
+
+
+@dataclass
+class PrimitiveResult:
+    name: str
+    iterations: int
+    seconds: float
+    ops_per_sec: float
+    mean_ms: float
+    py_peak_kib: float
+    rss_peak_kib: int
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        return (self.current - self.baseline) / self.baseline if self.baseline else 0.0
+
+
+def _rss_peak_kib() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return int(peak / 1024) if sys.platform == "darwin" else int(peak)
+
+
+def measure(name: str, fn: Callable[[], object], *, min_time: float = 1.0, min_iterations: int = 3) -> PrimitiveResult:
+    """Time ``fn`` until ``min_time`` seconds and ``min_iterations`` calls have passed."""
+    fn()  # warm-up: imports, lazy pools, caches
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, py_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    iterations = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or iterations < min_iterations:
+        fn()
+        iterations += 1
+        elapsed = time.perf_counter() - started
+    return PrimitiveResult(
+        name=name,
+        iterations=iterations,
+        seconds=round(elapsed, 4),
+        ops_per_sec=round(iterations / elapsed, 3),
+        mean_ms=round(elapsed / iterations * 1000, 4),
+        py_peak_kib=round(py_peak / 1024, 1),
+        rss_peak_kib=_rss_peak_kib(),
+    )
+
+
+@contextmanager
+def _pepper(value: Optional[str]) -> Iterator[None]:
+    previous = os.environ.get("PASSWORD_PEPPER")
+    if value is None:
+        os.environ.pop("PASSWORD_PEPPER", None)
+    else:
+        os.environ["PASSWORD_PEPPER"] = value
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("PASSWORD_PEPPER", None)
+        else:
+            os.environ["PASSWORD_PEPPER"] = previous
+
+
+def _pii_cipher():
+    from cryptography.fernet import Fernet
+
+    from app.security import crypto
+
+    return crypto, Fernet(crypto.generate_key().encode("ascii"))
+
+
+Case = Tuple[str, Callable[[], Callable[[], object]], Optional[str]]
+
+
+def _enrolled_totp():
+    import pyotp
+
+    from app.security import mfa
+
+    return pyotp.TOTP(mfa.enroll(_EMAIL).secret)
+
+
+def build_cases() -> List[Case]:
+    """
+    ``(name, setup, pepper)`` for every primitive.  ``setup`` runs only when
+    the case is selected (some are expensive) and returns the timed callable;
+    ``pepper`` is set in the environment for both.
+    """
+    from passlib.hash import argon2
+
+    from app.routers.auth import create_access_token, verify_token
+    from app.security import mfa
+    from app.security.passwords import argon2_params, hash_password, verify_password
+
+    def inline_argon2():
+        t, m, p = argon2_params()
+        return argon2.using(type="ID", time_cost=t, memory_cost=m, parallelism=p)
+
+    def hash_inline():
+        hasher = inline_argon2()
+        return lambda: hasher.hash(_PASSWORD)
+
+    def verify_inline():
+        hasher = inline_argon2()
+        encoded = hasher.hash(_PASSWORD)
+        return lambda: hasher.verify(_PASSWORD, encoded)
+
+    def verify_pooled():
+        encoded = hash_password(_PASSWORD)
+        return lambda: verify_password(_PASSWORD, encoded)
+
+    def verify_jwt():
+        token = create_access_token({"sub": "voter@example.com", "role": "voter"})
+        return lambda: verify_token(token)
+
+    def totp():
+        code = _enrolled_totp()
+        return lambda: mfa.verify_totp(_EMAIL, code.now())
+
+    def backup_miss():
+        _enrolled_totp()
+        # The attacker-driven path; with lookup ids a miss costs no bcrypt at all.
+        return lambda: mfa.try_backup_code(_EMAIL, "ZZZZZZZZ")
+
+    def pii(decrypt: bool):
+        service, cipher = _pii_cipher()
+        ciphertext = service.encrypt_pii(cipher, "Jane Q. Voter, 42 Main St")
+        if decrypt:
+            return lambda: service.decrypt_pii(cipher, ciphertext)
+        return lambda: service.encrypt_pii(cipher, "Jane Q. Voter, 42 Main St")
+
+    cases: List[Case] = []
+    for label, pepper in (("", None), ("[pepper]", "bench-pepper-secret")):
+        cases.append((f"hash_password{label}", lambda: lambda: hash_password(_PASSWORD), pepper))
+        cases.append((f"verify_password{label}", verify_pooled, pepper))
+    cases += [
+        ("argon2_hash_inline", hash_inline, None),
+        ("argon2_verify_inline", verify_inline, None),
+        ("mfa.enroll", lambda: lambda: mfa.enroll("bench-enroll@example.com"), None),
+        ("mfa.try_backup_code[miss]", backup_miss, None),
+        ("mfa.verify_totp", totp, None),
+        ("jwt.create_access_token", lambda: lambda: create_access_token({"sub": "voter@example.com", "role": "voter"}), None),
+        ("jwt.verify_token", verify_jwt, None),
+        ("encrypt_pii", lambda: pii(False), None),
+        ("decrypt_pii", lambda: pii(True), None),
+    ]
+    return cases
+
+
+def run(only: Optional[List[str]] = None, min_time: float = 1.0) -> List[PrimitiveResult]:
+    results = []
+    for name, setup, pepper in build_cases():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        with _pepper(pepper):
+            results.append(measure(name, setup(), min_time=min_time))
+    return results
+
+
+def compare(
+    results: List[PrimitiveResult],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Regression]:
+    """Primitives slower (ops/sec) or hungrier (Python peak) than baseline beyond ``threshold``."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if not base:
+            continue
+        if result.ops_per_sec < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(Regression(result.name, "ops_per_sec", base["ops_per_sec"], result.ops_per_sec))
+        # Ignore sub-KiB noise in the allocation figure.
+        if result.py_peak_kib > max(base["py_peak_kib"] * (1 + threshold), base["py_peak_kib"] + 1):
+            regressions.append(Regression(result.name, "py_peak_kib", base["py_peak_kib"], result.py_peak_kib))
+    return regressions
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, float]]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return {r["name"]: r for r in data["results"]}
+
+
+def save_results(results: List[PrimitiveResult], path: Path) -> None:
+    from app.security.passwords import argon2_params
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "meta": {
+            "createdAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "argon2": list(argon2_params()),
+        },
+        "results": [asdict(r) for r in results],
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+def _print(results: List[PrimitiveResult]) -> None:
+    print(f"{'primitive':<28}{'ops/s':>12}{'mean ms':>11}{'py KiB':>9}{'rss KiB':>10}")
+    for r in results:
+        print(f"{r.name:<28}{r.ops_per_sec:>12}{r.mean_ms:>11}{r.py_peak_kib:>9}{r.rss_peak_kib:>10}")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the security primitives.")
+    parser.add_argument("--only", default="", help="Comma-separated name prefixes, e.g. 'jwt,mfa.verify'.")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per primitive (default: 1).")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON path.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline.")
+    parser.add_argument("--compare", action="store_true", help="Exit 1 if any primitive regressed.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed relative change.")
+    parser.add_argument("--output", type=Path, default=None, help="Also write this run's JSON here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from app.security.hashing import shutdown_hashing
+
+    options = _parse_args(argv)
+    only = [s.strip() for s in options.only.split(",") if s.strip()] or None
+    # Benchmark enrolments go to a throwaway database, not the app's.
+    os.environ.setdefault("MFA_DATABASE_URL", "sqlite://")
+    try:
+        results = run(only, options.min_time)
+    finally:
+        shutdown_hashing()
+    _print(results)
+
+    if options.output:
+        save_results(results, options.output)
+    if options.save_baseline:
+        save_results(results, options.baseline)
+        print(f"[OK] Baseline written to {options.baseline}")
+        return 0
+    if not options.baseline.exists():
+        if options.compare:
+            print(f"[WARN] No baseline at {options.baseline}; run with --save-baseline first")
+        return 0
+
+    regressions = compare(results, load_baseline(options.baseline), options.threshold)
+    for reg in regressions:
+        print(f"[REGRESSION] {reg.name}: {reg.metric} {reg.baseline} -> {reg.current} ({reg.change:+.0%})")
+    if not regressions:
+        print(f"[OK] No regressions beyond {options.threshold:.0%} against {options.baseline}")
+    return 1 if regressions and options.compare else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
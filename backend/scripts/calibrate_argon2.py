@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+if __package__ in (None, ""):
+    # Allow execution via ``python backend/scripts/calibrate_argon2.py``.
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.core.settings import get_settings
+from app.security.calibration import calibrate, save_profile
+
+
+def run(
+    target_ms: float,
+    max_memory_mb: int,
+    parallelism: Optional[int],
+    samples: int,
+    output: str,
+    dry_run: bool,
+    as_json: bool,
+) -> int:
+    profile = calibrate(
+        target_ms=target_ms,
+        max_memory_kib=max_memory_mb * 1024,
+        parallelism=parallelism,
+        samples=samples,
+    )
+    if as_json:
+        print(json.dumps(asdict(profile), indent=2))
+    else:
+        print(
+            f"[OK] time_cost={profile.time_cost} memory_cost={profile.memory_cost}KiB "
+            f"parallelism={profile.parallelism} verify={profile.verify_ms}ms (target {target_ms}ms)"
+        )
+    if profile.verify_ms > target_ms:
+        print(f"[WARN] Even the minimum memory cost exceeds {target_ms}ms on this host", file=sys.stderr)
+    if dry_run:
+        return 0
+    path = save_profile(profile, output)
+    if not as_json:
+        print(f"[OK] Profile written to {path}; restart the API to apply it")
+    return 0
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark Argon2id on this host and store tuned parameters."
+    )
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Verify latency target (default: 250).")
+    parser.add_argument("--max-memory-mb", type=int, default=64, help="Memory ceiling per hash (default: 64).")
+    parser.add_argument("--parallelism", type=int, default=None, help="Lanes (default: min(4, CPUs)).")
+    parser.add_argument("--samples", type=int, default=3, help="Timed verifies per candidate.")
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Profile path (default: ARGON2_PROFILE_PATH / settings.argon2_profile_path).",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only print the result.")
+    parser.add_argument("--json", action="store_true", help="Print the profile as JSON.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = _parse_args()
+    raise SystemExit(
+        run(
+            options.target_ms,
+            options.max_memory_mb,
+            options.parallelism,
+            options.samples,
+            options.output or get_settings().argon2_profile_path,
+            options.dry_run,
+            options.json,
+        )
+    )
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+if __package__ in (None, ""):
+    # Allow execution via ``python backend/scripts/import_voters.py``.
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+
+from app.core.settings import get_settings
+from app.db import init_db
+from app.security.passwords import argon2_params
+from app.security.roll_import import DEFAULT_BATCH_SIZE, ImportReport, import_roll, import_service
+
+
+def _progress(report: ImportReport) -> None:
+    print(
+        f"[..] {report.resumed_from + report.rows} rows: {report.inserted} inserted, "
+        f"{report.duplicates} duplicate, {report.rejected} rejected "
+        f"({report.rows_per_second:.0f} rows/s)",
+        file=sys.stderr,
+    )
+
+
+def run(
+    source: Path,
+    db_url: str,
+    fmt: Optional[str],
+    batch_size: int,
+    workers: int,
+    checkpoint: Optional[Path],
+    resume: bool,
+    rejects: Optional[Path],
+    tokens: Optional[Path],
+    as_json: bool,
+) -> int:
+    settings = get_settings()
+    engine = create_engine(db_url)
+    init_db(engine)
+    service = import_service(
+        argon2_params(),
+        workers=workers or os.cpu_count() or 1,
+        memory_budget_bytes=settings.hash_memory_budget_mb * 1024 * 1024,
+    )
+    try:
+        report = import_roll(
+            engine,
+            source,
+            fmt=fmt,
+            batch_size=batch_size,
+            service=service,
+            checkpoint=checkpoint,
+            resume=resume,
+            rejects=rejects,
+            tokens=tokens,
+            progress=None if as_json else _progress,
+        )
+    finally:
+        service.close()
+
+    if as_json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(
+            f"[OK] Imported {report.inserted} voter(s) from {report.rows} row(s) in {report.batches} batch(es) "
+            f"({report.elapsed_seconds:.2f}s, {report.rows_per_second:.0f} rows/s, "
+            f"{report.hash_seconds:.2f}s hashing on {service.concurrency} worker(s))"
+        )
+        if report.duplicates:
+            print(f"[INFO] {report.duplicates} duplicate username/email row(s) skipped")
+        if report.activation_tokens:
+            print(f"[INFO] {report.activation_tokens} activation token(s) written to {tokens}")
+        if report.rejected:
+            print(f"[WARN] {report.rejected} row(s) rejected" + (f"; see {rejects}" if rejects else ":"))
+            if not rejects:
+                for row, error in report.errors[:10]:
+                    print(f"- row {row}: {error}")
+    return 1 if report.rejected else 0
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Import a voter roll (CSV or NDJSON with username, email, password) into the users table."
+    )
+    parser.add_argument("source", type=Path, help="Roll file; .csv is read as CSV, anything else as NDJSON.")
+    parser.add_argument(
+        "--db",
+        default="sqlite:///./app.db",
+        help="SQLAlchemy database URL (default: sqlite:///./app.db).",
+    )
+    parser.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Override format detection.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Rows per transaction.")
+    parser.add_argument("--workers", type=int, default=0, help="Hashing processes (default: all CPUs).")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=None,
+        help="Progress file updated after every batch (default: <source>.checkpoint).",
+    )
+    parser.add_argument("--resume", action="store_true", help="Skip rows recorded in the checkpoint.")
+    parser.add_argument("--rejects", type=Path, default=None, help="Write rejected rows (NDJSON) here.")
+    parser.add_argument(
+        "--activation-tokens",
+        type=Path,
+        default=None,
+        help="Issue tokens for rows without a password and write them (CSV) here.",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = _parse_args()
+    raise SystemExit(
+        run(
+            options.source,
+            options.db,
+            options.format,
+            options.batch_size,
+            options.workers,
+            options.checkpoint or options.source.with_name(options.source.name + ".checkpoint"),
+            options.resume,
+            options.rejects,
+            options.activation_tokens,
+            options.json,
+        )
+    )
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+if __package__ in (None, ""):
+    # Allow execution via ``python backend/scripts/recount.py``.
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine
+
+from app.voting.recount import DEFAULT_BUCKET_SECONDS, DEFAULT_CHUNK_SIZE, recount
+
+
+def _load_live(path: Path) -> Dict[int, List[int]]:
+    """Read the JSON returned by ``GET /ballots/tally``."""
+    rows = json.loads(path.read_text(encoding="utf-8"))
+    return {int(row["id"]): [int(n) for n in row["votes"]] for row in rows}
+
+
+def run(
+    db_url: str,
+    live_path: Optional[Path],
+    chunk_size: int,
+    bucket_seconds: int,
+    as_json: bool,
+) -> int:
+    engine = create_engine(db_url)
+    live = _load_live(live_path) if live_path is not None else None
+    report = recount(engine, live=live, chunk_size=chunk_size, bucket_seconds=bucket_seconds)
+
+    if as_json:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(
+            f"[OK] Recounted {report.rows} votes in {report.chunks} chunk(s) "
+            f"({report.elapsed_seconds:.2f}s)"
+        )
+        for bid, votes in sorted(report.totals.items()):
+            print(f"- ballot {bid}: {votes} total={sum(votes)}")
+        print(f"[INFO] {len(report.histogram)} non-empty {bucket_seconds}s bucket(s)")
+        if report.compared:
+            if report.drift:
+                print(f"[WARN] {len(report.drift)} counter(s) differ from the live tally:")
+                for d in report.drift:
+                    print(
+                        f"- ballot {d.ballot_id} option {d.option_index}: "
+                        f"ledger={d.ledger} live={d.live} delta={d.delta:+d}"
+                    )
+            else:
+                print("[OK] Live tally matches the ledger")
+    return 1 if report.drift else 0
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Recount the vote ledger and optionally compare it with the live tally."
+    )
+    parser.add_argument(
+        "--db",
+        default="sqlite:///./app.db",
+        help="SQLAlchemy database URL of the ledger (default: sqlite:///./app.db).",
+    )
+    parser.add_argument(
+        "--live",
+        type=Path,
+        default=None,
+        help="JSON saved from GET /ballots/tally to check for drift.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--bucket-seconds", type=int, default=DEFAULT_BUCKET_SECONDS)
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    options = _parse_args()
+    raise SystemExit(
+        run(options.db, options.live, options.chunk_size, options.bucket_seconds, options.json)
+    )
@@ -0,0 +1,33 @@
+import os
+import threading
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def redis_url():
+    """URL of a fake Redis-protocol server on a local TCP port."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"redis://{host}:{port}/0"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def mfa_database(tmp_path_factory):
+    """Keep MFA enrolments made by the tests out of the tracked app.db."""
+    from app.core.settings import reload_settings
+    from app.db import init_db
+    from app.security.mfa_store import get_mfa_store
+
+    path = tmp_path_factory.mktemp("mfa") / "mfa.sqlite3"
+    os.environ["MFA_DATABASE_URL"] = f"sqlite:///{path}"
+    reload_settings()
+    get_mfa_store.cache_clear()
+    init_db(get_mfa_store().engine)
+    yield path
+    get_mfa_store.cache_clear()
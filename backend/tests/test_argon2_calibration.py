@@ -0,0 +1,104 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.settings import reload_settings
+from app.db import Base
+from app.db_models import User as DBUser
+from app.routers.auth import _authenticate_user
+from app.security import passwords
+from app.security.calibration import calibrate, load_profile, save_profile
+from app.security.hashing import HashingService, get_hashing_service
+from app.security.passwords import password_needs_rehash
+
+
+def _fake_measure(time_cost, memory_cost, parallelism, samples):
+    # 1 ms per MiB per pass.
+    return time_cost * memory_cost / 1024
+
+
+def test_calibrate_prefers_memory_then_adds_passes():
+    profile = calibrate(target_ms=100, max_memory_kib=64 * 1024, parallelism=2, measure=_fake_measure)
+    assert profile.params == (1, 64 * 1024, 2)
+
+    profile = calibrate(target_ms=200, max_memory_kib=64 * 1024, parallelism=2, measure=_fake_measure)
+    assert profile.params == (3, 64 * 1024, 2)
+
+    profile = calibrate(target_ms=20, max_memory_kib=64 * 1024, parallelism=2, measure=_fake_measure)
+    assert profile.params == (1, 16 * 1024, 2)
+
+    # Never below the memory floor, even if the target cannot be met.
+    profile = calibrate(target_ms=5, max_memory_kib=64 * 1024, parallelism=2, measure=_fake_measure)
+    assert profile.params == (1, 8 * 1024, 2) and profile.verify_ms > 5
+
+
+def test_profile_round_trip_feeds_settings(tmp_path: Path, monkeypatch):
+    path = str(tmp_path / "argon2.json")
+    profile = calibrate(target_ms=500, max_memory_kib=1024, parallelism=1, min_memory_kib=256, samples=1)
+    assert profile.memory_cost <= 1024
+    save_profile(profile, path)
+    assert load_profile(path) == profile
+
+    monkeypatch.setenv("ARGON2_PROFILE_PATH", path)
+    try:
+        settings = reload_settings()
+        assert (settings.argon2_time_cost, settings.argon2_memory_cost, settings.argon2_parallelism) == profile.params
+        monkeypatch.setenv("ARGON2_TIME_COST", "7")
+        assert reload_settings().argon2_time_cost == 7
+    finally:
+        monkeypatch.delenv("ARGON2_PROFILE_PATH")
+        monkeypatch.delenv("ARGON2_TIME_COST")
+        reload_settings()
+
+
+def test_reloaded_profile_reaches_hashing_and_rehash_check(tmp_path: Path, monkeypatch):
+    path = str(tmp_path / "argon2.json")
+    before = get_hashing_service().hash_sync("Password123!")
+    profile = calibrate(target_ms=1, max_memory_kib=64, parallelism=1, min_memory_kib=64, samples=1)
+    save_profile(profile, path)
+
+    monkeypatch.setenv("ARGON2_PROFILE_PATH", path)
+    try:
+        reload_settings()
+        assert get_hashing_service().params == profile.params
+        assert password_needs_rehash(before)
+        assert not password_needs_rehash(get_hashing_service().hash_sync("Password123!"))
+    finally:
+        monkeypatch.delenv("ARGON2_PROFILE_PATH")
+        reload_settings()
+    assert not password_needs_rehash(before)
+
+
+@pytest.fixture
+def db(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}")
+    Base.metadata.create_all(engine, tables=[DBUser.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_login_rehashes_outdated_hash(db, monkeypatch):
+    old = HashingService((1, 8, 1), workers=1)
+    current = HashingService((2, 16, 1), workers=1)
+    try:
+        db.add(DBUser(username="legacy", email="legacy@example.com", password_hash=old.hash_sync("Password123!")))
+        db.commit()
+        monkeypatch.setattr(passwords, "get_hashing_service", lambda: current)
+
+        stored = db.query(DBUser).one().password_hash
+        assert password_needs_rehash(stored)
+        assert _authenticate_user(db, "legacy@example.com", "wrong-password") is None
+        assert db.query(DBUser).one().password_hash == stored
+
+        assert _authenticate_user(db, "legacy@example.com", "Password123!") == ("legacy@example.com", False)
+        upgraded = db.query(DBUser).one().password_hash
+        assert upgraded != stored and "m=16,t=2" in upgraded
+        assert not password_needs_rehash(upgraded)
+        assert _authenticate_user(db, "legacy", "Password123!") is not None
+    finally:
+        old.close()
+        current.close()
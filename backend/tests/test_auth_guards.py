@@ -67,7 +67,7 @@ def test_three_failures_lock_for_30s(monkeypatch):
     _reset_limits()
 
     real_time = time.time
-    monkeypatch.setattr("app.security.attempts.time.time", lambda: real_time() + 31)
+    monkeypatch.setattr("app.security.login_guard.time.time", lambda: real_time() + 31)
 
     ok = client.post(
         "/auth/login",
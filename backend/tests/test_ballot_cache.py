@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.core.response_cache import ResponseCache, etag_matches
+from app.main import app
+from app.routers import ballots
+from app.voting.ledger import VoteLedger, get_ledger
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'cache.sqlite3'}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    led = VoteLedger(engine)
+    app.dependency_overrides[get_ledger] = lambda: led
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_ledger, None)
+
+
+def test_etag_and_304(client: TestClient):
+    first = client.get("/ballots")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    hits = ballots.ballot_cache.hits
+    again = client.get("/ballots", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    assert ballots.ballot_cache.hits == hits + 1
+
+    one = client.get("/ballots/1")
+    assert one.json()["id"] == 1
+    assert client.get("/ballots/1", headers={"If-None-Match": one.headers["ETag"]}).status_code == 304
+
+
+def test_vote_invalidates_cached_bodies(client: TestClient):
+    listing = client.get("/ballots")
+    ballot_two = client.get("/ballots/2")
+    ballot_one = client.get("/ballots/1")
+
+    res = client.post(
+        "/ballots/2/vote",
+        json={"option_index": 0},
+        headers={"Authorization": "Bearer voter:cache@example.com"},
+    )
+    assert res.status_code == 200
+
+    fresh = client.get("/ballots", headers={"If-None-Match": listing.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != listing.headers["ETag"]
+    assert fresh.json()[1]["totalVotes"] == ballot_two.json()["totalVotes"] + 1
+
+    changed = client.get("/ballots/2", headers={"If-None-Match": ballot_two.headers["ETag"]})
+    assert changed.status_code == 200
+    # Ballots without new votes keep validating.
+    unchanged = client.get("/ballots/1", headers={"If-None-Match": ballot_one.headers["ETag"]})
+    assert unchanged.status_code == 304
+
+
+def test_cache_is_bounded_and_versioned():
+    cache = ResponseCache(max_entries=2)
+    calls = []
+
+    def build(value):
+        calls.append(value)
+        return {"v": value}
+
+    body, etag = cache.get_or_build("a", 1, lambda: build(1))
+    assert body == b'{"v":1}'
+    assert cache.get_or_build("a", 1, lambda: build(99)) == (body, etag)
+    assert cache.get_or_build("a", 2, lambda: build(2))[0] == b'{"v":2}'
+    cache.get_or_build("b", 1, lambda: build(3))
+    cache.get_or_build("c", 1, lambda: build(4))
+    cache.get_or_build("a", 2, lambda: build(5))  # evicted, rebuilt
+    assert calls == [1, 2, 3, 4, 5]
+
+
+def test_etag_matching_rules():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.main import app
+from app.voting.catalog import BallotCatalog
+from app.voting.ledger import VoteLedger, get_ledger
+
+ADMIN = {"Authorization": "Bearer admin-token"}
+
+
+def _engine(path: Path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    return engine
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    led = VoteLedger(_engine(tmp_path / "catalog.sqlite3"))
+    app.dependency_overrides[get_ledger] = lambda: led
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_ledger, None)
+
+
+def test_bulk_load_and_keyset_pages(tmp_path: Path):
+    catalog = BallotCatalog(_engine(tmp_path / "c.sqlite3"))
+    specs = [
+        {"title": f"Contest {i}", "options": ["Yes", "No"], "jurisdiction": "north" if i % 2 else "south"}
+        for i in range(2500)
+    ]
+    infos = catalog.bulk_load(specs)
+    assert len(catalog) == 2500
+    assert [info.title for info in infos[:2]] == ["Contest 0", "Contest 1"]
+    assert infos[1].id == infos[0].id + 1
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = catalog.page(after=cursor, limit=400, jurisdiction="north")
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert len(seen) == 1250
+    assert all(info.jurisdiction == "north" and info.options == ("Yes", "No") for info in seen)
+    assert [info.id for info in seen] == sorted(info.id for info in seen)
+
+    # A fresh catalog on the same tables sees everything and does not re-seed.
+    reopened = BallotCatalog(catalog.engine)
+    assert len(reopened) == 2500
+    assert reopened.seed([{"title": "ignored", "options": ["x"]}]) is False
+
+
+def test_open_window_filter(tmp_path: Path):
+    catalog = BallotCatalog(_engine(tmp_path / "w.sqlite3"))
+    now = datetime(2030, 1, 1, 12, 0)
+    catalog.bulk_load([
+        {"id": 1, "title": "always", "options": ["a"]},
+        {"id": 2, "title": "later", "options": ["a"], "opens_at": now + timedelta(hours=1)},
+        {"id": 3, "title": "over", "options": ["a"], "closes_at": now},
+        {"id": 4, "title": "tz", "options": ["a"], "opens_at": datetime(2030, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=2)))},
+    ])
+    page, _ = catalog.page(open_at=now)
+    assert [info.id for info in page] == [1, 4]
+    assert not catalog.get(2).is_open(now)
+    assert catalog.get(4).opens_at == datetime(2030, 1, 1, 11, 0)
+
+
+def test_listing_cursor_and_filters(client: TestClient):
+    loaded = client.post(
+        "/ballots/bulk",
+        json=[
+            {"title": f"Local {i}", "options": ["A", "B"], "jurisdiction": "county-7"}
+            for i in range(5)
+        ] + [{"title": "Draft", "options": ["A"], "status": "draft"}],
+        headers=ADMIN,
+    )
+    assert loaded.status_code == 200
+    assert loaded.json()["loaded"] == 6
+
+    first = client.get("/ballots", params={"jurisdiction": "county-7", "limit": 3})
+    assert [b["title"] for b in first.json()] == ["Local 0", "Local 1", "Local 2"]
+    cursor = first.headers["X-Next-Cursor"]
+    rest = client.get("/ballots", params={"jurisdiction": "county-7", "limit": 3, "cursor": cursor})
+    assert [b["title"] for b in rest.json()] == ["Local 3", "Local 4"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    # Cached pages keep their cursor header.
+    again = client.get("/ballots", params={"jurisdiction": "county-7", "limit": 3})
+    assert again.headers["X-Next-Cursor"] == cursor
+
+    drafts = client.get("/ballots", params={"status": "draft"}).json()
+    assert [b["title"] for b in drafts] == ["Draft"]
+    draft_id = drafts[0]["id"]
+    res = client.post(
+        f"/ballots/{draft_id}/vote",
+        json={"option_index": 0},
+        headers={"Authorization": "Bearer voter:early@example.com"},
+    )
+    assert res.status_code == 403
+    assert res.json()["detail"] == "ballot_not_open"
+
+
+def test_bulk_load_requires_admin_and_rejects_existing_ids(client: TestClient):
+    spec = [{"id": 1, "title": "Clash", "options": ["A"]}]
+    assert client.post("/ballots/bulk", json=spec).status_code == 401
+    res = client.post("/ballots/bulk", json=spec, headers=ADMIN)
+    assert res.status_code == 409
+    assert res.json()["detail"] == "ballot_exists"
+    assert client.get("/ballots/1").json()["title"] == "City Council Election"
+
+
+def test_lookup_flags_new_ballots_and_remembers_misses(tmp_path: Path):
+    catalog = BallotCatalog(_engine(tmp_path / "l.sqlite3"), miss_ttl=60)
+    other = BallotCatalog(catalog.engine)  # another worker on the same tables
+
+    assert catalog.lookup(99) == (None, False)
+    other.bulk_load([{"id": 10, "title": "Late", "options": ["a"]}, {"id": 99, "title": "Missed", "options": ["a"]}])
+    assert catalog.lookup(99) == (None, False)  # miss still cached
+    info, added = catalog.lookup(10)
+    assert info.title == "Late" and added is True
+    assert catalog.lookup(10) == (info, False)
+    assert BallotCatalog(catalog.engine, miss_ttl=0).get(99).title == "Missed"
+
+
+def test_find_ballot_seeds_tally_only_for_newly_seen_ballots(client: TestClient, monkeypatch):
+    from app.routers import ballots
+
+    assert client.get("/ballots/1").status_code == 200
+    catalog, ledger = ballots._catalog, ballots._counts_source
+    seeded = []
+    monkeypatch.setattr(ballots, "_load_tally", lambda info, counts: seeded.append(info.id))
+
+    BallotCatalog(ledger.engine).bulk_load([{"id": 50, "title": "Elsewhere", "options": ["a", "b"]}])
+    assert ballots._find_ballot(catalog, ledger, 1).id == 1
+    assert ballots._find_ballot(catalog, ledger, 50).id == 50
+    assert ballots._find_ballot(catalog, ledger, 50).id == 50
+    assert seeded == [50]
+
+
+def test_listing_mirrors_ballots_from_other_workers(client: TestClient, monkeypatch):
+    from app.routers import ballots
+    from app.voting.tally import TallyEngine
+
+    monkeypatch.setattr(ballots, "tally", TallyEngine())  # keep these votes out of the shared tally
+    assert client.get("/ballots/1").status_code == 200
+    ledger = ballots._counts_source
+    # Another worker loads a ballot and takes votes on it.
+    BallotCatalog(ledger.engine).bulk_load([{"id": 60, "title": "Elsewhere", "options": ["a", "b"]}])
+    ledger.write_batch([("v1@example.com", 60, 0), ("v2@example.com", 60, 1)])
+
+    listed = {item["id"]: item for item in client.get("/ballots").json()}
+    assert listed[60]["totalVotes"] == 2
+    assert (60, 2) in ballots._ballot_widths()  # pulled with the rest from now on
+
+
+def test_listing_cache_sees_bulk_loads_on_other_workers(client: TestClient, tmp_path: Path, monkeypatch):
+    from app.core.state import SQLiteBackend
+    from app.routers import ballots
+    from app.voting.tally import TallyEngine
+
+    backend = SQLiteBackend(str(tmp_path / "state.sqlite3"))
+    monkeypatch.setattr(ballots, "get_state_backend", lambda: backend)
+    monkeypatch.setattr(ballots, "tally", TallyEngine())
+    for name in ("_counts_source", "_catalog", "_replica", "_catalog_key"):
+        monkeypatch.setattr(ballots, name, None)
+    try:
+        first = client.get("/ballots")
+        ledger = ballots._counts_source
+        # What POST /ballots/bulk does on another worker.
+        BallotCatalog(ledger.engine).bulk_load([{"id": 61, "title": "Elsewhere", "options": ["a"]}])
+        backend.incr(ballots._catalog_key)
+
+        fresh = client.get("/ballots", headers={"If-None-Match": first.headers["ETag"]})
+        assert fresh.status_code == 200
+        assert 61 in [item["id"] for item in fresh.json()]
+    finally:
+        if ballots._replica is not None:
+            ballots._replica.detach()
+        backend.close()
@@ -1,6 +1,7 @@
 import pyotp
 from fastapi.testclient import TestClient
 
+from app.core.settings import reload_settings
 from app.main import app
 
 
@@ -32,6 +33,7 @@ def test_login_requires_captcha_after_failures(monkeypatch):
     monkeypatch.setenv("CAPTCHA_THRESHOLD", "3")
     monkeypatch.setenv("CAPTCHA_VALID_TOKEN", "1234")
     monkeypatch.setenv("FAILED_TTL_SECONDS", "900")
+    reload_settings()
 
     client = TestClient(app)
     email = "admin@evp-demo.com"
@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.db import init_db
+
+
+def _engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'schema.sqlite3'}")
+
+
+def test_init_db_creates_tables_and_adds_nullable_columns(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        # ballots as created before jurisdictions existed.
+        conn.execute(text(
+            "CREATE TABLE ballots (id INTEGER PRIMARY KEY, title VARCHAR(255) NOT NULL, status VARCHAR(16) NOT NULL, "
+            "opens_at DATETIME, closes_at DATETIME, durability VARCHAR(16) NOT NULL)"
+        ))
+    init_db(engine)
+    init_db(engine)  # idempotent
+
+    inspector = inspect(engine)
+    assert {"users", "vote_ledger", "ballots", "ballot_options", "mfa_enrollments"} <= set(inspector.get_table_names())
+    assert "jurisdiction" in {column["name"] for column in inspector.get_columns("ballots")}
+
+
+def test_init_db_refuses_missing_not_null_columns(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR(32), email VARCHAR(255))"))
+    with pytest.raises(RuntimeError, match="users.password_hash"):
+        init_db(engine)
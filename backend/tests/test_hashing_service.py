@@ -0,0 +1,157 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Future
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.security import hashing, passwords
+from app.security.hashing import HashingBusy, HashingService, HashingUnavailable
+
+# Cheap parameters: the pool plumbing is under test, not Argon2 itself.
+FAST_PARAMS = (1, 8, 1)
+
+
+@pytest.fixture
+def service():
+    svc = HashingService(FAST_PARAMS, workers=1, max_queue=0, retry_after=3)
+    yield svc
+    svc.close()
+
+
+def test_hash_and_verify_round_trip(service: HashingService):
+    encoded = service.hash_sync("s3cret-pepper")
+    assert encoded.startswith("$argon2id$")
+    assert service.verify_sync("s3cret-pepper", encoded) is True
+    assert asyncio.run(service.verify("wrong", encoded)) is False
+    assert service.verify_sync("anything", "not-a-hash") is False
+
+    stats = service.stats()
+    assert stats["completed"] == 4 and stats["in_flight"] == 0
+    assert stats["latency_ms"]["p50"] is not None
+
+
+def test_memory_budget_caps_concurrency():
+    svc = HashingService((3, 65536, 2), workers=8, memory_budget_bytes=128 * 1024 * 1024)
+    assert svc.concurrency == 2
+
+
+def test_saturated_service_rejects_fast(service: HashingService):
+    blocker = service._submit(time.sleep, 0.5)
+    started = time.perf_counter()
+    with pytest.raises(HashingBusy) as exc_info:
+        service.hash_sync("x")
+    assert time.perf_counter() - started < 0.1
+    assert exc_info.value.retry_after == 3
+    blocker.result()
+    assert service.stats()["rejected"] == 1
+
+
+def test_signup_returns_503_when_hashing_saturated(service: HashingService, monkeypatch):
+    monkeypatch.setattr(passwords, "get_hashing_service", lambda: service)
+    blocker = service._submit(time.sleep, 0.5)
+    client = TestClient(app)
+    response = client.post(
+        "/auth/signup",
+        json={"username": "busyuser", "email": "busy@example.com", "password": "Password123!"},
+    )
+    assert response.status_code == 503
+    assert response.json()["detail"] == "auth_busy"
+    assert response.headers["Retry-After"] == "3"
+    blocker.result()
+
+
+def test_dead_worker_is_unavailable_and_pool_is_rebuilt(service: HashingService):
+    doomed = service._submit(os._exit, 1)
+    with pytest.raises(HashingUnavailable) as exc_info:
+        service._result(doomed)
+    assert exc_info.value.retry_after == 3
+    encoded = service.hash_sync("after-crash")
+    assert service.verify_sync("after-crash", encoded) is True
+    assert service.stats()["restarts"] == 1
+
+
+def test_cancelled_job_is_unavailable_when_awaited(service: HashingService):
+    async def run():
+        # What a pool shutdown with cancel_futures=True leaves behind.
+        queued: Future = Future()
+        assert queued.cancel()
+        with pytest.raises(HashingUnavailable):
+            await service._await(queued)
+
+    asyncio.run(run())
+
+
+def test_caller_cancellation_still_propagates(service: HashingService):
+    async def run():
+        task = asyncio.ensure_future(service._await(service._submit(time.sleep, 0.5)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+
+class _DyingService(HashingService):
+    """Every job kills its worker, as an OOM kill would."""
+
+    def _submit(self, fn, *args):
+        return super()._submit(os._exit, 1)
+
+
+def test_login_returns_503_not_invalid_credentials_when_pool_dies(tmp_path, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.db import get_db, init_db
+    from app.db_models import User
+    from app.security.login_guard import get_login_guard
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'users.db'}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(User(username="pooluser", email="pool@example.com", password_hash="$argon2id$v=19$m=8,t=1,p=1$x$y"))
+        db.commit()
+
+    def session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    dying = _DyingService(FAST_PARAMS, workers=1, retry_after=2)
+    monkeypatch.setattr(passwords, "get_hashing_service", lambda: dying)
+    app.dependency_overrides[get_db] = session
+    app.state.limiter.reset()
+    try:
+        response = TestClient(app).post("/auth/login", json={"email": "pool@example.com", "password": "Password123!"})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        dying.close()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    guard = get_login_guard()
+    assert guard.evaluate(guard.key("pool@example.com", "testclient")).failures == 0
+
+
+def test_reloaded_settings_rebuild_the_pool_only_when_its_config_changes(monkeypatch):
+    from app.core.settings import reload_settings
+
+    reload_settings()
+    first = hashing.get_hashing_service()
+    reload_settings()
+    assert hashing.get_hashing_service() is first
+    monkeypatch.setenv("HASH_QUEUE_SIZE", "7")
+    try:
+        reload_settings()
+        second = hashing.get_hashing_service()
+        assert second is not first and second.max_queue == 7
+    finally:
+        monkeypatch.delenv("HASH_QUEUE_SIZE")
+        reload_settings()
+    assert hashing.get_hashing_service().max_queue != 7
@@ -0,0 +1,24 @@
+import asyncio
+
+from benchmarks.http_load import percentile, run
+
+
+def test_percentile_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert percentile(samples, 0.50) == 50.0
+    assert percentile(samples, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+def test_in_process_run_reports_each_scenario():
+    report = asyncio.run(run(["vote_cast", "tally_poll", "login_storm"], requests=12, concurrency=4, users=2))
+    by_name = {r["name"]: r for r in report["scenarios"]}
+    assert list(by_name) == ["vote_cast", "tally_poll", "login_storm"]
+    assert by_name["vote_cast"]["statuses"] == {"200": 12}
+    assert by_name["tally_poll"]["statuses"] == {"200": 12}
+    assert by_name["login_storm"]["statuses"] == {"200": 12}
+    for result in by_name.values():
+        assert result["errors"] == {}
+        assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+        assert result["throughput_rps"] > 0
+    assert report["meta"]["target"] == "in-process"
@@ -0,0 +1,86 @@
+import time
+
+from app.security.idle import IdleTracker
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_idle_after_timeout_and_touch_resets():
+    clock = _Clock()
+    tracker = IdleTracker(30, retention_seconds=600, clock=clock)
+    assert tracker.is_idle("alice") is False  # unknown is not idle
+    tracker.touch("alice")
+    clock.now += 30
+    assert tracker.is_idle("alice") is False
+    clock.now += 1
+    assert tracker.is_idle("alice") is True
+    tracker.touch("alice")
+    assert tracker.is_idle("alice") is False
+
+
+def test_sweep_drops_expired_buckets():
+    clock = _Clock()
+    tracker = IdleTracker(30, retention_seconds=300, bucket_ticks=60, clock=clock)
+    for i in range(100):
+        tracker.touch(f"old{i}")
+    clock.now += 200
+    tracker.touch("recent")
+    assert tracker.is_idle("old1") is True  # idle, but still retained
+    assert tracker.stats()["live"] == 1  # only "recent" is within the timeout
+    clock.now += 200  # old sessions are now past retention, "recent" is not
+    assert tracker.stats() == {"live": 0, "idle": 101, "max_sessions": 100_000, "expired": 100, "evicted": 0}
+    assert tracker.is_idle("old1") is True  # swept, but marked expired
+    assert tracker.is_idle("never-seen") is False
+    clock.now += 10_000  # long gap: one pass over the ring clears everything
+    tracker.sweep()
+    assert len(tracker) == 0
+
+
+def test_retention_defaults_to_just_past_the_timeout():
+    clock = _Clock()
+    tracker = IdleTracker(30, marker_seconds=600, bucket_ticks=10, clock=clock)
+    tracker.touch("alice")
+    clock.now += 60
+    tracker.sweep()
+    assert len(tracker) == 0 and tracker.is_idle("alice") is True
+    tracker.touch("alice")  # a fresh login clears the marker
+    assert tracker.is_idle("alice") is False
+    clock.now += 60
+    tracker.sweep()
+    clock.now += 601  # markers age out after marker_seconds
+    assert tracker.is_idle("alice") is False
+
+
+def test_background_sweep_releases_sessions():
+    clock = _Clock()
+    tracker = IdleTracker(30, bucket_ticks=10, clock=clock, sweep_interval=0.01)
+    try:
+        tracker.touch("alice")
+        clock.now += 60
+        deadline = time.monotonic() + 2
+        while len(tracker) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(tracker) == 0
+    finally:
+        tracker.close()
+
+
+def test_cap_evicts_oldest_first():
+    clock = _Clock()
+    tracker = IdleTracker(30, retention_seconds=600, max_sessions=3, bucket_ticks=10, clock=clock)
+    for name in ("a", "b"):
+        tracker.touch(name)
+    clock.now += 60
+    for name in ("c", "d"):
+        tracker.touch(name)
+    assert len(tracker) == 3 and tracker.evicted == 1
+    clock.now += 60
+    tracker.touch("e")
+    assert len(tracker) == 3 and tracker.evicted == 2
+    assert {"c", "d", "e"} == {k for k in "abcde" if k in tracker._last}
@@ -0,0 +1,121 @@
+import threading
+
+import pytest
+
+from app.core.settings import reload_settings
+from app.core.state import MemoryBackend
+from app.security import login_guard
+from app.security.login_guard import FAILURE, SUCCESS, GuardConfig, GuardDecision, LoginGuard, RedisLoginGuard
+
+CONFIG = GuardConfig(
+    enabled=True,
+    fail_limit=3,
+    lockout_seconds=30,
+    captcha_fail_threshold=1,
+    legacy_captcha_threshold=3,
+    failure_ttl_seconds=900,
+    captcha_token="1234",
+)
+
+
+def _scenario(guard, clock):
+    key = guard.key("Victim@Example.com", "10.0.0.9")
+    out = [guard.evaluate(key), guard.record(key, FAILURE)]
+    clock[0] += 5
+    out.append(guard.record(key, FAILURE))
+    clock[0] += 5
+    out += [guard.record(key, FAILURE), guard.evaluate(key)]
+    clock[0] += 30.5  # lock over: lockout counters reset, failure count kept
+    out += [guard.evaluate(key), guard.record(key, FAILURE)]
+    clock[0] += 31  # rolling window over
+    out.append(guard.evaluate(key))
+    out.append(guard.record(key, SUCCESS))
+    out.append(guard.evaluate(key))
+    return out
+
+
+@pytest.mark.parametrize("make", ["memory", "redis"])
+def test_one_call_returns_lock_captcha_and_retry_after(make, redis_url, monkeypatch, request):
+    clock = [1_700_000_000.25]
+    if make == "memory":
+        guard = LoginGuard(MemoryBackend(), config=CONFIG)
+    else:
+        guard = RedisLoginGuard(redis_url, prefix=f"t:{request.node.name}:", config=CONFIG)
+    monkeypatch.setattr(guard, "_now", lambda: clock[0])
+    out = _scenario(guard, clock)
+    assert out == [
+        GuardDecision(),
+        GuardDecision(captcha_required=True, failures=1),
+        GuardDecision(captcha_required=True, failures=2),
+        GuardDecision(locked=True, retry_after=30, captcha_required=True, failures=3),
+        GuardDecision(locked=True, retry_after=30, captcha_required=True, failures=3),
+        GuardDecision(captcha_required=False, failures=3),
+        GuardDecision(captcha_required=True, failures=4),
+        GuardDecision(captcha_required=False, failures=4),
+        GuardDecision(),
+        GuardDecision(),
+    ]
+
+
+def test_disabled_guards_use_the_failure_count_only():
+    config = GuardConfig(**{**CONFIG.__dict__, "enabled": False})
+    guard = LoginGuard(MemoryBackend(), config=config)
+    key = guard.key("a@example.com", "10.0.0.1")
+    decisions = [guard.record(key, FAILURE) for _ in range(5)]
+    assert not any(d.locked for d in decisions)
+    assert [d.captcha_required for d in decisions] == [False, False, True, True, True]
+    assert guard.captcha_ok("1234") and not guard.captcha_ok("9999") and not guard.captcha_ok(None)
+    with pytest.raises(ValueError):
+        guard.record(key, "maybe")
+
+
+def test_config_is_resolved_once_per_settings(monkeypatch):
+    guard = LoginGuard(MemoryBackend())
+    first = guard.config
+    monkeypatch.setenv("CAPTCHA_VALID_TOKEN", "changed")
+    assert guard.config is first
+    try:
+        reload_settings()
+        assert guard.config.captcha_token == "changed"
+    finally:
+        monkeypatch.delenv("CAPTCHA_VALID_TOKEN")
+        reload_settings()
+
+
+def test_redis_lockout_is_shared_and_atomic(redis_url):
+    config = GuardConfig(**{**CONFIG.__dict__, "fail_limit": 101, "lockout_seconds": 60})
+    workers = [RedisLoginGuard(redis_url, prefix="t:shared:", config=config) for _ in range(4)]
+    key = workers[0].key("target@example.com", "10.0.0.1")
+
+    def hammer(guard):
+        for _ in range(25):
+            guard.record(key, FAILURE)
+
+    threads = [threading.Thread(target=hammer, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert workers[1].evaluate(key).failures == 100
+
+    decision = workers[2].record(key, FAILURE)
+    assert decision.locked and 59 <= decision.retry_after <= 60
+    assert workers[3].evaluate(key).locked is True
+    ttl_ms = workers[0]._redis.pttl(workers[0]._k(key))
+    assert 60_000 < ttl_ms <= config.record_ttl * 1000
+    for w in workers:
+        w.close()
+
+
+def test_redis_url_selects_redis_guard(redis_url, monkeypatch):
+    monkeypatch.setenv("REDIS_URL", redis_url)
+    login_guard.get_login_guard.cache_clear()
+    try:
+        reload_settings()
+        assert isinstance(login_guard.get_login_guard(), RedisLoginGuard)
+    finally:
+        login_guard.get_login_guard().close()
+        monkeypatch.delenv("REDIS_URL")
+        reload_settings()
+        login_guard.get_login_guard.cache_clear()
+    assert type(login_guard.get_login_guard()) is LoginGuard
@@ -0,0 +1,108 @@
+import secrets
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.state import MemoryBackend
+from app.main import app
+from app.security.login_guard import FAILURE, LoginGuard
+from app.security.rate_limit import RateLimiter
+from app.security.refresh_tokens import RefreshTokenError, RefreshTokenStore
+
+
+def test_expired_keys_are_swept_without_lookups():
+    backend = MemoryBackend()
+    for i in range(500):
+        backend.set(f"attempts:victim{i}@example.com", "{}", ttl=0.05)
+    backend.set("mfa:alice", "{}")
+    time.sleep(0.06)
+    assert backend.sweep() == 500
+    assert backend.stats()["entries"] == 1
+    assert backend.stats()["expired"] == 500
+    assert backend.get("mfa:alice") == "{}"
+
+
+def test_writes_sweep_incrementally():
+    backend = MemoryBackend()
+    for i in range(100):
+        backend.set(f"old{i}", "x", ttl=0.05)
+    time.sleep(0.06)
+    for i in range(4):
+        backend.set(f"new{i}", "x", ttl=60)
+    assert len(backend) == 4
+
+
+def test_rewritten_keys_keep_their_latest_deadline():
+    backend = MemoryBackend()
+    backend.set("k", "1", ttl=0.05)
+    backend.set("k", "2", ttl=60)
+    time.sleep(0.06)
+    assert backend.sweep() == 0
+    assert backend.get("k") == "2"
+
+
+def test_cap_evicts_least_recently_used_volatile_keys():
+    backend = MemoryBackend(max_entries=3)
+    backend.set("mfa:alice", "{}")  # no TTL: never evicted
+    for name in ("a", "b", "c"):
+        backend.set(name, "x", ttl=60)
+    backend.get("a")
+    backend.set("d", "x", ttl=60)
+    assert backend.get("b") is None
+    assert {k for k in ("a", "c", "d") if backend.get(k)} == {"a", "c", "d"}
+    assert backend.get("mfa:alice") == "{}"
+    assert backend.stats()["evicted"] == 1
+
+
+def test_background_sweeper_and_random_email_flood():
+    backend = MemoryBackend(max_entries=1000, sweep_interval=0.02)
+    try:
+        guard = LoginGuard(backend)
+        for i in range(5000):
+            guard.record(guard.key(f"stuffed{i}@example.com", "203.0.113.7"), FAILURE)
+        assert len(backend) <= 1000
+        assert backend.stats()["evicted"] >= 4000
+
+        backend.set("short", "x", ttl=0.01)
+        deadline = time.monotonic() + 2
+        while backend.stats()["expired"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert backend.stats()["expired"] >= 1
+    finally:
+        backend.close()
+
+
+def test_flood_cannot_evict_sessions_or_other_namespaces():
+    backend = MemoryBackend(max_entries=50)
+    tokens = RefreshTokenStore(backend, ttl_seconds=600, family_ttl_seconds=3600)
+    guard = LoginGuard(backend)
+    limiter = RateLimiter(backend)
+    token = tokens.issue("voter@example.com", "voter")
+    limiter.hit("login_ip", "198.51.100.4", "5/minute")
+    victim = guard.key("victim@example.com", "198.51.100.4")
+    guard.record(victim, FAILURE)
+
+    for _ in range(200):
+        guard.record(guard.key(f"{secrets.token_hex(8)}@example.com", "203.0.113.7"), FAILURE)
+
+    assert backend.stats()["evicted"] >= 150
+    new_token, subject, _ = tokens.rotate(token)
+    assert subject == "voter@example.com"
+    assert backend.get(limiter._key("login_ip", "198.51.100.4")) is not None
+    # Only guard records compete for the guard namespace's slots.
+    assert sum(1 for key in list(backend._data) if key.startswith("guard:")) == 50
+    assert tokens.revoke(new_token) is True
+    with pytest.raises(RefreshTokenError):
+        tokens.rotate(new_token)
+
+
+def test_admin_state_endpoint(monkeypatch):
+    from app.routers import admin
+
+    monkeypatch.setattr(admin, "get_state_backend", lambda: MemoryBackend(max_entries=10))
+    client = TestClient(app)
+    resp = client.get("/admin/state", headers={"Authorization": "Bearer admin-token"})
+    assert resp.status_code == 200
+    assert resp.json()["max_entries"] == 10
+    assert {"entries", "volatile", "expired", "evicted"} <= resp.json().keys()
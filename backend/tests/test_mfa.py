@@ -96,3 +96,118 @@ def test_admin_mfa_flow(monkeypatch):
         json={"email": email, "password": "bad"},
     )
     assert bad_qr.status_code == 401
+
+
+def _count_checkpw(monkeypatch):
+    from app.security import mfa
+
+    calls = []
+    real = mfa.bcrypt.checkpw
+
+    def counting(password, hashed):
+        calls.append(hashed)
+        return real(password, hashed)
+
+    monkeypatch.setattr(mfa.bcrypt, "checkpw", counting)
+    return calls
+
+
+def _cheap_bcrypt(monkeypatch):
+    from app.security import mfa
+
+    real = mfa.bcrypt.gensalt
+    monkeypatch.setattr(mfa.bcrypt, "gensalt", lambda: real(rounds=4))
+
+
+def test_backup_code_needs_at_most_one_bcrypt_verify(monkeypatch):
+    from app.security import mfa
+
+    _cheap_bcrypt(monkeypatch)
+
+    email = "lookup-admin@example.com"
+    mfa.enroll(email)
+    codes = mfa.take_backup_codes(email)
+    calls = _count_checkpw(monkeypatch)
+
+    assert mfa.try_backup_code(email, "ZZZZZZZZ") is False
+    assert calls == []
+    assert mfa.try_backup_code(email, codes[4]) is True
+    assert len(calls) == 1
+    assert mfa.try_backup_code(email, codes[4]) is False  # single use
+    assert len(calls) == 1
+
+
+def test_legacy_records_migrate_to_lookup_ids(monkeypatch):
+    from dataclasses import replace
+
+    from app.core.settings import reload_settings
+    from app.security import mfa
+    from app.security.mfa_store import get_mfa_store
+
+    _cheap_bcrypt(monkeypatch)
+    email = "legacy-admin@example.com"
+    mfa.enroll(email)
+    store = get_mfa_store()
+    codes = store.latest_codes(email)
+
+    # Enrolled before lookup ids, codes not shown yet -> ids recomputed and
+    # the plaintext codes forgotten.
+    store.update(email, lambda current: (replace(current, backup_code_ids=[], lookup_key=None), None))
+    calls = _count_checkpw(monkeypatch)
+    assert mfa.try_backup_code(email, codes[0]) is True
+    assert len(calls) == 1
+    assert mfa._load(email).backup_code_ids[0] is not None
+    assert store.latest_codes(email) == []
+
+    # Plaintext codes gone and the lookup key rotated: scan the unknown codes,
+    # then remember the id of the one that matched.
+    monkeypatch.setenv("MFA_LOOKUP_KEY", "rotated-lookup-key")
+    try:
+        reload_settings()
+        assert mfa.try_backup_code(email, codes[9]) is True
+        migrated = mfa._load(email)
+        assert migrated.backup_code_ids.count(None) == 9
+        calls.clear()
+        assert mfa.try_backup_code(email, codes[9]) is False
+        assert mfa.try_backup_code(email, codes[0]) is False  # used before the rotation
+        assert mfa.try_backup_code(email, codes[5]) is True
+    finally:
+        monkeypatch.delenv("MFA_LOOKUP_KEY")
+        reload_settings()
+
+
+def test_qrcode_is_cached_per_enrolment(monkeypatch):
+    from app.security.mfa_qr import get_qr_cache
+
+    _cheap_bcrypt(monkeypatch)
+    client = TestClient(app)
+    email = "admin@evp-demo.com"
+    credentials = {"email": email, "password": "secret123"}
+    assert client.post("/auth/mfa/enroll", json=credentials).status_code == 201
+    cache = get_qr_cache()
+    renders = cache.renders
+
+    first = client.post("/auth/mfa/qrcode", json=credentials)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert client.post("/auth/mfa/qrcode", json=credentials).content == first.content
+    assert cache.renders == renders + 1
+
+    not_modified = client.post("/auth/mfa/qrcode", json=credentials, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    svg = client.post("/auth/mfa/qrcode?format=svg", json=credentials)
+    assert svg.status_code == 200
+    assert svg.headers["content-type"] == "image/svg+xml"
+    assert svg.content.startswith(b"<svg")
+    assert svg.headers["etag"] != etag
+    assert client.post("/auth/mfa/qrcode?format=gif", json=credentials).status_code == 422
+    _reset_limits()
+
+    # Re-enrolling issues a new secret, so the old ETag no longer matches.
+    assert client.post("/auth/mfa/enroll", json=credentials).status_code == 201
+    fresh = client.post("/auth/mfa/qrcode", json=credentials, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != etag
+    _reset_limits()
@@ -0,0 +1,114 @@
+import json
+
+import pyotp
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.db import init_db
+from app.db_models import MfaEnrollment
+from app.security import mfa
+from app.security.mfa_store import MfaStore, mfa_cipher
+
+_CIPHER = mfa_cipher("", "test-secret")
+
+
+@pytest.fixture(autouse=True)
+def _cheap_bcrypt(monkeypatch):
+    real = mfa.bcrypt.gensalt
+    monkeypatch.setattr(mfa.bcrypt, "gensalt", lambda: real(rounds=4))
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'mfa.sqlite3'}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    return engine
+
+
+def _use(monkeypatch, store: MfaStore) -> MfaStore:
+    monkeypatch.setattr(mfa, "get_mfa_store", lambda: store)
+    return store
+
+
+def test_enrolment_survives_restart_and_secret_is_encrypted(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    _use(monkeypatch, MfaStore(engine, _CIPHER))
+    record = mfa.enroll("Admin@Example.com")
+
+    with engine.connect() as conn:
+        row = conn.execute(select(MfaEnrollment.__table__)).one()
+    assert row.email == "admin@example.com"
+    assert record.secret.encode() not in row.secret_encrypted
+    codes = mfa.take_backup_codes("admin@example.com")
+    assert len(codes) == 10 and codes[0].encode() not in row.latest_codes_encrypted
+
+    # Shown once: the plaintext codes are gone afterwards.
+    assert mfa.take_backup_codes("admin@example.com") == []
+    with engine.connect() as conn:
+        assert conn.execute(select(MfaEnrollment.__table__.c.latest_codes_encrypted)).scalar() is None
+
+    # A new process: empty cache, same database.
+    _use(monkeypatch, MfaStore(engine, _CIPHER))
+    assert mfa.is_enrolled("admin@example.com")
+    assert mfa.verify_totp("admin@example.com", pyotp.TOTP(record.secret).now())
+
+
+def test_login_path_reads_are_served_from_cache(tmp_path, monkeypatch):
+    store = _use(monkeypatch, MfaStore(_engine(tmp_path), _CIPHER))
+    record = mfa.enroll("admin@example.com")
+    loads = store.loads
+
+    totp = pyotp.TOTP(record.secret)
+    for _ in range(50):
+        assert mfa.is_enrolled("admin@example.com")
+        assert mfa.verify_totp("admin@example.com", totp.now())
+    assert store.loads == loads
+    assert store.hits >= 100
+
+
+def test_workers_see_reenrolment_and_used_codes(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    first, second = MfaStore(engine, _CIPHER), MfaStore(engine, _CIPHER)
+
+    _use(monkeypatch, first)
+    old = mfa.enroll("admin@example.com")
+    codes = mfa.take_backup_codes("admin@example.com")
+    _use(monkeypatch, second)
+    assert mfa.verify_totp("admin@example.com", pyotp.TOTP(old.secret).now())  # cached by the second worker
+
+    # Re-enrolled on the first worker: the second one re-reads on a miss.
+    _use(monkeypatch, first)
+    new = mfa.enroll("admin@example.com")
+    new_codes = mfa.take_backup_codes("admin@example.com")
+    _use(monkeypatch, second)
+    assert mfa.verify_totp("admin@example.com", pyotp.TOTP(new.secret).now())
+    assert mfa.try_backup_code("admin@example.com", codes[0]) is False
+
+    # A code used on one worker is rejected on the other.
+    assert mfa.try_backup_code("admin@example.com", new_codes[3]) is True
+    _use(monkeypatch, first)
+    assert mfa.try_backup_code("admin@example.com", new_codes[3]) is False
+
+
+def test_state_backend_records_move_to_the_database(tmp_path, monkeypatch):
+    from app.core.state import MemoryBackend
+
+    backend = MemoryBackend()
+    monkeypatch.setattr(mfa, "get_state_backend", lambda: backend)
+    store = _use(monkeypatch, MfaStore(_engine(tmp_path), _CIPHER))
+    codes = ["ABCDEFGH", "JKLMNPQR"]
+    backend.set(
+        mfa._record_key("old@example.com"),
+        json.dumps({
+            "email": "old@example.com",
+            "secret": pyotp.random_base32(),
+            "backup_code_hashes": [mfa._hash_backup_code(code).decode("ascii") for code in codes],
+            "used_backup_codes": [],
+        }),
+    )
+    backend.set(mfa._codes_key("old@example.com"), json.dumps(codes))
+
+    assert mfa.try_backup_code("old@example.com", codes[1]) is True
+    assert backend.get(mfa._record_key("old@example.com")) is None
+    assert store.get("old@example.com", fresh=True).backup_code_ids[0] is not None
+    assert store.latest_codes("old@example.com") == []  # ids computed on import, plaintext not kept
+    assert mfa.try_backup_code("old@example.com", codes[1]) is False
@@ -0,0 +1,22 @@
+from benchmarks.primitives import PrimitiveResult, compare, run
+
+
+def _result(name, ops, peak=1.0):
+    return PrimitiveResult(name, 10, 1.0, ops, 1000 / ops, peak, 0)
+
+
+def test_compare_flags_slowdowns_and_memory_growth():
+    baseline = {
+        "fast": {"ops_per_sec": 1000.0, "py_peak_kib": 4.0},
+        "slow": {"ops_per_sec": 1000.0, "py_peak_kib": 4.0},
+        "fat": {"ops_per_sec": 1000.0, "py_peak_kib": 4.0},
+    }
+    results = [_result("fast", 900.0, 4.5), _result("slow", 700.0), _result("fat", 1000.0, 9.0), _result("new", 1.0)]
+    flagged = {(r.name, r.metric) for r in compare(results, baseline, threshold=0.25)}
+    assert flagged == {("slow", "ops_per_sec"), ("fat", "py_peak_kib")}
+
+
+def test_run_selected_primitives():
+    results = run(["jwt", "encrypt_pii"], min_time=0.01)
+    assert [r.name for r in results] == ["jwt.create_access_token", "jwt.verify_token", "encrypt_pii"]
+    assert all(r.iterations >= 3 and r.ops_per_sec > 0 for r in results)
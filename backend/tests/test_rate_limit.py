@@ -0,0 +1,123 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.core.client_ip import client_ip, resolve_client_ip, trusted_networks
+from app.core.settings import reload_settings
+from app.core.state import MemoryBackend, SQLiteBackend
+from app.main import app
+from app.security.rate_limit import Limit, RateLimited, RateLimiter, RedisRateLimiter, parse_limits
+
+
+def test_parse_limits():
+    assert parse_limits("3/10seconds;5/minute") == (Limit(3, 10.0), Limit(5, 60.0))
+    assert parse_limits("100 per hour") == (Limit(100, 3600.0),)
+    assert parse_limits("") == ()
+    with pytest.raises(ValueError):
+        parse_limits("3/fortnight")
+
+
+def _run(limiter, clock):
+    outcomes = []
+
+    def attempt(key):
+        try:
+            limiter.hit("login", key, "3/10seconds;5/minute")
+            outcomes.append(0.0)
+        except RateLimited as exc:
+            outcomes.append(round(exc.retry_after, 3))
+
+    for _ in range(4):
+        attempt("a")  # burst of 3, then refused
+    attempt("b")  # other keys are independent
+    clock[0] += 10 / 3
+    attempt("a")  # one emission interval later: one more
+    attempt("a")
+    clock[0] += 20
+    for _ in range(3):
+        attempt("a")  # the third is within 10s budget but over 5/minute
+    clock[0] += 40
+    attempt("a")
+    return outcomes
+
+
+@pytest.mark.parametrize("make", ["memory", "redis"])
+def test_gcra_burst_and_refill(make, redis_url, monkeypatch, request):
+    clock = [1_700_000_000.5]
+    if make == "memory":
+        limiter = RateLimiter(MemoryBackend())
+    else:
+        limiter = RedisRateLimiter(redis_url, prefix=f"t:{request.node.name}:")
+    monkeypatch.setattr(limiter, "_now", lambda: clock[0])
+    assert _run(limiter, clock) == [0.0, 0.0, 0.0, 3.333, 0.0, 0.0, 3.333, 0.0, 0.0, 0.667, 0.0]
+
+
+def test_limits_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "state.sqlite3")
+    workers = [RateLimiter(SQLiteBackend(path)) for _ in range(3)]
+    for worker in workers:
+        worker.hit("login", "10.0.0.1|a@example.com", "3/minute")
+    with pytest.raises(RateLimited):
+        workers[0].hit("login", "10.0.0.1|a@example.com", "3/minute")
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "client": (peer, 1234), "headers": headers})
+
+
+def test_forwarded_for_only_from_trusted_proxies(monkeypatch):
+    nets = trusted_networks("10.0.0.0/8, 172.18.0.1")
+    assert resolve_client_ip("203.0.113.9", "198.51.100.1", nets) == "203.0.113.9"
+    assert resolve_client_ip("172.18.0.1", "198.51.100.1", nets) == "198.51.100.1"
+    # Client-supplied entries left of the first untrusted hop are ignored.
+    assert resolve_client_ip("172.18.0.1", "6.6.6.6, 198.51.100.1, 10.1.2.3", nets) == "198.51.100.1"
+    assert resolve_client_ip("172.18.0.1", "10.1.2.3", nets) == "10.1.2.3"
+    assert resolve_client_ip("172.18.0.1", "not-an-ip", nets) == "172.18.0.1"
+
+    monkeypatch.setenv("TRUSTED_PROXIES", "127.0.0.1")
+    try:
+        reload_settings()
+        assert client_ip(_request("127.0.0.1", "198.51.100.7")) == "198.51.100.7"
+        assert client_ip(_request("198.51.100.8", "1.2.3.4")) == "198.51.100.8"
+    finally:
+        monkeypatch.delenv("TRUSTED_PROXIES")
+        reload_settings()
+    assert client_ip(_request("127.0.0.1", "198.51.100.7")) == "127.0.0.1"
+
+
+def test_login_keeps_the_per_ip_budget_across_emails():
+    client = TestClient(app)
+    app.state.limiter.reset()
+    try:
+        for i in range(3):
+            resp = client.post("/auth/login?force_fail=1", json={"email": f"ip-{i}@example.com", "password": "wrong-password"})
+            assert resp.status_code == 401
+        # A fresh email does not buy a fresh budget: 3/10seconds per IP, as before.
+        resp = client.post("/auth/login?force_fail=1", json={"email": "ip-3@example.com", "password": "wrong-password"})
+        assert resp.status_code == 429
+        assert resp.json() == {"error": "too_many_requests", "detail": "Try again later."}
+        assert int(resp.headers["Retry-After"]) >= 1
+    finally:
+        app.state.limiter.reset()
+
+
+def test_login_is_limited_per_ip_and_email(monkeypatch):
+    # With a looser per-IP budget (e.g. many users behind one NAT), each email keeps its own.
+    monkeypatch.setenv("RATE_LIMIT_LOGIN_IP", "30/minute")
+    reload_settings()
+    client = TestClient(app)
+    app.state.limiter.reset()
+    try:
+        for email in ("limit-a@example.com", "limit-b@example.com"):
+            for _ in range(3):
+                resp = client.post("/auth/login?force_fail=1", json={"email": email, "password": "wrong-password"})
+                assert resp.status_code in (401, 429)
+                assert resp.json().get("error") != "too_many_requests"
+        resp = client.post("/auth/login?force_fail=1", json={"email": "LIMIT-A@example.com", "password": "wrong-password"})
+        assert resp.status_code == 429
+        assert resp.json() == {"error": "too_many_requests", "detail": "Try again later."}
+    finally:
+        monkeypatch.delenv("RATE_LIMIT_LOGIN_IP")
+        reload_settings()
+        app.state.limiter.reset()
@@ -0,0 +1,90 @@
+import json
+import sys
+from pathlib import Path
+from subprocess import run
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.main import app
+from app.voting.ledger import VoteLedger, get_ledger
+from app.voting.recount import compare, recount
+
+ROOT = Path(__file__).parent.parent
+
+
+def _engine(path: Path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    return engine
+
+
+def test_chunked_totals_and_histogram(tmp_path: Path):
+    led = VoteLedger(_engine(tmp_path / "r.sqlite3"))
+    votes = [(f"v{i}@example.com", 1000 + i % 3, i % 4) for i in range(1000)]
+    assert all(led.write_batch(votes))
+
+    # Chunks that do not divide the row count, plus a ballot seen in later chunks only.
+    report = recount(led.engine, chunk_size=77, bucket_seconds=3600)
+    assert report.rows == 1000
+    assert report.chunks == 13
+    expected = {}
+    for _, bid, opt in votes:
+        expected.setdefault(bid, [0, 0, 0, 0])[opt] += 1
+    assert report.totals == expected
+    assert sum(report.histogram.values()) == 1000
+    assert all(start % 3600 == 0 for start in report.histogram)
+
+
+def test_drift_report():
+    drift = compare({1: [3, 2], 2: [1]}, {1: [3, 1], 2: [1, 0], 3: [0, 1]})
+    assert [(d.ballot_id, d.option_index, d.ledger, d.live, d.delta) for d in drift] == [
+        (1, 1, 2, 1, -1),
+        (3, 1, 0, 1, 1),
+    ]
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    led = VoteLedger(_engine(tmp_path / "api.sqlite3"))
+    app.dependency_overrides[get_ledger] = lambda: led
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_ledger, None)
+
+
+def test_recount_endpoint_matches_live_tally(client: TestClient):
+    assert client.post("/ballots/recount", json={}, headers={"Authorization": "Bearer voter-token"}).status_code == 403
+    for i in range(3):
+        res = client.post(
+            "/ballots/2/vote",
+            json={"option_index": i % 2},
+            headers={"Authorization": f"Bearer voter:audit{i}@example.com"},
+        )
+        assert res.status_code == 200
+
+    report = client.post("/ballots/recount", json={}, headers={"Authorization": "Bearer admin-token"}).json()
+    assert report["rows"] == 3
+    assert report["totals"] == [{"id": 2, "votes": [2, 1], "totalVotes": 3}]
+    assert report["compared"] is True
+    assert report["drift"] == []
+
+
+def test_cli_flags_drift(tmp_path: Path):
+    db = tmp_path / "cli.sqlite3"
+    led = VoteLedger(_engine(db))
+    led.write_batch([("a@example.com", 1, 0), ("b@example.com", 1, 2)])
+    live = tmp_path / "tally.json"
+    live.write_text(json.dumps([{"id": 1, "votes": [1, 0, 0], "totalVotes": 1}]))
+
+    result = run(
+        [sys.executable, str(ROOT / "scripts" / "recount.py"), "--db", f"sqlite:///{db}", "--live", str(live), "--json"],
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    report = json.loads(result.stdout)
+    assert report["drift"] == [
+        {"ballotId": 1, "optionIndex": 2, "ledger": 1, "live": 0, "delta": -1}
+    ]
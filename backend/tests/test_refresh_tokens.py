@@ -0,0 +1,128 @@
+import time
+from types import SimpleNamespace
+
+import pyotp
+import pytest
+from fastapi.testclient import TestClient
+from jose import jwt
+
+from app.core.settings import get_settings
+from app.core.state import MemoryBackend
+from app.main import app
+from app.security import _parse_token
+from app.security import refresh_tokens as refresh_module
+from app.security.refresh_tokens import RefreshTokenError, RefreshTokenReused, RefreshTokenStore, refresh_tokens
+
+
+def _claims(token: str) -> dict:
+    settings = get_settings()
+    return jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+
+
+def test_rotation_and_reuse_revokes_family():
+    store = RefreshTokenStore(MemoryBackend(), ttl_seconds=60, family_ttl_seconds=600)
+    first = store.issue("voter@example.com", "voter")
+    second, subject, role = store.rotate(first)
+    assert (subject, role) == ("voter@example.com", "voter")
+    third, _, _ = store.rotate(second)
+
+    # Replaying a rotated-out token revokes the whole family...
+    with pytest.raises(RefreshTokenReused):
+        store.rotate(first)
+    # ...so even the newest token stops working.
+    with pytest.raises(RefreshTokenError):
+        store.rotate(third)
+    with pytest.raises(RefreshTokenError):
+        store.rotate("never-issued-token-value")
+
+
+def test_concurrent_tabs_get_the_same_successor_within_grace(monkeypatch):
+    store = RefreshTokenStore(MemoryBackend(), ttl_seconds=60, family_ttl_seconds=600, grace_seconds=10)
+    first = store.issue("voter@example.com", "voter")
+    second, _, _ = store.rotate(first)
+    # The other tab still holds ``first`` and rotates it a moment later.
+    assert store.rotate(first) == (second, "voter@example.com", "voter")
+    third, _, _ = store.rotate(second)
+    assert third not in (first, second)
+
+    # Past the window, replaying the rotated-out token is reuse again.
+    fourth, _, _ = store.rotate(third)
+    now = time.time()
+    monkeypatch.setattr(refresh_module.time, "time", lambda: now + 11)
+    with pytest.raises(RefreshTokenReused):
+        store.rotate(third)
+    with pytest.raises(RefreshTokenError):
+        store.rotate(fourth)
+
+
+def test_logout_revokes_family():
+    store = RefreshTokenStore(MemoryBackend())
+    token = store.issue("voter@example.com", "voter")
+    assert store.revoke(token) is True
+    with pytest.raises(RefreshTokenError):
+        store.rotate(token)
+    assert store.revoke("unknown-token-value-123") is False
+
+
+def test_login_returns_refresh_token_and_refresh_keeps_role():
+    app.state.limiter.reset()
+    client = TestClient(app)
+    email = "admin@evp-demo.com"
+    enroll = client.post("/auth/mfa/enroll", json={"email": email, "password": "secret123"})
+    totp = pyotp.parse_uri(enroll.json()["otpauth_uri"])
+    login = client.post("/auth/login", json={"email": email, "password": "secret123", "otp": totp.now()})
+    assert login.status_code == 200
+    body = login.json()
+    assert body["refresh_token"] and body["expires_in"] == get_settings().access_token_expire_minutes * 60
+    app.state.limiter.reset()
+
+    refreshed = client.post("/auth/token/refresh", json={"refresh_token": body["refresh_token"]})
+    assert refreshed.status_code == 200
+    new = refreshed.json()
+    assert new["refresh_token"] != body["refresh_token"]
+    assert _claims(new["access_token"])["role"] == "admin"
+    assert _parse_token(new["access_token"]) == (email, "admin")
+
+    # Once the successor has itself been rotated, the first token is reuse.
+    newer = client.post("/auth/token/refresh", json={"refresh_token": new["refresh_token"]}).json()
+    reused = client.post("/auth/token/refresh", json={"refresh_token": body["refresh_token"]})
+    assert reused.status_code == 401 and reused.json()["detail"] == "refresh_token_reused"
+    revoked = client.post("/auth/token/refresh", json={"refresh_token": newer["refresh_token"]})
+    assert revoked.status_code == 401 and revoked.json()["detail"] == "invalid_refresh_token"
+
+
+def test_logout_endpoint():
+    client = TestClient(app)
+    token = refresh_tokens.issue("voter@example.com", "voter")
+    assert client.post("/auth/logout", json={"refresh_token": token}).status_code == 204
+    response = client.post("/auth/token/refresh", json={"refresh_token": token})
+    assert response.status_code == 401
+
+
+def test_idle_session_cannot_refresh(monkeypatch):
+    from app.routers import auth
+    from app.security.idle import IdleTracker
+
+    # One clock for both idle stores: the timing wheel and the shared backend.
+    now = [time.time()]
+    tracker = IdleTracker(get_settings().idle_timeout_seconds, clock=lambda: now[0])
+    monkeypatch.setattr(auth, "get_idle_tracker", lambda: tracker)
+    monkeypatch.setattr(auth, "time", SimpleNamespace(time=lambda: now[0]))
+
+    app.state.limiter.reset()
+    client = TestClient(app)
+    email = "admin@evp-demo.com"
+    enroll = client.post("/auth/mfa/enroll", json={"email": email, "password": "secret123"})
+    totp = pyotp.parse_uri(enroll.json()["otpauth_uri"])
+    # Login stamps the canonical email, whatever case the client typed.
+    login = client.post("/auth/login", json={"email": email.upper(), "password": "secret123", "otp": totp.now()})
+    assert login.status_code == 200
+    token = login.json()["refresh_token"]
+    app.state.limiter.reset()
+
+    now[0] += get_settings().idle_timeout_seconds + 5
+    idle = client.post("/auth/token/refresh", json={"refresh_token": token})
+    assert idle.status_code == 401 and idle.json()["detail"] == "idle_timeout"
+    # The session is over: its family is revoked, not just this attempt refused.
+    again = client.post("/auth/token/refresh", json={"refresh_token": token})
+    assert again.status_code == 401 and again.json()["detail"] != "idle_timeout"
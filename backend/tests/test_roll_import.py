@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+from subprocess import run
+
+import pytest
+from passlib.hash import argon2
+from sqlalchemy import create_engine, select
+
+from app.db import init_db
+from app.db_models import User
+from app.security.hashing import HashingService
+from app.security import roll_import
+from app.security.roll_import import import_roll
+
+ROOT = Path(__file__).parent.parent
+FAST = (1, 1024, 1)
+PASSWORD = "Str0ng!Pass"
+
+
+@pytest.fixture(scope="module")
+def service():
+    svc = HashingService(FAST, workers=2, max_queue=4)
+    yield svc
+    svc.close()
+
+
+def _engine(path: Path):
+    engine = create_engine(f"sqlite:///{path}")
+    init_db(engine)
+    return engine
+
+
+def _users(engine):
+    with engine.connect() as conn:
+        return {row.email: row for row in conn.execute(select(User.__table__))}
+
+
+def _write_csv(path: Path, rows):
+    with path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=["username", "email", "password"])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_csv_import_validates_dedupes_and_hashes(tmp_path: Path, service):
+    engine = _engine(tmp_path / "db.sqlite3")
+    _write_csv(tmp_path / "seed.csv", [{"username": "existing", "email": "old@example.com", "password": PASSWORD}])
+    import_roll(engine, tmp_path / "seed.csv", service=service)
+
+    rows = [{"username": f"voter{i}", "email": f"v{i}@example.com", "password": PASSWORD} for i in range(25)]
+    rows += [
+        {"username": "weak", "email": "weak@example.com", "password": "password"},
+        {"username": "admin", "email": "x@example.com", "password": PASSWORD},
+        {"username": "voter3", "email": "again@example.com", "password": PASSWORD},
+        {"username": "other", "email": "old@example.com", "password": PASSWORD},
+        {"username": "nopass", "email": "nopass@example.com", "password": ""},
+    ]
+    _write_csv(tmp_path / "roll.csv", rows)
+    report = import_roll(engine, tmp_path / "roll.csv", service=service, batch_size=10, rejects=tmp_path / "rej.ndjson")
+
+    assert (report.rows, report.inserted, report.duplicates, report.rejected, report.batches) == (30, 25, 2, 3, 3)
+    users = _users(engine)
+    assert len(users) == 26
+    assert argon2.verify(PASSWORD, users["v7@example.com"].password_hash)
+    assert "$m=1024,t=1,p=1$" in users["v7@example.com"].password_hash
+    rejected = [json.loads(line) for line in (tmp_path / "rej.ndjson").read_text().splitlines()]
+    assert [r["row"] for r in rejected] == [26, 27, 30]
+    assert rejected[1]["error"] == "reserved_identity"
+
+
+def test_resume_after_failed_batch_and_activation_tokens(tmp_path: Path, service, monkeypatch):
+    engine = _engine(tmp_path / "db.sqlite3")
+    source = tmp_path / "roll.ndjson"
+    lines = [json.dumps({"username": f"voter{i}", "email": f"v{i}@example.com"}) for i in range(12)]
+    source.write_text("\n".join(lines[:6] + ["not json"] + lines[6:]) + "\n", encoding="utf-8")
+    checkpoint = tmp_path / "roll.checkpoint"
+    tokens = tmp_path / "tokens.csv"
+
+    real_existing = roll_import._existing
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        return real_existing(*args)
+
+    monkeypatch.setattr(roll_import, "_existing", crash_on_second_batch)
+    with pytest.raises(RuntimeError):
+        import_roll(engine, source, service=service, batch_size=5, checkpoint=checkpoint, tokens=tokens)
+    assert json.loads(checkpoint.read_text())["rows"] == 5
+    assert len(_users(engine)) == 5
+
+    report = import_roll(
+        engine, source, service=service, batch_size=5, checkpoint=checkpoint, tokens=tokens, resume=True
+    )
+    assert report.resumed_from == 5
+    assert (report.rows, report.inserted, report.rejected, report.activation_tokens) == (8, 7, 1, 7)
+    assert json.loads(checkpoint.read_text())["rows"] == 13
+
+    users = _users(engine)
+    assert len(users) == 12
+    with tokens.open(newline="") as fh:
+        issued = list(csv.DictReader(fh))
+    assert len(issued) == 12
+    for row in issued:
+        assert argon2.verify(row["activation_token"], users[row["email"]].password_hash)
+
+
+def test_checkpoint_of_another_roll_is_refused(tmp_path: Path, service):
+    source = tmp_path / "roll.csv"
+    _write_csv(source, [{"username": "a_voter", "email": "a@example.com", "password": PASSWORD}])
+    checkpoint = tmp_path / "cp.json"
+    roll_import.save_checkpoint(checkpoint, tmp_path / "roll.csv", 1)
+    _write_csv(source, [{"username": "b_voter", "email": "b@example.com", "password": PASSWORD + "x"}])
+    with pytest.raises(ValueError):
+        import_roll(_engine(tmp_path / "db.sqlite3"), source, service=service, checkpoint=checkpoint, resume=True)
+
+
+def test_cli_reports_json(tmp_path: Path):
+    source = tmp_path / "roll.csv"
+    _write_csv(source, [{"username": f"cli{i}", "email": f"cli{i}@example.com", "password": PASSWORD} for i in range(3)])
+    env = {**os.environ, "ARGON2_TIME_COST": "1", "ARGON2_MEMORY_COST": "1024", "ARGON2_PARALLELISM": "1"}
+    proc = run(
+        [sys.executable, str(ROOT / "scripts" / "import_voters.py"), str(source), "--db", f"sqlite:///{tmp_path / 'db.sqlite3'}", "--workers", "1", "--json"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=env,
+    )
+    assert proc.returncode == 0, proc.stderr
+    report = json.loads(proc.stdout)
+    assert report["inserted"] == 3 and report["rowsPerSecond"] > 0
+    assert (tmp_path / "roll.csv.checkpoint").exists()
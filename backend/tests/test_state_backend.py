@@ -0,0 +1,124 @@
+import multiprocessing
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.state import MemoryBackend, RedisBackend, SQLiteBackend
+from app.security.login_guard import FAILURE, SUCCESS, GuardConfig, LoginGuard, RedisLoginGuard
+from app.voting.tally import TallyEngine, TallyReplica
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def make_backend(request, tmp_path: Path):
+    made = []
+
+    def make():
+        if request.param == "memory":
+            backend = made[0] if made else MemoryBackend()
+        elif request.param == "sqlite":
+            backend = SQLiteBackend(str(tmp_path / "state.sqlite3"))
+        else:
+            backend = RedisBackend(request.getfixturevalue("redis_url"), prefix=f"t{id(made)}:")
+        made.append(backend)
+        return backend
+
+    yield make
+    for backend in made:
+        backend.close()
+
+
+def test_basic_operations(make_backend):
+    backend = make_backend()
+    assert backend.get("k") is None
+    backend.set("k", "v")
+    assert backend.get_many(["k", "missing"]) == ["v", None]
+    assert backend.add("k", "other") is False
+    assert backend.add("fresh", "1") is True
+    assert backend.incr("n") == 1
+    assert backend.incr("n", 5) == 6
+    assert backend.update("k", lambda cur: (cur + "!", len(cur))) == 1
+    assert backend.get("k") == "v!"
+    assert backend.update("k", lambda cur: (None, "gone")) == "gone"
+    assert backend.get("k") is None
+
+    backend.set("short", "x", ttl=0.05)
+    backend.incr("counter", ttl=0.05)
+    time.sleep(0.1)
+    assert backend.get("short") is None
+    assert backend.add("short", "y") is True
+    assert backend.incr("counter") == 1
+
+
+def test_second_handle_sees_writes(make_backend):
+    # A second backend object stands in for another worker process.
+    first, second = make_backend(), make_backend()
+    config = GuardConfig(
+        enabled=True,
+        fail_limit=3,
+        lockout_seconds=30,
+        captcha_fail_threshold=1,
+        legacy_captcha_threshold=3,
+        failure_ttl_seconds=900,
+        captcha_token="1234",
+    )
+    guard_a, guard_b = LoginGuard(first, config=config), LoginGuard(second, config=config)
+    key = guard_a.key("Shared@Example.com", "10.0.0.1")
+    assert guard_a.record(key, FAILURE).failures == 1
+    assert guard_b.record(key, FAILURE).failures == 2
+    decision = guard_a.record(key, FAILURE)
+    assert decision.locked and 0 < decision.retry_after <= 30
+    assert guard_b.evaluate(key).locked is True
+    guard_b.record(key, SUCCESS)
+    assert guard_a.evaluate(key).locked is False
+
+
+def test_replicas_converge(make_backend):
+    engines = [TallyEngine(), TallyEngine()]
+    replicas = []
+    for engine in engines:
+        engine.load(1, [0, 0])
+        replica = TallyReplica(engine, make_backend(), interval=0)
+        replica.attach()
+        replica.seed(1, [0, 0])
+        replicas.append(replica)
+
+    engines[0].increment(1, 0)
+    engines[1].increment(1, 1)
+    engines[1].increment(1, 1)
+    for replica in replicas:
+        replica.pull([(1, 2)])
+    assert [engine.counts(1) for engine in engines] == [([1, 2], 3), ([1, 2], 3)]
+
+
+def _hammer(path: str, n: int) -> None:
+    backend = SQLiteBackend(path)
+    for _ in range(n):
+        backend.incr("hits")
+        backend.update("log", lambda cur: (str(int(cur or 0) + 1), None))
+    backend.close()
+
+
+def test_sqlite_backend_is_atomic_across_processes(tmp_path: Path):
+    path = str(tmp_path / "procs.sqlite3")
+    SQLiteBackend(path).close()
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_hammer, args=(path, 100)) for _ in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(60)
+        assert proc.exitcode == 0
+    backend = SQLiteBackend(path)
+    assert backend.get_many(["hits", "log"]) == ["400", "400"]
+
+
+def test_redis_users_share_one_bounded_pool(redis_url):
+    from app.security.rate_limit import RedisRateLimiter
+
+    backend = RedisBackend(redis_url, max_connections=7)
+    limiter = RedisRateLimiter(redis_url, max_connections=7)
+    guard = RedisLoginGuard(redis_url, max_connections=7)
+    pool = backend.client.connection_pool
+    assert limiter._redis.connection_pool is pool and guard._redis.connection_pool is pool
+    assert pool.max_connections == 7
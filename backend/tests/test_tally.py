@@ -0,0 +1,57 @@
+import threading
+
+from app.voting.tally import TallyEngine
+
+
+def test_increment_keeps_running_total():
+    engine = TallyEngine(stripes=4)
+    engine.load(1, [0, 0, 0])
+    assert engine.increment(1, 0) == 1
+    assert engine.increment(1, 2) == 2
+    assert engine.counts(1) == ([1, 0, 1], 2)
+    assert engine.total(1) == 2
+    assert engine.total(99) == 0
+
+
+def test_concurrent_increments_are_not_lost():
+    engine = TallyEngine(stripes=2)
+    engine.load(1, [0, 0])
+    engine.load(2, [0, 0, 0])
+
+    def worker(bid: int, n_options: int) -> None:
+        for i in range(2000):
+            engine.increment(bid, i % n_options)
+
+    threads = [threading.Thread(target=worker, args=(1, 2)) for _ in range(4)]
+    threads += [threading.Thread(target=worker, args=(2, 3)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    snap = engine.snapshot()
+    assert snap[1] == ([4000, 4000], 8000)
+    assert sum(snap[2][0]) == snap[2][1] == 8000
+
+
+def test_snapshot_is_consistent_during_writes():
+    engine = TallyEngine(stripes=8)
+    for bid in range(8):
+        engine.load(bid, [0, 0])
+    stop = threading.Event()
+
+    def writer() -> None:
+        i = 0
+        while not stop.is_set():
+            engine.increment(i % 8, i % 2)
+            i += 1
+
+    t = threading.Thread(target=writer)
+    t.start()
+    try:
+        for _ in range(200):
+            for counts, total in engine.snapshot().values():
+                assert sum(counts) == total
+    finally:
+        stop.set()
+        t.join()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.voting.stream import TallyBroadcaster
+from app.voting.tally import TallyEngine
+
+
+def _rows(snapshot):
+    return [{"id": bid, "votes": c, "totalVotes": t} for bid, (c, t) in sorted(snapshot.items())]
+
+
+def _parse(frame: bytes):
+    lines = frame.decode().strip().split("\n")
+    fields = dict(line.split(": ", 1) for line in lines)
+    return fields["event"], int(fields["id"]), json.loads(fields["data"])
+
+
+def test_snapshot_then_shared_delta():
+    engine = TallyEngine()
+    engine.load(1, [0, 0])
+    engine.load(2, [0, 0, 0])
+
+    async def run():
+        broadcaster = TallyBroadcaster(engine, _rows, interval=60)
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+
+        snap_a, snap_b = first.get_nowait(), second.get_nowait()
+        assert snap_a is snap_b  # cached per version
+        event, version, data = _parse(snap_a)
+        assert event == "snapshot"
+        assert data["ballots"][1] == {"id": 2, "votes": [0, 0, 0], "totalVotes": 0}
+
+        assert broadcaster.tick() is False
+        engine.increment(2, 1)
+        engine.increment(2, 1)
+        engine.increment(2, 0)
+        encoded_before = broadcaster.frames_encoded
+        assert broadcaster.tick() is True
+        assert broadcaster.frames_encoded == encoded_before + 1
+
+        delta_a, delta_b = first.get_nowait(), second.get_nowait()
+        assert delta_a is delta_b
+        event, new_version, data = _parse(delta_a)
+        assert event == "delta"
+        assert new_version > version
+        assert data["ballots"] == [{"id": 2, "votes": [1, 2, 0], "totalVotes": 3}]
+
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+        assert broadcaster.subscriber_count == 0
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_resynced_with_snapshot():
+    engine = TallyEngine()
+    engine.load(1, [0])
+
+    async def run():
+        broadcaster = TallyBroadcaster(engine, _rows, interval=60, subscriber_backlog=2)
+        queue = broadcaster.subscribe()
+        # Backlog holds the snapshot and one delta; the second delta overflows.
+        for _ in range(2):
+            engine.increment(1, 0)
+            broadcaster.tick()
+        assert broadcaster.resyncs == 1
+        assert queue.qsize() == 1
+        event, _, data = _parse(queue.get_nowait())
+        assert event == "snapshot"
+        assert data["ballots"] == [{"id": 1, "votes": [2], "totalVotes": 2}]
+        broadcaster.unsubscribe(queue)
+
+    asyncio.run(run())
+
+
+def test_stream_requires_admin():
+    client = TestClient(app)
+    assert client.get("/ballots/tally/stream").status_code == 401
+    res = client.get("/ballots/tally/stream", headers={"Authorization": "Bearer voter-token"})
+    assert res.status_code == 403
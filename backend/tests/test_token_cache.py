@@ -0,0 +1,51 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from jose import jwt
+
+import app.security as security
+from app.core.settings import get_settings, reload_settings
+from app.security.token_cache import TokenCache
+
+
+def _token(secret: str, minutes: int = 5) -> str:
+    exp = datetime.now(timezone.utc) + timedelta(minutes=minutes)
+    return jwt.encode({"sub": "cached@example.com", "role": "voter", "exp": exp}, secret, algorithm="HS256")
+
+
+def test_lru_expiry_and_owner_reset():
+    cache = TokenCache(maxsize=2)
+    owner = object()
+    cache.put("a", owner, ("a@x", "voter"), None)
+    cache.put("b", owner, ("b@x", "voter"), time.time() + 0.05)
+    assert cache.get("a", owner) == ("a@x", "voter")
+    cache.put("c", owner, ("c@x", "admin"), None)  # evicts "b", the least recently used
+    assert cache.get("b", owner) is None
+    assert cache.stats()["evictions"] == 1
+
+    cache.put("d", owner, ("d@x", "voter"), time.time() + 0.05)
+    time.sleep(0.1)
+    assert cache.get("d", owner) is None  # expired with the token
+
+    assert cache.get("a", object()) is None  # new settings object clears the cache
+    assert len(cache) == 0
+
+
+def test_parse_token_hits_cache_and_respects_reload(monkeypatch):
+    token = _token(get_settings().jwt_secret)
+    stats = security.token_cache_stats()
+    assert security._parse_token(token) == ("cached@example.com", "voter")
+    assert security._parse_token(token) == ("cached@example.com", "voter")
+    after = security.token_cache_stats()
+    assert after["hits"] == stats["hits"] + 1
+    assert after["misses"] == stats["misses"] + 1
+
+    monkeypatch.setenv("JWT_SECRET", "rotated-secret")
+    try:
+        reload_settings()
+        assert security._parse_token(token) == (None, None)
+        assert security._parse_token(_token("rotated-secret")) == ("cached@example.com", "voter")
+    finally:
+        monkeypatch.delenv("JWT_SECRET")
+        reload_settings()
+    assert security._parse_token(token) == ("cached@example.com", "voter")
@@ -0,0 +1,123 @@
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.core.settings import get_settings
+from app.main import app
+from app.voting.batch import BatchFormatError, JsonArrayStream, sign_vote
+from app.voting.ledger import VoteLedger, get_ledger
+from app.voting.tally import tally
+
+KEY = "kiosk-test-key"
+
+
+@pytest.fixture
+def ledger(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("KIOSK_SIGNING_KEY", KEY)
+    monkeypatch.setenv("KIOSK_BATCH_MAX_ITEMS", "5")
+    get_settings.cache_clear()
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'batch.sqlite3'}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    led = VoteLedger(engine)
+    app.dependency_overrides[get_ledger] = lambda: led
+    yield led
+    app.dependency_overrides.pop(get_ledger, None)
+    monkeypatch.delenv("KIOSK_SIGNING_KEY")
+    monkeypatch.delenv("KIOSK_BATCH_MAX_ITEMS")
+    get_settings.cache_clear()
+
+
+def _record(voter: str, ballot_id: int, option_index: int, key: str = KEY) -> dict:
+    return {
+        "voter": voter,
+        "ballot_id": ballot_id,
+        "option_index": option_index,
+        "signature": sign_vote(key, voter, ballot_id, option_index),
+    }
+
+
+def test_stream_decodes_items_across_chunk_boundaries():
+    body = json.dumps([{"a": 1}, 12345, "x,y", [1, 2], {"b": {"c": None}}]).encode()
+    stream = JsonArrayStream()
+    items = []
+    for i in range(len(body)):
+        items.extend(stream.feed(body[i : i + 1]))
+    items.extend(stream.close())
+    assert items == [{"a": 1}, 12345, "x,y", [1, 2], {"b": {"c": None}}]
+
+
+@pytest.mark.parametrize("body", [b'{"a": 1}', b'[{"a": 1}', b'[1 2]', b'[1] x', b'[{"a": }]'])
+def test_stream_rejects_malformed_bodies(body):
+    stream = JsonArrayStream()
+    with pytest.raises(BatchFormatError):
+        stream.feed(body)
+        stream.close()
+
+
+def test_batch_reports_per_item_results(ledger):
+    client = TestClient(app)
+    before = client.get("/ballots/1").json()["totalVotes"]
+    records = [
+        _record("k1@example.com", 1, 0),
+        _record("k2@example.com", 1, 2),
+        _record("k1@example.com", 1, 1),            # duplicate within batch
+        _record("k3@example.com", 1, 0, key="nope"),  # bad signature
+        {"voter": "k4@example.com", "ballot_id": 1},  # malformed
+    ]
+    res = client.post("/ballots/batch", json=records)
+    assert res.status_code == 200
+    body = res.json()
+    assert (body["accepted"], body["duplicate"], body["invalid"]) == (2, 1, 2)
+    assert [r["status"] for r in body["results"]] == [
+        "accepted", "accepted", "duplicate", "invalid", "invalid",
+    ]
+    assert body["results"][3]["error"] == "bad_signature"
+    assert tally.total(1) == before + 2
+
+    again = client.post("/ballots/batch", json=[_record("k2@example.com", 1, 0), _record("k5@example.com", 9, 0)])
+    assert [r["status"] for r in again.json()["results"]] == ["duplicate", "invalid"]
+    assert again.json()["results"][1]["error"] == "unknown_ballot"
+    assert ledger.counts()[1] == {0: 1, 2: 1}
+
+
+def test_batch_limits(ledger):
+    client = TestClient(app)
+    records = [_record(f"lim{i}@example.com", 2, 0) for i in range(6)]
+    res = client.post("/ballots/batch", json=records)
+    assert res.status_code == 413
+    assert ledger.counts() == {}
+
+    bad = client.post("/ballots/batch", content=b"[{}", headers={"content-type": "application/json"})
+    assert bad.status_code == 400
+
+
+def test_ballots_are_resolved_once_per_chunk_off_the_event_loop(ledger, monkeypatch):
+    import asyncio
+
+    from app.routers import ballots
+
+    calls = []
+    real = ballots._find_ballots
+
+    def recording(catalog, led, ballot_ids):
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        calls.append((set(ballot_ids), on_loop))
+        return real(catalog, led, ballot_ids)
+
+    monkeypatch.setattr(ballots, "_find_ballots", recording)
+    records = [_record(f"c{i}@example.com", 1 + i % 2, 0) for i in range(4)] + [_record("c9@example.com", 999, 0)]
+    res = TestClient(app).post("/ballots/batch", json=records)
+    assert res.status_code == 200
+    assert res.json()["results"][-1] == {"index": 4, "status": "invalid", "error": "unknown_ballot"}
+    assert calls == [({1, 2, 999}, False)]
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app import db as app_db
+from app.db import init_db
+from app.main import app
+from app.routers import ballots
+from app.voting.ingest import DuplicateVote, IngestQueueFull, VoteIngestor
+from app.voting.ledger import VoteLedger, get_ledger
+from app.voting.tally import TallyEngine
+
+
+class _GatedLedger(VoteLedger):
+    """Ledger whose writes wait for ``gate`` so tests can hold a flush open."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def write_batch(self, votes):
+        self.gate.wait(timeout=5)
+        return super().write_batch(votes)
+
+
+@pytest.fixture
+def ledger(tmp_path: Path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'ingest.sqlite3'}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    led = _GatedLedger(engine)
+    yield led
+    led.gate.set()
+
+
+def _tally() -> TallyEngine:
+    engine = TallyEngine()
+    engine.load(1, [0, 0])
+    return engine
+
+
+def test_flush_durability_acks_after_commit(ledger):
+    engine = _tally()
+
+    async def run():
+        ingestor = VoteIngestor(ledger, engine, flush_interval=0.005)
+        totals = await asyncio.gather(
+            *(ingestor.submit(f"v{i}@example.com", 1, i % 2) for i in range(20))
+        )
+        assert sorted(totals) == list(range(1, 21))
+        assert ledger.has_voted("v7@example.com", 1)
+        assert ingestor.flushed_batches < 20
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert engine.counts(1) == ([10, 10], 20)
+
+
+def test_enqueue_durability_applies_before_flush(ledger):
+    engine = _tally()
+
+    async def run():
+        ingestor = VoteIngestor(ledger, engine, flush_interval=0.005)
+        ledger.gate.clear()
+        total = await ingestor.submit("a@example.com", 1, 0, durability="enqueue")
+        assert total == 1
+        assert engine.total(1) == 1
+        assert ingestor.is_pending("a@example.com", 1)
+        with pytest.raises(DuplicateVote):
+            await ingestor.submit("a@example.com", 1, 1, durability="enqueue")
+        ledger.gate.set()
+        await ingestor.drain()
+        assert not ingestor.is_pending("a@example.com", 1)
+        assert ledger.has_voted("a@example.com", 1)
+        with pytest.raises(DuplicateVote):
+            await ingestor.submit("a@example.com", 1, 1)
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert engine.counts(1) == ([1, 0], 1)
+
+
+def test_full_queue_fails_fast(ledger):
+    engine = _tally()
+
+    async def run():
+        ingestor = VoteIngestor(
+            ledger, engine, max_queue=1, batch_size=1, flush_interval=0, retry_after=7
+        )
+        ledger.gate.clear()
+        await ingestor.submit("a@example.com", 1, 0, durability="enqueue")
+        await asyncio.sleep(0.05)  # flush task picks up the first vote and blocks
+        await ingestor.submit("b@example.com", 1, 0, durability="enqueue")
+        with pytest.raises(IngestQueueFull) as exc:
+            await ingestor.submit("c@example.com", 1, 0, durability="enqueue")
+        assert exc.value.retry_after == 7
+        assert ingestor.rejected_full == 1
+        assert not ingestor.is_pending("c@example.com", 1)
+        ledger.gate.set()
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert engine.total(1) == 2
+
+
+def test_lost_race_at_flush_reverts_tally(ledger):
+    engine = _tally()
+    ledger.write_batch([("a@example.com", 1, 0)])
+
+    async def run():
+        ingestor = VoteIngestor(ledger, engine, flush_interval=0)
+        # Pretend the ledger check missed the row (e.g. another worker wrote it).
+        ingestor.ledger.has_voted = lambda voter, ballot_id: False
+        with pytest.raises(DuplicateVote):
+            await ingestor.submit("a@example.com", 1, 1)
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert engine.counts(1) == ([0, 0], 0)
+
+
+def test_route_returns_503_with_retry_after(ledger, monkeypatch):
+    async def full(*args, **kwargs):
+        raise IngestQueueFull(3)
+
+    # Startup runs init_db on the app database; point it at the test one.
+    monkeypatch.setattr(app_db, "engine", ledger.engine)
+    app.dependency_overrides[get_ledger] = lambda: ledger
+    try:
+        with TestClient(app) as client:
+            ingestor = ballots.get_ingestor(ballots.current_ledger(ledger))
+            monkeypatch.setattr(ingestor, "submit", full)
+            res = client.post(
+                "/ballots/1/vote",
+                json={"option_index": 0},
+                headers={"Authorization": "Bearer voter:queue@example.com"},
+            )
+    finally:
+        app.dependency_overrides.pop(get_ledger, None)
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "3"
+    assert res.json() == {"detail": "vote_queue_full"}
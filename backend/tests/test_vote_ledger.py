@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.main import app
+from app.routers import ballots
+from app.voting.ledger import VoteLedger, get_ledger
+
+
+def _engine(tmp_path: Path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'ledger.sqlite3'}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    return engine
+
+
+@pytest.fixture
+def ledger(tmp_path: Path):
+    led = VoteLedger(_engine(tmp_path))
+    app.dependency_overrides[get_ledger] = lambda: led
+    yield led
+    app.dependency_overrides.pop(get_ledger, None)
+
+
+def test_batch_is_one_commit(ledger: VoteLedger):
+    votes = [(f"voter{i}@example.com", 1, i % 3) for i in range(40)]
+    assert ledger.write_batch(votes) == [True] * 40
+    assert (ledger.commits, ledger.committed_votes) == (1, 40)
+    assert sum(ledger.counts()[1].values()) == 40
+
+
+def test_unique_voter_ballot(ledger: VoteLedger):
+    assert ledger.write_batch([("a@example.com", 1, 0)]) == [True]
+    assert ledger.write_batch([("a@example.com", 1, 2), ("a@example.com", 2, 1)]) == [False, True]
+    assert ledger.write_batch([("b@example.com", 1, 0), ("b@example.com", 1, 1)]) == [True, False]
+    assert ledger.has_voted("a@example.com", 1)
+    assert not ledger.has_voted("c@example.com", 1)
+    assert ledger.counts() == {1: {0: 2}, 2: {1: 1}}
+
+
+def test_votes_survive_restart(tmp_path: Path):
+    first = VoteLedger(_engine(tmp_path))
+    first.write_batch([("a@example.com", 2, 1)])
+
+    second = VoteLedger(_engine(tmp_path))
+    assert second.has_voted("a@example.com", 2)
+    assert second.counts() == {2: {1: 1}}
+
+
+def test_cast_vote_writes_through_ledger(ledger: VoteLedger):
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer voter:ledger-user@example.com"}
+
+    before = client.get("/ballots/2").json()["totalVotes"]
+    res = client.post("/ballots/2/vote", json={"option_index": 0}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["new_total"] == before + 1
+
+    dup = client.post("/ballots/2/vote", json={"option_index": 1}, headers=headers)
+    assert dup.status_code == 409
+    assert dup.json() == {"detail": "already_voted"}
+
+    status_resp = client.get("/ballots/2/status", headers=headers)
+    assert status_resp.json() == {"already_voted": True}
+    assert ledger.has_voted("ledger-user@example.com", 2)
+
+    # A fresh process rebuilds counts from the ledger.
+    ballots._counts_source = None
+    assert client.get("/ballots/2").json()["totalVotes"] == 1
@@ -0,0 +1,80 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.db import init_db
+from app.voting.dedup import VoterIndex
+from app.voting.ingest import VoteIngestor
+from app.voting.ledger import VoteLedger
+from app.voting.tally import TallyEngine
+
+
+def test_add_and_lookup_survive_growth():
+    index = VoterIndex()
+    start_capacity = index.stats()["capacity"]
+    for i in range(5000):
+        assert index.add(f"voter{i}@example.com", i % 7)
+    assert not index.add("voter42@example.com", 0)
+    assert len(index) == 5000
+    assert index.stats()["capacity"] > start_capacity
+    assert all(index.might_contain(f"voter{i}@example.com", i % 7) for i in range(5000))
+    misses = sum(index.might_contain(f"voter{i}@example.com", 99) for i in range(5000))
+    assert misses == 0
+
+
+def test_memory_is_a_few_words_per_entry():
+    index = VoterIndex(expected=100_000)
+    for i in range(100_000):
+        index.add(f"voter{i}@example.com", 1)
+    assert index.memory_bytes() / len(index) <= 32
+
+
+def test_bloom_filter_front():
+    index = VoterIndex(expected=2000, bloom_bits_per_entry=10)
+    for i in range(2000):
+        index.add(f"voter{i}@example.com", 1)
+    stats = index.stats()
+    assert stats["bloom_bits"] > 0
+    assert stats["memory_bytes"] > stats["capacity"] * 8
+    assert all(index.might_contain(f"voter{i}@example.com", 1) for i in range(2000))
+    assert not any(index.might_contain(f"other{i}@example.com", 1) for i in range(2000))
+
+
+def _ledger(tmp_path: Path) -> VoteLedger:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'index.sqlite3'}",
+        connect_args={"check_same_thread": False},
+    )
+    init_db(engine)
+    return VoteLedger(engine)
+
+
+def test_rebuild_from_ledger(tmp_path: Path):
+    ledger = _ledger(tmp_path)
+    ledger.write_batch([(f"v{i}@example.com", 1, 0) for i in range(300)])
+    index = VoterIndex.rebuild(ledger.iter_keys(chunk_size=64), expected=ledger.vote_count())
+    assert len(index) == 300
+    assert index.might_contain("v299@example.com", 1)
+    assert not index.might_contain("v299@example.com", 2)
+
+
+def test_fingerprint_collision_falls_back_to_ledger(tmp_path: Path):
+    ledger = _ledger(tmp_path)
+    ledger.write_batch([("first@example.com", 1, 0)])
+    index = VoterIndex.rebuild(ledger.iter_keys())
+    index.fingerprint = lambda voter, ballot_id: 12345  # every pair collides
+    index.add("first@example.com", 1)
+
+    engine = TallyEngine()
+    engine.load(1, [1, 0])
+    ingestor = VoteIngestor(ledger, engine, flush_interval=0, index=index)
+
+    async def run():
+        assert await ingestor.submit("second@example.com", 1, 1) == 2
+        await ingestor.close()
+
+    asyncio.run(run())
+    assert ledger.has_voted("second@example.com", 1)
+    assert ingestor.has_voted("first@example.com", 1)
+    assert not ingestor.has_voted("third@example.com", 1)
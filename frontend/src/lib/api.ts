@@ -1,4 +1,4 @@
-import axios from "axios";
+import axios, { AxiosError, InternalAxiosRequestConfig } from "axios";
 
 export const api = axios.create({
   baseURL: import.meta.env.VITE_API_BASE || "http://127.0.0.1:8000",
@@ -12,3 +12,42 @@ api.interceptors.request.use((config) => {
   }
   return config;
 });
+
+// On 401, exchange the refresh token once and replay the request. Refreshes
+// are single-flight: concurrent 401s share one rotation, since presenting an
+// already-rotated refresh token revokes the whole session server-side. Other
+// tabs share the token through localStorage; the server answers a token
+// rotated in the last few seconds with the same successor, so a tab that
+// races another one still ends up with the current token.
+let refreshing: Promise<string | null> | null = null;
+
+async function rotateRefreshToken(): Promise<string | null> {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return null;
+  try {
+    const { data } = await axios.post(`${api.defaults.baseURL}/auth/token/refresh`, {
+      refresh_token: refreshToken,
+    });
+    localStorage.setItem("access_token", data.access_token);
+    if (data.refresh_token) localStorage.setItem("refresh_token", data.refresh_token);
+    return data.access_token as string;
+  } catch {
+    localStorage.removeItem("access_token");
+    localStorage.removeItem("refresh_token");
+    return null;
+  }
+}
+
+api.interceptors.response.use(undefined, async (error: AxiosError) => {
+  const config = error.config as (InternalAxiosRequestConfig & { _retried?: boolean }) | undefined;
+  const url = config?.url ?? "";
+  if (error.response?.status !== 401 || !config || config._retried || url.startsWith("/auth/")) {
+    throw error;
+  }
+  refreshing = refreshing ?? rotateRefreshToken().finally(() => (refreshing = null));
+  const token = await refreshing;
+  if (!token) throw error;
+  config._retried = true;
+  config.headers.Authorization = `Bearer ${token}`;
+  return api.request(config);
+});
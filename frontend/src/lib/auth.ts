@@ -1,3 +1,5 @@
+import { api } from "./api";
+
 export const auth = {
   get(): string | null {
     return localStorage.getItem("access_token");
@@ -5,6 +7,12 @@ export const auth = {
   set(token: string) {
     localStorage.setItem("access_token", token);
   },
+  getRefresh(): string | null {
+    return localStorage.getItem("refresh_token");
+  },
+  setRefresh(token: string | null | undefined) {
+    if (token) localStorage.setItem("refresh_token", token);
+  },
   setRole(role: "admin" | "voter") {
     localStorage.setItem("role", role);
   },
@@ -15,8 +23,20 @@ export const auth = {
   isAdmin(): boolean {
     return localStorage.getItem("role") === "admin";
   },
+  // Revokes the refresh-token family server-side before forgetting it.
+  // keepalive lets the request finish when the caller navigates right away.
   clear() {
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) {
+      fetch(`${api.defaults.baseURL}/auth/logout`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ refresh_token: refreshToken }),
+        keepalive: true,
+      }).catch(() => undefined);
+    }
     localStorage.removeItem("access_token");
+    localStorage.removeItem("refresh_token");
     localStorage.removeItem("role");
   },
   isAuthed(): boolean {
@@ -0,0 +1,53 @@
+import { api } from "./api";
+import { auth } from "./auth";
+
+export type TallyRow = {
+  id: number;
+  votes: number[];
+  totalVotes: number;
+  title?: string;
+  options?: string[];
+};
+
+export type TallyFrame = { version: number; ballots: TallyRow[] };
+
+type TallyEvent = "snapshot" | "delta";
+
+// EventSource cannot send an Authorization header, so read the SSE stream with fetch.
+export function streamTally(onFrame: (event: TallyEvent, frame: TallyFrame) => void): () => void {
+  const controller = new AbortController();
+  const token = auth.get();
+
+  (async () => {
+    const res = await fetch(`${api.defaults.baseURL}/ballots/tally/stream`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal: controller.signal,
+    });
+    if (!res.ok || !res.body) return;
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buf = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buf += decoder.decode(value, { stream: true });
+      let sep = buf.indexOf("\n\n");
+      while (sep !== -1) {
+        const raw = buf.slice(0, sep);
+        buf = buf.slice(sep + 2);
+        let event = "";
+        let data = "";
+        for (const line of raw.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if ((event === "snapshot" || event === "delta") && data) {
+          onFrame(event, JSON.parse(data) as TallyFrame);
+        }
+        sep = buf.indexOf("\n\n");
+      }
+    }
+  })().catch(() => undefined);
+
+  return () => controller.abort();
+}
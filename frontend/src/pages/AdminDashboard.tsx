@@ -2,6 +2,7 @@ import React, { useEffect, useMemo, useState } from "react";
 import { api } from "../lib/api";
 import { auth } from "../lib/auth";
 import { emitUx } from "../lib/ux";
+import { streamTally } from "../lib/tallyStream";
 import Button from "../components/ui/Button";
 import Card from "../components/ui/Card";
 
@@ -62,8 +63,24 @@ export default function AdminDashboard(): React.ReactElement {
         if (mounted) setBallots(data);
       })
       .catch(() => setError("Failed to load ballots"));
+    // Live updates: a full snapshot on connect, then per-ballot deltas.
+    const stop = streamTally((event, frame) => {
+      if (!mounted) return;
+      if (event === "snapshot") {
+        setBallots(frame.ballots as Ballot[]);
+        return;
+      }
+      const changed = new Map(frame.ballots.map((b) => [b.id, b]));
+      setBallots((prev) =>
+        prev.map((b) => {
+          const d = changed.get(b.id);
+          return d ? { ...b, votes: d.votes, totalVotes: d.totalVotes } : b;
+        }),
+      );
+    });
     return () => {
       mounted = false;
+      stop();
     };
   }, []);
 
@@ -96,6 +96,7 @@ export default function AdminLogin(): React.ReactElement {
     try {
       const { data } = await api.post(`/auth/login${forceFailSuffix}`, body);
       auth.set(data.access_token);
+      auth.setRefresh(data.refresh_token);
       auth.setRole("admin");
       // Emit signed UX event post-login
       emitUx("login_success", { role: "admin" });
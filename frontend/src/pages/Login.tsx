@@ -87,6 +87,7 @@ export default function Login(): React.ReactElement {
     try {
       const { data } = await api.post(`/auth/login${forceFailSuffix}`, body);
       auth.set(data.access_token);
+      auth.setRefresh(data.refresh_token);
       auth.setRole("voter");
       // Emit signed UX event post-login
       emitUx("login_success", { role: "voter" });